@@ -0,0 +1,79 @@
+"""In-memory TTL cache for credential verification results.
+
+Verifying credentials costs one or more blocking round trips per platform, and
+the answer rarely changes. Results are kept for ``SOCMED_VERIFY_TTL`` seconds;
+failed checks are kept for the shorter ``SOCMED_VERIFY_NEGATIVE_TTL`` so a bad
+token is not re-checked on every request, yet a fixed one is noticed quickly.
+Posters drop a platform's entries as soon as the platform reports an auth
+error (for example Graph error code 190).
+"""
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """Thread-safe cache with separate lifetimes for truthy and falsy values.
+
+    Keys are tuples whose first element is the platform name, which lets
+    :meth:`invalidate` drop everything cached for one platform.
+    """
+
+    def __init__(self, ttl: float = 300, negative_ttl: float = 30) -> None:
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries: Dict[Tuple[Hashable, ...], Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Tuple[Hashable, ...], threading.Lock] = {}
+
+    def get(self, key: Tuple[Hashable, ...], default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return default
+            return value
+
+    def set(self, key: Tuple[Hashable, ...], value: Any) -> None:
+        ttl = self.ttl if value else self.negative_ttl
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+
+    def get_or_compute(self, key: Tuple[Hashable, ...], compute: Callable[[], Any]) -> Any:
+        """Return the cached value for ``key`` or compute and cache it.
+
+        Concurrent misses for the same key wait for a single computation.
+        Exceptions raised by ``compute`` propagate and are not cached.
+        """
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing:
+            return value
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            value = self.get(key, missing)
+            if value is missing:
+                value = compute()
+                self.set(key, value)
+            return value
+
+    def invalidate(self, platform: Optional[str] = None) -> None:
+        """Drop cached entries for ``platform``, or everything when omitted."""
+        with self._lock:
+            if platform is None:
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries if k[0] == platform]:
+                    del self._entries[key]
+
+
+verification_cache = TTLCache(
+    ttl=float(os.getenv("SOCMED_VERIFY_TTL", "300")),
+    negative_ttl=float(os.getenv("SOCMED_VERIFY_NEGATIVE_TTL", "30")),
+)
@@ -0,0 +1,74 @@
+"""Process-wide registry of warm poster clients.
+
+Building a poster opens a fresh ``requests.Session`` (or tweepy client pair),
+so creating one per request throws away pooled keep-alive connections and
+pays a new TLS handshake each time. The registry builds each poster once per
+process and hands the same thread-safe instance to every caller.
+"""
+import functools
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from .cache import verification_cache
+from .scripts.fb_script import FacebookPoster
+from .scripts.twitter_script import TwitterPoster
+from .scripts.instagram_script import InstagramPoster
+from .scripts.linkedin_script import LinkedInPoster
+
+POSTER_FACTORIES: Dict[str, Callable[[], Any]] = {
+    'facebook': FacebookPoster,
+    # Rate limits raise instead of sleeping so jobs can be parked until the reset
+    'twitter': functools.partial(TwitterPoster, wait_on_rate_limit=False),
+    'instagram': InstagramPoster,
+    'linkedin': LinkedInPoster,
+}
+
+
+class PosterRegistry:
+    """Lazily build and cache one poster per platform.
+
+    Construction errors (usually a ``ValueError`` for missing credentials)
+    propagate to the caller and are not cached, so the next call simply
+    tries to build the poster again. ``on_auth_error(platform)`` is wired
+    into every poster so auth failures can invalidate cached verification.
+    """
+
+    def __init__(self, factories: Optional[Dict[str, Callable[[], Any]]] = None,
+                 on_auth_error: Optional[Callable[[str], None]] = None) -> None:
+        self.factories = dict(factories or POSTER_FACTORIES)
+        self.on_auth_error = on_auth_error
+        self._posters: Dict[str, Any] = {}
+        # One lock per platform so a slow constructor doesn't block the others
+        self._locks = {platform: threading.Lock() for platform in self.factories}
+
+    def get(self, platform: str) -> Any:
+        poster = self._posters.get(platform)
+        if poster is not None:
+            return poster
+
+        if platform not in self.factories:
+            raise KeyError(f"Unknown platform: {platform}")
+
+        with self._locks[platform]:
+            # Another thread may have built it while we waited for the lock
+            poster = self._posters.get(platform)
+            if poster is None:
+                poster = self.factories[platform]()
+                if self.on_auth_error is not None:
+                    poster.on_auth_error = lambda: self.on_auth_error(platform)
+                self._posters[platform] = poster
+            return poster
+
+    def reset(self, platform: Optional[str] = None) -> None:
+        """Drop cached posters so the next :meth:`get` builds fresh ones."""
+        for name in ([platform] if platform else list(self.factories)):
+            with self._locks[name]:
+                self._posters.pop(name, None)
+
+
+registry = PosterRegistry(on_auth_error=verification_cache.invalidate)
+
+
+def get_poster(platform: str) -> Any:
+    """Return the shared poster for ``platform`` from the default registry."""
+    return registry.get(platform)
@@ -0,0 +1,223 @@
+"""Background job queue for posting work.
+
+`/post` validates and stores the submitted content, then hands the slow
+platform calls to a :class:`JobQueue` so the web worker is released right
+away. Clients follow a job through `/api/jobs/<id>`.
+
+A job that cannot proceed yet (for example because a rate limit is spent)
+raises :class:`Deferred`; the queue parks it until the given time instead of
+keeping a worker asleep, then runs it again.
+
+Jobs live in the memory of the process that accepted them; nothing is shared
+between processes or kept across a restart. Run the app as a single worker
+process (threads are fine), or route a client's polls back to the same
+process, otherwise `/api/jobs/<id>` answers 404 for a job another process is
+still running.
+"""
+import dataclasses
+import heapq
+import itertools
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DEFERRED = "deferred"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+FINISHED_STATES = (SUCCEEDED, FAILED)
+
+
+class Deferred(Exception):
+    """Raised by a job function to be run again at ``until`` (epoch seconds)."""
+
+    def __init__(self, until: float, message: str = "") -> None:
+        super().__init__(message or f"Deferred until {time.strftime('%H:%M:%S', time.localtime(until))}")
+        self.until = until
+
+
+@dataclasses.dataclass
+class Job:
+    """State of a single queued post, safe to read from any thread."""
+
+    id: str
+    platform: str
+    status: str = QUEUED
+    progress: List[str] = dataclasses.field(default_factory=list)
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: float = dataclasses.field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    wake_at: Optional[float] = None
+    deferrals: int = 0
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    def report(self, message: str) -> None:
+        """Record a progress message for pollers of `/api/jobs/<id>`."""
+        self.progress.append(message)
+        logger.info("Job %s (%s): %s", self.id, self.platform, message)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "platform": self.platform,
+            "status": self.status,
+            "progress": list(self.progress),
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "wake_at": self.wake_at,
+        }
+
+
+class JobQueue:
+    """Run posting jobs on a bounded worker pool and keep their state in memory.
+
+    Job functions are called as ``fn(job, *args, **kwargs)`` and return a
+    result dict with at least a ``success`` flag, or a future of one when the
+    work completes in the background; the worker is then released at once
+    and the job finishes with the future. Finished jobs are kept for
+    ``retention`` seconds so clients can collect the outcome.
+
+    Jobs that raise :class:`Deferred` are parked on a single scheduler thread
+    and resubmitted when they are due; no worker waits in the meantime. Jobs
+    still parked when the queue shuts down are failed.
+    """
+
+    def __init__(self, max_workers: int = 8, retention: int = 3600) -> None:
+        self.retention = retention
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="socmed-job")
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        # Parked jobs as (wake_at, seq, job, fn, args, kwargs); seq keeps the heap from comparing jobs
+        self._parked: List[tuple] = []
+        self._sequence = itertools.count()
+        self._wakeup = threading.Condition()
+        self._scheduler: Optional[threading.Thread] = None
+        self._closed = False
+
+    def submit(self, platform: str, fn: Callable[..., Dict[str, Any]], *args: Any, **kwargs: Any) -> Job:
+        """Queue ``fn`` for background execution and return its :class:`Job`."""
+        job = Job(id=uuid.uuid4().hex, platform=platform)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._wakeup:
+            self._closed = True
+            self._wakeup.notify()
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, job: Job, fn: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]) -> None:
+        job.status = RUNNING
+        job.started_at = time.time()
+        try:
+            result = fn(job, *args, **kwargs)
+        except Deferred as deferred:
+            job.deferrals += 1
+            job.report(f"⏸️ {deferred}")
+            self._park(job, fn, args, kwargs, deferred.until)
+            return
+        except Exception as exc:
+            self._finish(job, error=exc)
+            return
+
+        if isinstance(result, Future):
+            result.add_done_callback(lambda done: self._finish(job, future=done))
+        else:
+            self._finish(job, result=result)
+
+    def _finish(self, job: Job, result: Optional[Dict[str, Any]] = None, error: Optional[BaseException] = None,
+                future: Optional[Future] = None) -> None:
+        if future is not None:
+            try:
+                result = future.result()
+            except Exception as exc:
+                error = exc
+        if error is not None:
+            logger.error("Job %s (%s) crashed: %s", job.id, job.platform, error, exc_info=error)
+            job.error = str(error)
+            status = FAILED
+        else:
+            result = result or {"success": False}
+            job.result = result
+            status = SUCCEEDED if result.get("success") else FAILED
+            if not result.get("success"):
+                job.error = result.get("message")
+        job.wake_at = None
+        job.finished_at = time.time()
+        # Set last: pollers treat a finished status as "everything above is final"
+        job.status = status
+
+    def _park(self, job: Job, fn: Callable[..., Dict[str, Any]], args: tuple, kwargs: Dict[str, Any], until: float) -> None:
+        job.status = DEFERRED
+        job.wake_at = until
+        with self._wakeup:
+            if self._closed:
+                self._finish(job, error=RuntimeError("Job queue shut down before the deferred job could run"))
+                return
+            heapq.heappush(self._parked, (until, next(self._sequence), job, fn, args, kwargs))
+            if self._scheduler is None:
+                self._scheduler = threading.Thread(target=self._schedule_loop, name="socmed-job-scheduler", daemon=True)
+                self._scheduler.start()
+            self._wakeup.notify()
+
+    def _schedule_loop(self) -> None:
+        """Resubmit parked jobs once their wake-up time has passed."""
+        with self._wakeup:
+            while not self._closed:
+                if not self._parked:
+                    self._wakeup.wait()
+                    continue
+                delay = self._parked[0][0] - time.time()
+                if delay > 0:
+                    self._wakeup.wait(delay)
+                    continue
+                _, _, job, fn, args, kwargs = heapq.heappop(self._parked)
+                job.status = QUEUED
+                try:
+                    self._executor.submit(self._run, job, fn, args, kwargs)
+                except RuntimeError as exc:
+                    # The executor was shut down; no parked job can run any more
+                    self._finish(job, error=exc)
+                    self._closed = True
+
+            # Don't leave parked jobs reporting "deferred" forever
+            while self._parked:
+                job = heapq.heappop(self._parked)[2]
+                self._finish(job, error=RuntimeError("Job queue shut down before the deferred job could run"))
+
+    def _prune(self) -> None:
+        """Drop finished jobs older than the retention window (lock held)."""
+        cutoff = time.time() - self.retention
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished and job.finished_at is not None and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+def get_job_queue() -> JobQueue:
+    """Return the job queue attached to the current Flask app."""
+    return current_app.extensions["socmed_jobs"]
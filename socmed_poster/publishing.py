@@ -0,0 +1,319 @@
+"""Platform publishing logic shared by the web routes and background jobs.
+
+Requests are validated up front with :func:`validate_post` so the user gets
+immediate feedback; :func:`run_post` then does the slow platform calls from a
+worker thread and always removes the stored uploads afterwards.
+
+A publisher may return a future instead of a bool when the rest of the work
+happens elsewhere (an Instagram video waiting for container processing); the
+job then finishes when the future does, without holding its worker.
+"""
+import dataclasses
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from .cache import verification_cache
+from .clients import get_poster
+from .jobs import Deferred
+from .scripts.twitter_script import RateLimited
+
+PLATFORM_NAMES = {
+    'facebook': 'Facebook',
+    'twitter': 'Twitter',
+    'instagram': 'Instagram',
+    'linkedin': 'LinkedIn',
+}
+
+VIDEO_URL_EXTENSIONS = ('.mp4', '.mov', '.webm')
+
+
+class PublishError(Exception):
+    """Raised by a publisher when the post fails with a user-facing reason."""
+
+
+@dataclasses.dataclass
+class PostRequest:
+    """Content of a single post after the uploads have been stored on disk."""
+
+    message: str = ''
+    link: str = ''
+    image_files: List[str] = dataclasses.field(default_factory=list)
+    video_files: List[str] = dataclasses.field(default_factory=list)
+    temp_files: List[str] = dataclasses.field(default_factory=list)
+    # Media ids already uploaded per platform, reused when a deferred job runs again
+    uploaded_media: Dict[str, List[str]] = dataclasses.field(default_factory=dict)
+
+    @property
+    def media_files(self) -> List[str]:
+        return self.image_files + self.video_files
+
+    def cleanup(self) -> None:
+        """Remove the stored uploads once every platform is done with them."""
+        for temp_file in self.temp_files:
+            try:
+                os.remove(temp_file)
+                print(f"🗑️ Cleaned up temp file: {temp_file}")
+            except OSError:
+                pass
+
+
+def validate_post(platform: str, post: PostRequest) -> Optional[str]:
+    """Return a user-facing error message if ``post`` cannot go to ``platform``."""
+    images, videos = post.image_files, post.video_files
+
+    if platform == 'facebook':
+        if images and videos:
+            return 'Facebook does not support mixing images and videos in one post. Please upload either images or videos, not both.'
+        if len(images) > 10:
+            return 'Facebook allows maximum 10 images per post.'
+        if len(videos) > 1:
+            return 'Facebook does not support multiple videos in one post. Please upload one video at a time.'
+        if not images and not videos and not post.message:
+            return 'Please enter a message or upload files!'
+
+    elif platform == 'twitter':
+        if len(post.media_files) > 4:
+            return 'Twitter allows maximum 4 media files per tweet.'
+        if not post.media_files and not post.message:
+            return 'Please enter a message or upload media files!'
+
+    elif platform == 'instagram':
+        if images and videos:
+            return 'Instagram does not support mixing images and videos in one post. Upload either images (carousel) or a single video.'
+        if len(videos) > 1:
+            return 'Instagram supports one video per post. Please upload a single video.'
+        if len(images) > 10:
+            return 'Instagram allows maximum 10 images per carousel post.'
+        if not images and not videos and not post.link.startswith('http'):
+            return 'Please upload image/video files or provide a publicly accessible media URL for Instagram posts.'
+
+    elif platform == 'linkedin':
+        if images and videos:
+            return 'LinkedIn does not support mixing images and videos in one post. Please upload either images or one video.'
+        if len(images) > 9:
+            return 'LinkedIn allows maximum 9 images per post.'
+        if len(videos) > 1:
+            return 'LinkedIn supports one video per post. Please upload a single video.'
+        if not post.message and not post.media_files:
+            return 'Please enter a message for LinkedIn!'
+
+    else:
+        return 'Invalid platform selected.'
+
+    return None
+
+
+def _publish_facebook(post: PostRequest, report: Callable[[str], None]) -> bool:
+    poster = get_poster('facebook')
+
+    preflight = verification_cache.get_or_compute(('facebook', 'preflight'), poster.preflight)
+    if not preflight:
+        raise PublishError('Facebook authentication failed. Check your credentials.')
+
+    poster.apply_preflight(preflight)
+
+    message = post.message or None
+    if len(post.image_files) > 1:
+        report(f"📸 Posting {len(post.image_files)} images to Facebook")
+        return poster.post_multiple_photos(post.image_files, message)
+    if len(post.image_files) == 1:
+        report("📸 Posting single image to Facebook")
+        return poster.post_photo(post.image_files[0], message)
+    if len(post.video_files) == 1:
+        report("🎥 Posting video to Facebook")
+        return poster.post_video(post.video_files[0], message)
+
+    report("💬 Posting text message to Facebook")
+    return poster.post(post.message, post.link or None)
+
+
+def _publish_twitter(post: PostRequest, report: Callable[[str], None]) -> Union[bool, Future]:
+    poster = get_poster('twitter')
+
+    try:
+        if post.media_files:
+            uploaded = post.uploaded_media.get('twitter')
+            if uploaded:
+                report(f"📎 Posting {len(uploaded)} already uploaded media file(s) to Twitter")
+            else:
+                report(f"📎 Posting {len(post.media_files)} media file(s) to Twitter")
+            return poster.post(post.message or "📎 Media post", post.media_files, media_ids=uploaded)
+
+        report("💬 Posting text message to Twitter")
+        return poster.post(post.message)
+    except RateLimited as e:
+        if e.media_ids:
+            # The rerun only needs to send the tweet
+            post.uploaded_media['twitter'] = e.media_ids
+        # Park the job until the quota resets instead of sleeping in a worker
+        raise Deferred(e.reset_at + 1, str(e)) from e
+
+
+def _publish_instagram(post: PostRequest, report: Callable[[str], None]) -> Union[bool, Future]:
+    ig = get_poster('instagram')
+    report(f"✅ Instagram poster ready for IG ID {ig.ig_id}")
+
+    caption = post.message or ''
+    if len(post.video_files) == 1:
+        report(f"🎥 Posting single video to Instagram: {os.path.basename(post.video_files[0])}")
+        return ig.post_video_async(post.video_files[0], caption,
+                                   progress=lambda sent, total: report(f"⬆️ Uploaded {sent * 100 // total}% of video"))
+    if len(post.image_files) > 1:
+        report(f"📸 Creating Instagram carousel with {len(post.image_files)} images")
+        return bool(ig.post_carousel(post.image_files, caption))
+    if len(post.image_files) == 1:
+        report("📸 Posting single image to Instagram")
+        return bool(ig.post_image(post.image_files[0], caption))
+
+    if any(ext in post.link.lower() for ext in VIDEO_URL_EXTENSIONS):
+        report("🔗 Posting video from URL to Instagram")
+        return ig.post_video_async(post.link, caption)
+    report("🔗 Posting image from URL to Instagram")
+    return bool(ig.post_image(post.link, caption))
+
+
+def _publish_linkedin(post: PostRequest, report: Callable[[str], None]) -> Union[bool, Future]:
+    poster = get_poster('linkedin')
+    if post.image_files:
+        report(f"📸 Posting {len(post.image_files)} image(s) to LinkedIn")
+        return poster.post(post.message, image_paths=post.image_files)
+    if post.video_files:
+        report("🎥 Posting video to LinkedIn")
+        return poster.post_video_async(post.message, post.video_files[0])
+
+    report("💼 Posting text message to LinkedIn")
+    return poster.post(post.message)
+
+
+PUBLISHERS: Dict[str, Callable[[PostRequest, Callable[[str], None]], Union[bool, Future]]] = {
+    'facebook': _publish_facebook,
+    'twitter': _publish_twitter,
+    'instagram': _publish_instagram,
+    'linkedin': _publish_linkedin,
+}
+
+
+def publish(platform: str, post: PostRequest, report: Callable[[str], None] = print) -> Union[Dict[str, Any], Future]:
+    """Publish ``post`` to one platform and describe the outcome.
+
+    Returns a dict with ``success`` and a user-facing ``message``, or a future
+    of that dict when the publisher finishes in the background; poster
+    configuration errors and unexpected exceptions are reported, not raised.
+    :class:`~socmed_poster.jobs.Deferred` propagates so a job can be retried later.
+    """
+    name = PLATFORM_NAMES.get(platform, platform.title())
+    try:
+        success = PUBLISHERS[platform](post, report)
+    except Deferred:
+        raise
+    except Exception as e:
+        return _failure(name, e)
+
+    if isinstance(success, Future):
+        outcome: Future = Future()
+
+        def _done(pending: Future) -> None:
+            try:
+                outcome.set_result(_outcome(platform, name, pending.result()))
+            except Exception as e:
+                outcome.set_result(_failure(name, e))
+
+        success.add_done_callback(_done)
+        return outcome
+    return _outcome(platform, name, success)
+
+
+def _failure(name: str, error: Exception) -> Dict[str, Any]:
+    if isinstance(error, PublishError):
+        return {'success': False, 'message': str(error)}
+    if isinstance(error, RateLimited):
+        # Hit while finishing a background publish, when the job can no longer be parked
+        retry_at = time.strftime('%H:%M', time.localtime(error.reset_at))
+        return {'success': False, 'message': f'{name} is rate limited; try again after {retry_at}.'}
+    if isinstance(error, ValueError):
+        return {'success': False, 'message': f'Configuration error: {error}'}
+    print(f"{name} error: {error}")
+    return {'success': False, 'message': f'Failed to post to {name}. Check console for details.'}
+
+
+def _outcome(platform: str, name: str, success: Any) -> Dict[str, Any]:
+    if success:
+        return {'success': True, 'message': f'Content posted successfully to {name}!'}
+    return {'success': False, 'message': f'Failed to post content to {platform}. Check console for details.'}
+
+
+def _expected_cost(platform: str, post: PostRequest) -> int:
+    """Rough relative duration of a publish, used to start the slowest first."""
+    if post.video_files:
+        # Instagram video waits for container processing on top of the upload;
+        # LinkedIn video waits for its asset to become available
+        return {'instagram': 4, 'facebook': 3, 'twitter': 3, 'linkedin': 3}.get(platform, 0)
+    if post.image_files:
+        return {'instagram': 2, 'facebook': 1, 'twitter': 1, 'linkedin': 1}.get(platform, 0)
+    return 0
+
+
+def publish_many(platforms: List[str], post: PostRequest, report: Callable[[str], None] = print) -> Dict[str, Dict[str, Any]]:
+    """Publish the same ``post`` to several platforms concurrently.
+
+    The uploads are shared by every platform, so the caller must only clean
+    them up after this returns. Platforms are started slowest first, which
+    keeps total latency close to that of the slowest platform.
+    """
+    ordered = sorted(platforms, key=lambda p: _expected_cost(p, post), reverse=True)
+
+    def _run(platform: str) -> Dict[str, Any]:
+        name = PLATFORM_NAMES.get(platform, platform)
+        try:
+            outcome = publish(platform, post, lambda message: report(f"[{name}] {message}"))
+            return outcome.result() if isinstance(outcome, Future) else outcome
+        except Deferred as e:
+            # The other platforms have posted already, so don't retry the whole fan-out
+            retry_at = time.strftime('%H:%M', time.localtime(e.until))
+            return {'success': False, 'message': f'{name} is rate limited; try again after {retry_at}.'}
+
+    with ThreadPoolExecutor(max_workers=len(ordered) or 1, thread_name_prefix="socmed-fanout") as pool:
+        futures = {platform: pool.submit(_run, platform) for platform in ordered}
+        return {platform: futures[platform].result() for platform in platforms}
+
+
+def run_post(job, platform: str, post: PostRequest) -> Union[Dict[str, Any], Future]:
+    """Job entry point: publish ``post`` and clean up its uploads.
+
+    Uploads are kept when the job is deferred, since it will run again, and
+    until a background publish has finished with them.
+    """
+    try:
+        outcome = publish(platform, post, job.report)
+    except Deferred:
+        raise
+    except BaseException:
+        post.cleanup()
+        raise
+
+    if isinstance(outcome, Future):
+        outcome.add_done_callback(lambda _: post.cleanup())
+    else:
+        post.cleanup()
+    return outcome
+
+
+def run_fan_out(job, platforms: List[str], post: PostRequest) -> Dict[str, Any]:
+    """Job entry point: cross-post ``post`` to ``platforms`` from a single upload."""
+    try:
+        results = publish_many(platforms, post, job.report)
+    finally:
+        post.cleanup()
+
+    posted = [PLATFORM_NAMES[p] for p, r in results.items() if r.get('success')]
+    failed = [PLATFORM_NAMES[p] for p, r in results.items() if not r.get('success')]
+    if not failed:
+        message = f"Content posted successfully to {', '.join(posted)}!"
+    elif posted:
+        message = f"Posted to {', '.join(posted)}; failed for {', '.join(failed)}."
+    else:
+        message = f"Failed to post content to {', '.join(failed)}. Check console for details."
+
+    return {'success': not failed, 'message': message, 'platforms': results}
@@ -1,17 +1,88 @@
 import os
-from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
+import uuid
+from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, jsonify
 from werkzeug.utils import secure_filename
 
-from ..scripts.fb_script import FacebookPoster
-from ..scripts.twitter_script import TwitterPoster
-from ..scripts.instagram_script import InstagramPoster
-from ..scripts.linkedin_script import LinkedInPoster
+from ..jobs import get_job_queue
+from ..publishing import PLATFORM_NAMES, PostRequest, validate_post, run_post, run_fan_out
 
 from .utils import allowed_file
 
 main_bp = Blueprint('main', __name__)
 
 
+def _wants_json():
+    """True when the client prefers JSON (fetch/API) over an HTML redirect."""
+    best = request.accept_mimetypes.best_match(['application/json', 'text/html'])
+    return best == 'application/json'
+
+
+def _reject(message, platform=None):
+    """Report a validation error to the client."""
+    if _wants_json():
+        return jsonify({'error': message, 'platform': platform}), 400
+    flash(message, 'error')
+    return redirect(url_for('main.index', platform=platform) if platform else url_for('main.index'))
+
+
+def _accepted(job):
+    """Acknowledge a queued post with 202 and where to follow its progress."""
+    status_url = url_for('api.job_status', job_id=job.id)
+    if _wants_json():
+        response = jsonify({'job_id': job.id, 'status': job.status, 'status_url': status_url})
+        response.status_code = 202
+        response.headers['Location'] = status_url
+        return response
+    names = ', '.join(PLATFORM_NAMES.get(p, p) for p in job.platform.split(','))
+    flash(f'Post to {names} queued (job {job.id}).', 'success')
+    return redirect(url_for('main.index', platform=job.platform.split(',')[0]))
+
+
+def _requested_platforms():
+    """Platforms selected for a cross-post via repeated or comma-separated `platforms` fields."""
+    platforms = []
+    for value in request.form.getlist('platforms'):
+        for platform in value.split(','):
+            platform = platform.strip().lower()
+            if platform and platform not in platforms:
+                platforms.append(platform)
+    return platforms
+
+
+def _ingest_uploads(platforms, upload_folder):
+    """Store the uploaded media and return a PostRequest describing the post.
+
+    Files get a unique prefix so concurrent jobs never overwrite each other's
+    uploads. Raises ValueError (after removing anything already saved) when a
+    file is neither an allowed image nor an allowed video.
+    """
+    post = PostRequest(
+        message=request.form.get('message', '').strip(),
+        link=request.form.get('link', '').strip(),
+    )
+
+    label = ', '.join(PLATFORM_NAMES[p] for p in platforms)
+
+    for file in request.files.getlist('media_file'):
+        if not file or file.filename == '':
+            continue
+
+        filename = secure_filename(file.filename)
+        filepath = os.path.join(upload_folder, f"{uuid.uuid4().hex[:12]}_{filename}")
+        file.save(filepath)
+        post.temp_files.append(filepath)
+
+        if file.content_type.startswith('image/') and allowed_file(filename, 'image'):
+            post.image_files.append(filepath)
+        elif file.content_type.startswith('video/') and allowed_file(filename, 'video'):
+            post.video_files.append(filepath)
+        else:
+            post.cleanup()
+            raise ValueError(f'Invalid file type for {label}. Please upload image or video files only.')
+
+    return post
+
+
 @main_bp.route('/')
 def index():
     """Main page with posting form"""
@@ -21,252 +92,30 @@ def index():
 
 @main_bp.route('/post', methods=['POST'])
 def post_message():
-    """Handle message posting with optional media for Facebook, Twitter, Instagram."""
-    try:
-        message = request.form.get('message', '').strip()
-        platform = request.form.get('platform', 'facebook').strip()
-        link = request.form.get('link', '').strip()
-        success = False
-
-        upload_folder = current_app.config.get('UPLOAD_FOLDER')
-
-        # Facebook
-        if platform == 'facebook':
-            poster = FacebookPoster()
-
-            if not poster.verify_token() or not poster.verify_page_access():
-                flash('Facebook authentication failed. Check your credentials.', 'error')
-                return redirect(url_for('main.index', platform='facebook'))
-
-            poster.get_page_token()
-
-            uploaded_files = request.files.getlist('media_file')
-            image_files = []
-            video_files = []
-            temp_files = []
-
-            for file in uploaded_files:
-                if file and file.filename != '':
-                    filename = secure_filename(file.filename)
-                    filepath = os.path.join(upload_folder, filename)
-                    file.save(filepath)
-                    temp_files.append(filepath)
-
-                    if file.content_type.startswith('image/') and allowed_file(filename, 'image'):
-                        image_files.append(filepath)
-                    elif file.content_type.startswith('video/') and allowed_file(filename, 'video'):
-                        video_files.append(filepath)
-                    else:
-                        for temp_file in temp_files:
-                            try:
-                                os.remove(temp_file)
-                            except:
-                                pass
-                        flash('Invalid file type for Facebook. Please upload image or video files only.', 'error')
-                        return redirect(url_for('main.index', platform='facebook'))
-
-            try:
-                if len(image_files) > 1:
-                    if len(image_files) > 10:
-                        flash('Facebook allows maximum 10 images per post.', 'error')
-                        success = False
-                    else:
-                        print(f"📸 Posting {len(image_files)} images to Facebook")
-                        success = poster.post_multiple_photos(image_files, message if message else None)
-                elif len(image_files) == 1:
-                    print("📸 Posting single image to Facebook")
-                    success = poster.post_photo(image_files[0], message if message else None)
-                elif len(video_files) == 1:
-                    print("🎥 Posting video to Facebook")
-                    success = poster.post_video(video_files[0], message if message else None)
-                elif len(video_files) > 1:
-                    flash('Facebook does not support multiple videos in one post. Please upload one video at a time.', 'error')
-                    success = False
-                elif image_files and video_files:
-                    flash('Facebook does not support mixing images and videos in one post. Please upload either images or videos, not both.', 'error')
-                    success = False
-                else:
-                    if not message:
-                        flash('Please enter a message or upload files!', 'error')
-                        success = False
-                    else:
-                        print("💬 Posting text message to Facebook")
-                        success = poster.post(message, link if link else None)
-            finally:
-                for temp_file in temp_files:
-                    try:
-                        os.remove(temp_file)
-                        print(f"🗑️ Cleaned up temp file: {temp_file}")
-                    except:
-                        pass
-
-        # Twitter
-        elif platform == 'twitter':
-            poster = TwitterPoster()
-            uploaded_files = request.files.getlist('media_file')
-            media_files = []
-            temp_files = []
-
-            for file in uploaded_files:
-                if file and file.filename != '':
-                    filename = secure_filename(file.filename)
-                    filepath = os.path.join(upload_folder, filename)
-                    file.save(filepath)
-                    temp_files.append(filepath)
-
-                    if (file.content_type.startswith('image/') and allowed_file(filename, 'image')) or \
-                       (file.content_type.startswith('video/') and allowed_file(filename, 'video')):
-                        media_files.append(filepath)
-                    else:
-                        for temp_file in temp_files:
-                            try:
-                                os.remove(temp_file)
-                            except:
-                                pass
-                        flash('Invalid file type for Twitter. Please upload image or video files only.', 'error')
-                        return redirect(url_for('main.index', platform='twitter'))
-
-            try:
-                if len(media_files) > 4:
-                    flash('Twitter allows maximum 4 media files per tweet.', 'error')
-                    success = False
-                elif len(media_files) > 0:
-                    print(f"📎 Posting {len(media_files)} media file(s) to Twitter")
-                    success = poster.post(message if message else "📎 Media post", media_files)
-                else:
-                    if not message:
-                        flash('Please enter a message or upload media files!', 'error')
-                        success = False
-                    else:
-                        print("💬 Posting text message to Twitter")
-                        success = poster.post(message)
-            finally:
-                for temp_file in temp_files:
-                    try:
-                        os.remove(temp_file)
-                        print(f"🗑️ Cleaned up temp file: {temp_file}")
-                    except:
-                        pass
-
-        # Instagram
-        elif platform == 'instagram':
-            try:
-                ig = InstagramPoster()
-                print(f"✅ Instagram poster initialized for IG ID {ig.ig_id}")
-
-                uploaded_files = request.files.getlist('media_file')
-                image_files = []
-                video_files = []
-                temp_files = []
-
-                for file in uploaded_files:
-                    if file and file.filename != '':
-                        filename = secure_filename(file.filename)
-                        temp_dir = os.path.join(upload_folder, 'temp')
-                        os.makedirs(temp_dir, exist_ok=True)
-                        filepath = os.path.join(temp_dir, filename)
-                        file.save(filepath)
-                        temp_files.append(filepath)
-
-                        if file.content_type.startswith('image/') and allowed_file(filename, 'image'):
-                            image_files.append(filepath)
-                        elif file.content_type.startswith('video/') and allowed_file(filename, 'video'):
-                            video_files.append(filepath)
-                        else:
-                            for tf in temp_files:
-                                try:
-                                    os.remove(tf)
-                                except:
-                                    pass
-                            flash('Invalid file type for Instagram. Please upload image or video files only.', 'error')
-                            return redirect(url_for('main.index', platform='instagram'))
-
-                try:
-                    if image_files and video_files:
-                        flash('Instagram does not support mixing images and videos in one post. Upload either images (carousel) or a single video.', 'error')
-                        success = False
-                    elif len(video_files) == 1:
-                        print(f"🎥 Posting single video to Instagram: {video_files[0]}")
-                        result = ig.post_video(video_files[0], message if message else '')
-                        success = bool(result)
-                    elif len(video_files) > 1:
-                        flash('Instagram supports one video per post. Please upload a single video.', 'error')
-                        success = False
-                    elif len(image_files) > 1:
-                        if len(image_files) > 10:
-                            flash('Instagram allows maximum 10 images per carousel post.', 'error')
-                            success = False
-                        else:
-                            print(f"📸 Creating Instagram carousel with {len(image_files)} images")
-                            result = ig.post_carousel(image_files, message if message else '')
-                            success = bool(result)
-                    elif len(image_files) == 1:
-                        print("📸 Posting single image to Instagram")
-                        result = ig.post_image(image_files[0], message if message else '')
-                        success = bool(result)
-                    else:
-                        if link and link.startswith('http'):
-                            if any(ext in link.lower() for ext in ('.mp4', '.mov', '.webm')):
-                                print("🔗 Posting video from URL to Instagram")
-                                result = ig.post_video(link, message if message else '')
-                                success = bool(result)
-                            else:
-                                print("🔗 Posting image from URL to Instagram")
-                                result = ig.post_image(link, message if message else '')
-                                success = bool(result)
-                        else:
-                            flash('Please upload image/video files or provide a publicly accessible media URL for Instagram posts.', 'error')
-                            success = False
-                finally:
-                    for tf in temp_files:
-                        try:
-                            os.remove(tf)
-                            print(f"🗑️ Cleaned up temp file: {tf}")
-                        except:
-                            pass
-            except ValueError as e:
-                flash(f'Configuration error: {e}', 'error')
-                return redirect(url_for('main.index', platform='instagram'))
-            except Exception as e:
-                print(f"Instagram error: {e}")
-                flash('Failed to post to Instagram. Check console for details.', 'error')
-                return redirect(url_for('main.index', platform='instagram'))
-
-        # LinkedIn
-        elif platform == 'linkedin':
-            try:
-                poster = LinkedInPoster()
-                if not message:
-                    flash('Please enter a message for LinkedIn!', 'error')
-                    success = False
-                else:
-                    print("💼 Posting text message to LinkedIn")
-                    success = poster.post(message)
-            except ValueError as e:
-                flash(f'Configuration error: {e}', 'error')
-                return redirect(url_for('main.index', platform='linkedin'))
-            except Exception as e:
-                print(f"LinkedIn error: {e}")
-                flash('Failed to post to LinkedIn. Check console for details.', 'error')
-                return redirect(url_for('main.index', platform='linkedin'))
-
-        else:
-            flash('Invalid platform selected.', 'error')
-            return redirect(url_for('main.index'))
-
-        if success:
-            platform_name = 'Facebook' if platform == 'facebook' else 'Twitter' if platform == 'twitter' else 'Instagram' if platform == 'instagram' else 'LinkedIn' if platform == 'linkedin' else platform.title()
-            flash(f'Content posted successfully to {platform_name}!', 'success')
-        else:
-            flash(f'Failed to post content to {platform}. Check console for details.', 'error')
-
-        return redirect(url_for('main.index', platform=platform))
+    """Validate a post for Facebook, Twitter, Instagram or LinkedIn and queue it.
+
+    The platform calls run on the background job queue; the response is a 202
+    with the job id (or a flash + redirect for plain HTML form submissions).
+    Sending several `platforms` cross-posts the same upload to all of them
+    concurrently; the job result then holds one entry per platform.
+    """
+    platforms = _requested_platforms() or [request.form.get('platform', 'facebook').strip()]
+    if any(p not in PLATFORM_NAMES for p in platforms):
+        return _reject('Invalid platform selected.')
+    platform = platforms[0]
 
+    try:
+        post = _ingest_uploads(platforms, current_app.config.get('UPLOAD_FOLDER'))
     except ValueError as e:
-        flash(f'Configuration error: {e}', 'error')
-        selected = locals().get('platform', 'facebook')
-        return redirect(url_for('main.index', platform=selected))
-    except Exception as e:
-        flash(f'Unexpected error: {e}', 'error')
-        selected = locals().get('platform', 'facebook')
-        return redirect(url_for('main.index', platform=selected))
\ No newline at end of file
+        return _reject(str(e), platform)
+
+    errors = [error for error in (validate_post(p, post) for p in platforms) if error]
+    if errors:
+        post.cleanup()
+        return _reject(' '.join(errors), platform)
+
+    if len(platforms) > 1:
+        job = get_job_queue().submit(','.join(platforms), run_fan_out, platforms, post)
+    else:
+        job = get_job_queue().submit(platform, run_post, platform, post)
+    return _accepted(job)
@@ -1,13 +1,68 @@
+import mimetypes
 import os
-from flask import Blueprint, send_from_directory, current_app
-from werkzeug.utils import secure_filename
+import time
+from urllib.parse import quote
+
+from flask import Blueprint, abort, request, send_from_directory, current_app
+from werkzeug.utils import safe_join, secure_filename
+
+from ..scripts.media_origin import MEDIA_PREFIX, media_origin
 
 utils_bp = Blueprint('utils', __name__)
 
 @utils_bp.route('/public_uploads/<path:filename>')
 def public_upload(filename):
+    """Serve a public upload with Range, conditional GET and cache support.
+
+    Media-origin files are named by their SHA-256, so that name is used as a
+    strong ETag and they are cacheable as immutable until their signed URL
+    expires. With ``PUBLIC_UPLOAD_SENDFILE`` set to ``x-sendfile`` or
+    ``x-accel-redirect`` a front proxy sends the bytes instead of this worker.
+    """
     upload_folder = current_app.config.get('UPLOAD_PUBLIC_FOLDER')
-    return send_from_directory(upload_folder, filename)
+    path = safe_join(upload_folder, filename)
+    if path is None:
+        abort(404)
+    # Decide on the resolved path, so spellings like "./media/..." cannot skip the signature check;
+    # compared case-insensitively in case the filesystem is too
+    filename = os.path.relpath(os.path.abspath(path), os.path.abspath(upload_folder)).replace(os.sep, '/')
+    etag = True
+    max_age = None
+    content_addressed = filename.lower().startswith(MEDIA_PREFIX + '/')
+    if content_addressed:
+        # Media published by the media origin is only served under a valid signed URL
+        expires = request.args.get('expires')
+        if not media_origin.verify(filename, expires, request.args.get('sig')):
+            abort(404)
+        etag = os.path.splitext(os.path.basename(filename))[0]
+        max_age = max(0, int(expires) - int(time.time()))
+
+    if current_app.config.get('PUBLIC_UPLOAD_SENDFILE') == 'x-accel-redirect':
+        response = _accel_redirect(upload_folder, filename, etag, max_age)
+    else:
+        # Flask answers Range and If-None-Match itself, or hands off via X-Sendfile (USE_X_SENDFILE)
+        response = send_from_directory(upload_folder, filename, etag=etag, max_age=max_age, conditional=True)
+    if content_addressed:
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+    return response
+
+
+def _accel_redirect(upload_folder, filename, etag, max_age):
+    """Let nginx serve ``filename`` from its internal ``ACCEL_REDIRECT_PREFIX`` location."""
+    path = safe_join(upload_folder, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+
+    response = current_app.response_class(mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+    prefix = current_app.config.get('ACCEL_REDIRECT_PREFIX', '/protected_uploads').rstrip('/')
+    response.headers['X-Accel-Redirect'] = f"{prefix}/{quote(filename)}"
+    if isinstance(etag, str):
+        response.set_etag(etag)
+    if max_age is not None:
+        response.cache_control.max_age = max_age
+    # nginx handles Range itself; answer matching conditional requests here with 304
+    return response.make_conditional(request)
 
 
 # Allowed file extensions
@@ -0,0 +1,169 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+
+from .graph_batch import GraphBatch, GraphBatchError
+from .processing_model import ProcessingTimeModel, VideoFeatures
+
+logger = logging.getLogger(__name__)
+
+READY_STATES = ('FINISHED', 'READY', 'SUCCEEDED')
+ERROR_STATES = ('ERROR', 'EXPIRED')
+
+
+class ContainerError(Exception):
+    """Raised (through a watch future) when a media container fails or never becomes ready."""
+
+    def __init__(self, message: str, container_id: str, status: Optional[Dict[str, Any]] = None) -> None:
+        super().__init__(message)
+        self.container_id = container_id
+        self.status = status or {}
+
+
+class _Watch:
+    def __init__(self, future: Future, deadline: float, interval: float,
+                 features: Optional[VideoFeatures] = None) -> None:
+        self.future = future
+        self.deadline = deadline
+        self.interval = interval
+        self.features = features
+        self.started = time.monotonic()
+        # Elapsed seconds at the last check that found the container still processing
+        self.last_pending = 0.0
+        self.next_check = self.started + interval
+
+
+class ContainerStatusPoller:
+    """Track the processing status of many Graph media containers from one thread.
+
+    :meth:`watch` registers a container id and returns a future that resolves
+    with the container's last status payload once it reaches ``FINISHED``, or
+    fails with :class:`ContainerError` on ``ERROR`` or after ``timeout``
+    seconds. Every due container is read in a single Graph batch request per
+    round, each with its own backoff from ``initial_interval`` up to
+    ``max_interval``; containers falling due within a tenth of
+    ``initial_interval`` of each other share a round. The polling thread
+    starts on first use.
+
+    With a :class:`ProcessingTimeModel`, containers watched with their
+    :class:`VideoFeatures` are polled on the model's schedule instead, and
+    each finished container's processing time is fed back into the model.
+    """
+
+    FIELDS = "status_code,status"
+
+    def __init__(self, batch_factory: Callable[[], GraphBatch], timeout: float = 180,
+                 initial_interval: float = 5, max_interval: float = 30, backoff_step: float = 5,
+                 model: Optional[ProcessingTimeModel] = None) -> None:
+        self.batch_factory = batch_factory
+        self.model = model
+        self.timeout = timeout
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.backoff_step = backoff_step
+        self._watches: Dict[str, _Watch] = {}
+        self._wakeup = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, container_id: str, features: Optional[VideoFeatures] = None) -> Future:
+        """Start tracking ``container_id``; watching the same id twice shares one future."""
+        with self._wakeup:
+            watch = self._watches.get(container_id)
+            if watch is None:
+                watch = _Watch(Future(), time.monotonic() + self.timeout, self.initial_interval, features)
+                planned = self._planned_delay(watch)
+                if planned is not None:
+                    watch.next_check = watch.started + planned
+                self._watches[container_id] = watch
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._loop, name="ig-container-poller", daemon=True)
+                    self._thread.start()
+                self._wakeup.notify()
+            return watch.future
+
+    @property
+    def pending(self) -> int:
+        with self._wakeup:
+            return len(self._watches)
+
+    def _loop(self) -> None:
+        while True:
+            with self._wakeup:
+                while not self._watches:
+                    self._wakeup.wait()
+                now = time.monotonic()
+                # Take checks that are nearly due along, so containers watched together stay in one batch
+                window = now + self.initial_interval / 10
+                due = {cid: w for cid, w in self._watches.items() if w.next_check <= window}
+                if not any(w.next_check <= now for w in due.values()):
+                    due = {}
+                if not due:
+                    self._wakeup.wait(min(w.next_check for w in self._watches.values()) - now)
+                    continue
+            try:
+                self._poll(due)
+            except Exception as exc:
+                # Keep the loop alive; the affected containers are polled again next round
+                logger.warning("Container status poll failed: %s", exc)
+                self._reschedule(due)
+
+    def _poll(self, due: Dict[str, _Watch]) -> None:
+        with self.batch_factory() as batch:
+            reads = {cid: batch.get(f"{cid}?fields={self.FIELDS}") for cid in due}
+
+        for container_id, read in reads.items():
+            watch = due[container_id]
+            try:
+                status = read.result()
+            except GraphBatchError as exc:
+                logger.warning("Status check for container %s failed: %s", container_id, exc)
+                status = {}
+
+            state = str(status.get('status_code') or status.get('status') or '').upper()
+            if state in READY_STATES:
+                logger.info("Media container %s ready for publish (status: %s)", container_id, state)
+                if self.model is not None and watch.features is not None:
+                    # It finished somewhere between the last two checks
+                    elapsed = time.monotonic() - watch.started
+                    self.model.record(watch.features, (watch.last_pending + elapsed) / 2)
+                self._resolve(container_id, result=status)
+            elif state in ERROR_STATES:
+                self._resolve(container_id, error=ContainerError(
+                    f"Media container {container_id} failed processing: {status.get('status', 'Unknown error')}",
+                    container_id, status))
+            else:
+                logger.debug("Media %s not ready yet: %s", container_id, status)
+                watch.last_pending = time.monotonic() - watch.started
+                self._reschedule({container_id: watch})
+
+    def _reschedule(self, watches: Dict[str, _Watch]) -> None:
+        """Back off each watch's next check, or fail it once its deadline has passed."""
+        now = time.monotonic()
+        for container_id, watch in watches.items():
+            if now >= watch.deadline:
+                self._resolve(container_id, error=ContainerError(
+                    f"Timed out waiting for media {container_id} to be ready after {self.timeout:g}s", container_id))
+                continue
+            planned = self._planned_delay(watch)
+            if planned is None:
+                watch.interval = min(watch.interval + self.backoff_step, self.max_interval)
+                planned = watch.interval
+            watch.next_check = now + planned
+
+    def _planned_delay(self, watch: _Watch) -> Optional[float]:
+        if self.model is None or watch.features is None:
+            return None
+        return self.model.next_poll(watch.features, time.monotonic() - watch.started)
+
+    def _resolve(self, container_id: str, result: Any = None, error: Optional[BaseException] = None) -> None:
+        with self._wakeup:
+            watch = self._watches.pop(container_id, None)
+        if watch is None:
+            return
+        # Callbacks run on this thread, so they must not block the poller
+        if error is not None:
+            watch.future.set_exception(error)
+        else:
+            watch.future.set_result(result)
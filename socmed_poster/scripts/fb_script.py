@@ -1,17 +1,25 @@
 import dataclasses
+import json
 import logging
 import os
-from typing import Optional, Dict, Any, List
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Callable, Tuple
 
 import requests
 from dotenv import load_dotenv
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+from .graph_batch import GraphBatch, GraphBatchError
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Graph error codes meaning the access token is no longer valid
+AUTH_ERROR_CODES = (102, 190)
+
 
 @dataclasses.dataclass
 class Settings:
@@ -19,18 +27,63 @@ class Settings:
     facebook_access_token: Optional[str] = os.getenv("FACEBOOK_ACCESS_TOKEN")
     base_url: str = "https://graph.facebook.com"
     request_timeout: int = 30
+    # Parallel photo uploads per multi-photo post (kept below the session pool size)
+    upload_concurrency: int = int(os.getenv("FACEBOOK_UPLOAD_CONCURRENCY", "4"))
+    # Resumable video upload: bytes per transfer request, attempts per chunk, backoff base (s)
+    video_chunk_size: int = int(os.getenv("FACEBOOK_VIDEO_CHUNK_SIZE", str(8 * 1024 * 1024)))
+    video_chunk_retries: int = int(os.getenv("FACEBOOK_VIDEO_CHUNK_RETRIES", "3"))
+    video_retry_backoff: float = 2.0
+    # Times an interrupted upload resumes from the last acknowledged offset before giving up
+    video_resume_attempts: int = int(os.getenv("FACEBOOK_VIDEO_RESUME_ATTEMPTS", "2"))
+
+
+@dataclasses.dataclass
+class VideoUploadSession:
+    """Progress of a resumable Graph video upload, so an interrupted transfer can resume."""
+
+    upload_session_id: str
+    video_id: Optional[str]
+    file_size: int
+    start_offset: int = 0
+    end_offset: int = 0
+    # Cleared when Graph rejects the session outright, so the upload is not resumed
+    resumable: bool = True
+
+    @property
+    def complete(self) -> bool:
+        return self.start_offset >= self.file_size
+
+
+@dataclasses.dataclass(frozen=True)
+class Preflight:
+    """Outcome of :meth:`FacebookPoster.preflight`; truthy when publishing can proceed."""
+
+    token_valid: bool
+    page_access: bool
+    page_id: Optional[str]
+    page_name: Optional[str] = None
+    page_token: Optional[str] = None
+
+    def __bool__(self) -> bool:
+        return self.token_valid and self.page_access
 
 
-def _build_session(timeout: int = 30) -> requests.Session:
-    """Create a requests.Session with retries configured."""
+def _build_session(timeout: int = 30, pool_size: int = 10, retry_post: bool = True) -> requests.Session:
+    """Create a requests.Session with retries configured.
+
+    ``pool_size`` bounds the keep-alive connections kept per host, so a poster
+    shared between threads reuses warm TLS connections instead of opening new ones.
+    ``retry_post=False`` leaves POST retries to the caller.
+    """
     session = requests.Session()
+    methods = ("HEAD", "GET", "OPTIONS", "POST") if retry_post else ("HEAD", "GET", "OPTIONS")
     retries = Retry(
         total=3,
         backoff_factor=1,
         status_forcelist=(429, 500, 502, 503, 504),
-        allowed_methods=("HEAD", "GET", "OPTIONS", "POST"),
+        allowed_methods=methods,
     )
-    adapter = HTTPAdapter(max_retries=retries)
+    adapter = HTTPAdapter(max_retries=retries, pool_connections=pool_size, pool_maxsize=pool_size)
     session.mount("https://", adapter)
     session.mount("http://", adapter)
     # store a default timeout on session for convenience (not enforced by requests)
@@ -39,12 +92,21 @@ def _build_session(timeout: int = 30) -> requests.Session:
 
 
 class FacebookPoster:
-    """Simple Facebook page posting client with safe defaults and structured logging."""
+    """Simple Facebook page posting client with safe defaults and structured logging.
+
+    Instances are safe to share between threads: the configured user token is
+    never modified, and the page token is replaced by a single assignment (from
+    :meth:`get_page_token` or each preflight) and dropped when Graph rejects a
+    token, so readers always see either a complete token or None.
+    """
 
     def __init__(self, settings: Optional[Settings] = None, session: Optional[requests.Session] = None) -> None:
         self.settings = settings or Settings()
         self.page_id = self.settings.facebook_page_id
         self.access_token = self.settings.facebook_access_token
+        self.page_access_token: Optional[str] = None
+        # Called when Graph rejects our token, e.g. to drop cached verification results
+        self.on_auth_error: Optional[Callable[[], None]] = None
         self.base_url = self.settings.base_url
         self.timeout = self.settings.request_timeout
 
@@ -52,17 +114,47 @@ class FacebookPoster:
             raise ValueError("Missing FACEBOOK_PAGE_ID or FACEBOOK_ACCESS_TOKEN in environment")
 
         self.session = session or _build_session(timeout=self.timeout)
+        # Video chunks are retried one by one in post_video, so their POSTs must not be retried by the adapter too
+        self.transfer_session = session or _build_session(timeout=self.timeout, retry_post=False)
+
+    @property
+    def publish_token(self) -> Optional[str]:
+        """Token used for page operations: the page token once resolved, else the user token."""
+        return self.page_access_token or self.access_token
+
+    def batch(self, token: Optional[str] = None) -> GraphBatch:
+        """Start a Graph batch; queue independent operations and flush them in one request.
+
+        ``token`` defaults to the publishing token.
+        """
+        return GraphBatch(self.session, self.base_url, token or self.publish_token, timeout=self.timeout,
+                          on_error=lambda error: self._check_auth_error(error.get("code")))
 
-    def _request(self, endpoint: str, method: str = "GET", data: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
-        """Make authenticated request to Facebook API using the shared session."""
+    def _check_auth_error(self, error_code: Any) -> None:
+        """Drop the page token and notify ``on_auth_error`` when a Graph error means the token is invalid."""
+        if error_code not in AUTH_ERROR_CODES:
+            return
+        # The page token may be the revoked one; the next preflight resolves a fresh one
+        self.page_access_token = None
+        if self.on_auth_error:
+            self.on_auth_error()
+
+    def _request(self, endpoint: str, method: str = "GET", data: Optional[Dict[str, Any]] = None,
+                 token: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Make authenticated request to Facebook API using the shared session.
+
+        ``token`` defaults to the configured user access token.
+        """
         url = f"{self.base_url}/{endpoint}"
+        token = token or self.access_token
+        resp = None
 
         try:
             if method == "GET":
-                params = {"access_token": self.access_token}
+                params = {"access_token": token}
                 resp = self.session.get(url, params=params, timeout=self.timeout)
             else:
-                payload = {**(data or {}), "access_token": self.access_token}
+                payload = {**(data or {}), "access_token": token}
                 resp = self.session.post(url, data=payload, timeout=self.timeout)
 
             resp.raise_for_status()
@@ -78,6 +170,7 @@ class FacebookPoster:
 
             error_code = error.get("code", "")
             error_message = error.get("message", str(exc))
+            self._check_auth_error(error_code)
 
             if error_code == 190:
                 logger.error("Facebook token expired: %s", error_message)
@@ -107,18 +200,74 @@ class FacebookPoster:
         logger.warning("Page verification failed for %s", self.page_id)
         return False
 
+    def preflight(self) -> Optional[Preflight]:
+        """Check token, page access, page name and page token in one round trip.
+
+        Sends a Graph batch of ``GET me`` and ``GET {page_id}?fields=...,access_token``
+        instead of the four sequential calls made by :meth:`verify_token`,
+        :meth:`verify_page_access` and :meth:`get_page_token`. The page token,
+        when returned, is applied to this poster. Returns None if neither
+        lookup succeeds.
+        """
+        with self.batch(token=self.access_token) as batch:
+            me_future = batch.get("me?fields=id,name")
+            page_future = batch.get(f"{self.page_id}?fields=id,name,access_token")
+
+        bodies: List[Dict[str, Any]] = []
+        for future in (me_future, page_future):
+            try:
+                bodies.append(future.result())
+            except GraphBatchError as exc:
+                logger.warning("Facebook preflight error %s: %s", exc.code or "", exc)
+                bodies.append({})
+
+        if not any(bodies):
+            logger.warning("Facebook preflight failed for page %s", self.page_id)
+            return None
+
+        me, page = bodies
+        page_token = page.get("access_token")
+        if me.get("id") and me.get("id") == self.page_id:
+            # Configured token already is the page token
+            page_token = self.access_token
+
+        result = Preflight(
+            token_valid=bool(me.get("id")),
+            page_access=bool(page.get("id")),
+            page_id=self.page_id,
+            page_name=page.get("name"),
+            page_token=page_token,
+        )
+        self.apply_preflight(result)
+        logger.info("Facebook preflight: token_valid=%s page_access=%s page=%s",
+                    result.token_valid, result.page_access, result.page_name)
+        return result
+
+    def apply_preflight(self, preflight: Preflight) -> None:
+        """Use the page token from a (possibly cached) preflight result for publishing."""
+        if preflight.page_token:
+            self.page_access_token = preflight.page_token
+
     def get_page_token(self) -> bool:
-        """Get and set page access token if available"""
+        """Resolve the page access token used for publishing, if available.
+
+        The result is stored in ``page_access_token``; resolving again is
+        idempotent, so concurrent callers at worst repeat the lookup.
+        """
+        if self.page_access_token:
+            return True
+
         me_result = self._request("me")
         if me_result and me_result.get("id") == self.page_id:
             logger.debug("Already using page access token")
+            self.page_access_token = self.access_token
             return True
 
         result = self._request("me/accounts")
         if result:
             for page in result.get("data", []):
                 if str(page.get("id")) == self.page_id:
-                    self.access_token = page.get("access_token")
+                    self.page_access_token = page.get("access_token")
                     logger.info("Switched to page access token")
                     return True
 
@@ -135,7 +284,7 @@ class FacebookPoster:
         if link:
             data["link"] = link
 
-        result = self._request(f"{self.page_id}/feed", "POST", data)
+        result = self._request(f"{self.page_id}/feed", "POST", data, token=self.publish_token)
         if result:
             logger.info("Posted! ID: %s", result.get("id"))
             return True
@@ -153,7 +302,7 @@ class FacebookPoster:
         try:
             with open(image_path, "rb") as image_file:
                 files = {"source": image_file}
-                data = {"access_token": self.access_token}
+                data = {"access_token": self.publish_token}
                 if caption:
                     data["caption"] = caption
 
@@ -165,6 +314,7 @@ class FacebookPoster:
                     return True
                 else:
                     error = resp.json().get("error", {}) if resp.content else {}
+                    self._check_auth_error(error.get("code"))
                     logger.error("Photo upload failed - Error %s: %s", error.get("code", ""), error.get("message", "Request failed"))
                     return False
 
@@ -184,40 +334,12 @@ class FacebookPoster:
 
         logger.info("Uploading %d photos to Facebook...", len(image_paths))
 
-        # Step 1: Upload all photos without publishing
-        photo_ids: List[str] = []
-        for i, image_path in enumerate(image_paths, 1):
-            if not os.path.exists(image_path):
-                logger.error("Image file not found: %s", image_path)
-                continue
-
-            logger.debug("Uploading photo %d/%d: %s", i, len(image_paths), os.path.basename(image_path))
-
-            url = f"{self.base_url}/{self.page_id}/photos"
-
-            try:
-                with open(image_path, "rb") as image_file:
-                    files = {"source": image_file}
-                    data = {
-                        "access_token": self.access_token,
-                        "published": "false"  # Don't publish yet
-                    }
-
-                    resp = self.session.post(url, files=files, data=data, timeout=60)
-
-                    if resp.status_code == 200:
-                        result = resp.json()
-                        photo_id = result.get('id')
-                        photo_ids.append(photo_id)
-                        logger.info("Photo %d uploaded: %s", i, photo_id)
-                    else:
-                        error = resp.json().get("error", {}) if resp.content else {}
-                        logger.error("Photo %d upload failed - Error %s: %s", i, error.get('code', ''), error.get('message', 'Request failed'))
-                        continue
-
-            except Exception as exc:
-                logger.exception("Photo %d upload error: %s", i, exc)
-                continue
+        # Step 1: Upload all photos without publishing, in parallel over the shared session.
+        # map() keeps the results in input order, so attached_media matches the caller's order.
+        workers = max(1, min(self.settings.upload_concurrency, len(image_paths)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fb-photo-upload") as pool:
+            results = list(pool.map(self._upload_unpublished_photo, range(1, len(image_paths) + 1), image_paths))
+        photo_ids: List[str] = [photo_id for photo_id in results if photo_id]
 
         if not photo_ids:
             logger.error("No photos were uploaded successfully")
@@ -227,13 +349,11 @@ class FacebookPoster:
         logger.info("Creating post with %d photos...", len(photo_ids))
 
         # Format attached_media for the post
-        attached_media = []
-        for photo_id in photo_ids:
-            attached_media.append({"media_fbid": photo_id})
+        attached_media = [{"media_fbid": photo_id} for photo_id in photo_ids]
 
         post_data: Dict[str, Any] = {
-            "access_token": self.access_token,
-            "attached_media": str(attached_media).replace("'", '"')  # Convert to JSON string
+            "access_token": self.publish_token,
+            "attached_media": json.dumps(attached_media)
         }
 
         if caption:
@@ -250,18 +370,12 @@ class FacebookPoster:
                 return True
             else:
                 error = resp.json().get("error", {}) if resp.content else {}
+                self._check_auth_error(error.get("code"))
                 logger.error("Multi-photo post failed - Error %s: %s", error.get('code', ''), error.get('message', 'Request failed'))
 
                 # If post creation fails, try to clean up uploaded photos
                 logger.info("Attempting to clean up uploaded photos...")
-                for photo_id in photo_ids:
-                    try:
-                        delete_url = f"{self.base_url}/{photo_id}"
-                        delete_data = {"access_token": self.access_token}
-                        self.session.delete(delete_url, data=delete_data, timeout=10)
-                    except Exception:
-                        # Ignore cleanup errors
-                        pass
+                self._delete_objects(photo_ids)
 
                 return False
 
@@ -269,36 +383,185 @@ class FacebookPoster:
             logger.exception("Multi-photo post error: %s", exc)
             return False
 
+    def _upload_unpublished_photo(self, index: int, image_path: str) -> Optional[str]:
+        """Upload one photo with ``published=false`` and return its id, or None on failure."""
+        if not os.path.exists(image_path):
+            logger.error("Image file not found: %s", image_path)
+            return None
+
+        logger.debug("Uploading photo %d: %s", index, os.path.basename(image_path))
+
+        url = f"{self.base_url}/{self.page_id}/photos"
+
+        try:
+            with open(image_path, "rb") as image_file:
+                files = {"source": image_file}
+                data = {
+                    "access_token": self.publish_token,
+                    "published": "false"  # Don't publish yet
+                }
+
+                resp = self.session.post(url, files=files, data=data, timeout=60)
+
+                if resp.status_code == 200:
+                    photo_id = resp.json().get('id')
+                    logger.info("Photo %d uploaded: %s", index, photo_id)
+                    return photo_id
+
+                error = resp.json().get("error", {}) if resp.content else {}
+                self._check_auth_error(error.get("code"))
+                logger.error("Photo %d upload failed - Error %s: %s", index, error.get('code', ''), error.get('message', 'Request failed'))
+                return None
+
+        except Exception as exc:
+            logger.exception("Photo %d upload error: %s", index, exc)
+            return None
+
+    def _delete_objects(self, object_ids: List[str]) -> None:
+        """Delete Graph objects (e.g. unpublished photos) in one batch request, ignoring errors."""
+        if not object_ids:
+            return
+        with self.batch() as batch:
+            futures = [batch.delete(object_id) for object_id in object_ids]
+        for object_id, future in zip(object_ids, futures):
+            if future.exception():
+                # Ignore cleanup errors
+                logger.debug("Could not delete %s: %s", object_id, future.exception())
+
     def post_video(self, video_path: str, description: Optional[str] = None) -> bool:
-        """Upload and post a video to Facebook page"""
+        """Upload and post a video to Facebook page using the resumable upload protocol.
+
+        The file is sent in ``video_chunk_size`` pieces (start, transfer and
+        finish phases). A failed chunk is retried on its own; if retries run
+        out, the upload resumes from the last offset Graph acknowledged, up to
+        ``video_resume_attempts`` times, before the call gives up.
+        """
         if not os.path.exists(video_path):
             logger.error("Video file not found: %s", video_path)
             return False
 
-        url = f"{self.base_url}/{self.page_id}/videos"
+        file_size = os.path.getsize(video_path)
+        attempts = max(1, self.settings.video_resume_attempts)
 
         try:
-            with open(video_path, "rb") as video_file:
-                files = {"source": video_file}
-                data = {"access_token": self.access_token}
-                if description:
-                    data["description"] = description
-
-                resp = self.session.post(url, files=files, data=data, timeout=300)
+            upload = self._start_video_upload(file_size)
+            if not upload:
+                return False
 
-                if resp.status_code == 200:
-                    result = resp.json()
-                    logger.info("Video posted! ID: %s", result.get('id'))
-                    return True
+            with open(video_path, "rb") as video_file:
+                for attempt in range(1, attempts + 1):
+                    if attempt > 1:
+                        logger.info("Resuming video upload %s at byte %d/%d", upload.upload_session_id, upload.start_offset, upload.file_size)
+                    while not upload.complete and self._transfer_video_chunk(upload, video_file):
+                        pass
+                    if upload.complete:
+                        break
+                    if not upload.resumable:
+                        # Graph rejected the session itself; resuming it cannot succeed
+                        return False
+                    logger.warning("Video upload interrupted at byte %d/%d (attempt %d/%d)",
+                                   upload.start_offset, upload.file_size, attempt, attempts)
+                    if attempt < attempts:
+                        time.sleep(self.settings.video_retry_backoff * attempt)
                 else:
-                    error = resp.json().get("error", {}) if resp.content else {}
-                    logger.error("Video upload failed - Error %s: %s", error.get('code', ''), error.get('message', 'Request failed'))
+                    logger.error("Video upload failed at byte %d/%d", upload.start_offset, upload.file_size)
                     return False
 
+            data = {"upload_phase": "finish", "upload_session_id": upload.upload_session_id}
+            if description:
+                data["description"] = description
+            result, _ = self._video_phase(data)
+
+            if result and result.get("success", True):
+                logger.info("Video posted! ID: %s", upload.video_id)
+                return True
+            logger.error("Video upload failed - finish phase rejected: %s", result)
+            return False
+
         except Exception as exc:
             logger.exception("Video upload error: %s", exc)
             return False
 
+    def _video_phase(self, data: Dict[str, Any], files: Optional[Dict[str, Any]] = None, timeout: int = 120,
+                     session: Optional[requests.Session] = None) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """POST one phase of a resumable video upload; returns ``(result, error)``."""
+        url = f"{self.base_url}/{self.page_id}/videos"
+        payload = {**data, "access_token": self.publish_token}
+        try:
+            resp = (session or self.session).post(url, data=payload, files=files, timeout=timeout)
+        except requests.RequestException as exc:
+            return None, {"message": str(exc), "is_transient": True}
+
+        try:
+            body = resp.json() if resp.content else {}
+        except ValueError:
+            body = {}
+        if resp.status_code == 200:
+            return body, None
+
+        error = body.get("error", {}) if isinstance(body, dict) else {}
+        if resp.status_code >= 500:
+            error.setdefault("is_transient", True)
+        self._check_auth_error(error.get("code"))
+        return None, error
+
+    def _start_video_upload(self, file_size: int) -> Optional[VideoUploadSession]:
+        result, error = self._video_phase({"upload_phase": "start", "file_size": file_size})
+        if not result:
+            logger.error("Video upload failed to start - Error %s: %s", (error or {}).get("code", ""), (error or {}).get("message", "Request failed"))
+            return None
+        return VideoUploadSession(
+            upload_session_id=str(result["upload_session_id"]),
+            video_id=result.get("video_id"),
+            file_size=file_size,
+            start_offset=int(result.get("start_offset", 0)),
+            end_offset=int(result.get("end_offset", file_size)),
+        )
+
+    def _transfer_video_chunk(self, upload: VideoUploadSession, video_file) -> bool:
+        """Send the next chunk, retrying only this chunk; advances the offsets on success.
+
+        When Graph answers with the offsets it expects instead, the chunk is
+        re-read from there and sent again at once; that does not count as a
+        failed attempt.
+        """
+        attempt = 0
+        while attempt < self.settings.video_chunk_retries:
+            end = min(upload.end_offset or upload.file_size, upload.start_offset + self.settings.video_chunk_size)
+            video_file.seek(upload.start_offset)
+            chunk = video_file.read(end - upload.start_offset)
+
+            result, error = self._video_phase(
+                {"upload_phase": "transfer", "upload_session_id": upload.upload_session_id, "start_offset": upload.start_offset},
+                files={"video_file_chunk": ("chunk", chunk, "application/octet-stream")},
+                session=self.transfer_session,
+            )
+            if result:
+                upload.start_offset = int(result["start_offset"])
+                upload.end_offset = int(result["end_offset"])
+                logger.debug("Video chunk acknowledged, next offset %d/%d", upload.start_offset, upload.file_size)
+                return True
+
+            error = error or {}
+            # Graph reports the offsets it expects when we are out of sync
+            error_data = error.get("error_data") or {}
+            if "start_offset" in error_data and int(error_data["start_offset"]) != upload.start_offset:
+                logger.info("Video upload out of sync at byte %d, continuing from %s", upload.start_offset, error_data["start_offset"])
+                upload.start_offset = int(error_data["start_offset"])
+                upload.end_offset = int(error_data.get("end_offset", upload.end_offset))
+                continue
+            if "start_offset" not in error_data and not error.get("is_transient"):
+                upload.resumable = False
+                logger.error("Video chunk rejected - Error %s: %s", error.get("code", ""), error.get("message", "Request failed"))
+                return False
+
+            attempt += 1
+            logger.warning("Video chunk at byte %d failed (attempt %d/%d): %s", upload.start_offset, attempt,
+                           self.settings.video_chunk_retries, error.get("message", "Request failed"))
+            if attempt < self.settings.video_chunk_retries:
+                time.sleep(self.settings.video_retry_backoff * attempt)
+        return False
+
 
 def main():
     """Main execution function"""
@@ -0,0 +1,120 @@
+import json
+import logging
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+class GraphBatchError(Exception):
+    """Raised (through a batch future) when one Graph operation in a batch fails."""
+
+    def __init__(self, message: str, code: Any = None, status: Optional[int] = None, error: Optional[Dict[str, Any]] = None) -> None:
+        super().__init__(message)
+        self.code = code
+        self.status = status
+        self.error = error or {}
+
+
+class GraphBatch:
+    """Send independent Graph API operations through the `batch` endpoint.
+
+    Operations are queued with :meth:`add` (or the :meth:`get`, :meth:`post`
+    and :meth:`delete` shortcuts), each returning a future. :meth:`flush` sends
+    everything queued in as few requests as Graph allows (50 operations per
+    batch) and resolves each future with that operation's JSON body, or with a
+    :class:`GraphBatchError` carrying its own error. Leaving a ``with`` block
+    flushes automatically.
+    """
+
+    MAX_BATCH_SIZE = 50
+
+    def __init__(self, session: requests.Session, base_url: str, access_token: Optional[str], timeout: int = 30,
+                 on_error: Optional[Callable[[Dict[str, Any]], None]] = None) -> None:
+        self.session = session
+        self.base_url = base_url
+        self.access_token = access_token
+        self.timeout = timeout
+        self.on_error = on_error
+        self._pending: List[Tuple[Dict[str, Any], Future]] = []
+
+    def __enter__(self) -> "GraphBatch":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.flush()
+
+    def add(self, method: str, relative_url: str, body: Optional[Dict[str, Any]] = None) -> Future:
+        operation: Dict[str, Any] = {"method": method, "relative_url": relative_url}
+        if body:
+            operation["body"] = urlencode(body)
+        future: Future = Future()
+        self._pending.append((operation, future))
+        return future
+
+    def get(self, relative_url: str) -> Future:
+        return self.add("GET", relative_url)
+
+    def post(self, relative_url: str, body: Optional[Dict[str, Any]] = None) -> Future:
+        return self.add("POST", relative_url, body)
+
+    def delete(self, relative_url: str) -> Future:
+        return self.add("DELETE", relative_url)
+
+    def flush(self) -> None:
+        """Send all queued operations and resolve their futures."""
+        pending, self._pending = self._pending, []
+        for start in range(0, len(pending), self.MAX_BATCH_SIZE):
+            self._send(pending[start:start + self.MAX_BATCH_SIZE])
+
+    def _send(self, group: List[Tuple[Dict[str, Any], Future]]) -> None:
+        payload = {
+            "batch": json.dumps([operation for operation, _ in group]),
+            "include_headers": "false",
+            "access_token": self.access_token,
+        }
+        try:
+            resp = self.session.post(f"{self.base_url}/", data=payload, timeout=self.timeout)
+            responses = resp.json()
+        except (requests.RequestException, ValueError) as exc:
+            logger.error("Graph batch request failed: %s", exc)
+            for _, future in group:
+                future.set_exception(GraphBatchError(str(exc)))
+            return
+
+        if resp.status_code != 200 or not isinstance(responses, list):
+            error = responses.get("error", {}) if isinstance(responses, dict) else {}
+            self._report(error)
+            logger.error("Graph batch rejected - Error %s: %s", error.get("code", ""), error.get("message", "Request failed"))
+            for _, future in group:
+                future.set_exception(GraphBatchError(error.get("message", "Batch request failed"), error.get("code"), resp.status_code, error))
+            return
+
+        for (operation, future), response in zip(group, responses):
+            # Graph returns null for operations it did not get to (e.g. batch timeout)
+            if not response:
+                future.set_exception(GraphBatchError(f"No response for {operation['relative_url']}"))
+                continue
+            try:
+                body = json.loads(response.get("body") or "{}")
+            except ValueError:
+                body = {"raw_text": response.get("body")}
+
+            status = response.get("code")
+            if status == 200:
+                future.set_result(body)
+            else:
+                error = body.get("error", {}) if isinstance(body, dict) else {}
+                self._report(error)
+                future.set_exception(GraphBatchError(error.get("message", "Request failed"), error.get("code"), status, error))
+
+        # A short response list must not leave callers waiting on futures that never resolve
+        for operation, future in group[len(responses):]:
+            future.set_exception(GraphBatchError(f"No response for {operation['relative_url']}"))
+
+    def _report(self, error: Dict[str, Any]) -> None:
+        if error and self.on_error:
+            self.on_error(error)
@@ -4,7 +4,9 @@ import json
 import logging
 import os
 import time
-from typing import Optional, List, Dict
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Optional, List, Dict, Callable, Any
 
 import requests
 from dotenv import load_dotenv, find_dotenv
@@ -12,6 +14,12 @@ from PIL import Image  # 🔧 New import for resizing
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+from .container_poller import ContainerError, ContainerStatusPoller
+from .graph_batch import GraphBatch
+from .media_cache import content_key, derivative_cache, upload_index
+from .media_origin import media_origin
+from .processing_model import probe_video, processing_model
+
 # Load .env from repository root if present
 dotenv_path = find_dotenv()
 if dotenv_path:
@@ -29,16 +37,46 @@ class CloudinaryUploadError(Exception):
 
 
 
+@dataclasses.dataclass
+class CloudinaryUpload:
+    """Progress of a chunked Cloudinary upload, so an interrupted transfer can resume."""
+
+    upload_id: str
+    file_size: int
+    # Form fields (preset or signature) sent with every chunk of this upload
+    data: Dict[str, Any]
+    offset: int = 0
+
+
 class InstagramPoster:
     """Instagram direct posting via Graph API (Business/Creator Account)"""
     
+    # Graph error codes meaning the access token is no longer valid
+    AUTH_ERROR_CODES = (102, 190)
+
     # Configuration constants
     API_VERSION = "v23.0"
     BASE_URL_TEMPLATE = "https://graph.facebook.com/{version}"
     CLOUDINARY_FOLDER = "socmed_poster"
+    CLOUDINARY_API_BASE = "https://api.cloudinary.com/v1_1"
+    # Files larger than one chunk are sent as Content-Range chunks (Cloudinary needs >= 5 MB
+    # per chunk except the last); attempts per chunk and backoff base (s)
+    CLOUDINARY_CHUNK_SIZE = int(os.getenv("CLOUDINARY_CHUNK_SIZE", str(20 * 1024 * 1024)))
+    CLOUDINARY_CHUNK_RETRIES = int(os.getenv("CLOUDINARY_CHUNK_RETRIES", "3"))
+    CLOUDINARY_RETRY_BACKOFF = 2.0
+    # Times an interrupted upload resumes from the last accepted chunk before giving up
+    CLOUDINARY_RESUME_ATTEMPTS = int(os.getenv("CLOUDINARY_RESUME_ATTEMPTS", "2"))
     POLLING_TIMEOUT = 180
     INITIAL_POLL_INTERVAL = 5
     MAX_POLL_INTERVAL = 30
+    # Carousel pipeline: Pillow releases the GIL while decoding/resizing, so image
+    # preparation gets one thread per core; uploads and child containers share an I/O pool
+    PREPARE_WORKERS = os.cpu_count() or 2
+    UPLOAD_CONCURRENCY = int(os.getenv("INSTAGRAM_UPLOAD_CONCURRENCY", "4"))
+    # Instagram-compatible video settings requested on signed Cloudinary uploads
+    CLOUDINARY_VIDEO_TRANSFORM = {'video_codec': 'h264', 'audio_codec': 'aac', 'format': 'mp4', 'fps': '30', 'bit_rate': '1000k'}
+    # Cache key for prepared images; bump "version" whenever _render_instagram_image changes its output
+    IG_IMAGE_TRANSFORM = {"op": "square_pad", "size": 1080, "quality": 90, "version": 1}
 
     def __init__(self):
         self.ig_id = os.getenv("INSTAGRAM_USER_ID")
@@ -51,6 +89,24 @@ class InstagramPoster:
         # Create a resilient requests session used by all network calls
         self.session = self._build_session(timeout=30)
 
+        # Called when Graph rejects our token, e.g. to drop cached verification results
+        self.on_auth_error: Optional[Callable[[], None]] = None
+
+        # Prepared (IG-ready) images, shared by content hash across posts, and the
+        # URLs of content already uploaded to Cloudinary
+        self.media_cache = derivative_cache
+        self.upload_index = upload_index
+        # When configured, local media is served from our own public folder instead
+        self.media_origin = media_origin
+
+        # One polling loop for every container this poster waits on, scheduled from past
+        # processing times, and a small pool that publishes containers once they are ready
+        self.poller = ContainerStatusPoller(self.batch, timeout=self.POLLING_TIMEOUT,
+                                            initial_interval=self.INITIAL_POLL_INTERVAL,
+                                            max_interval=self.MAX_POLL_INTERVAL,
+                                            model=processing_model)
+        self._publisher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="ig-publish")
+
         # Configure a module logger
         self.logger = logging.getLogger("instagram_poster")
         if not self.logger.handlers:
@@ -69,6 +125,18 @@ class InstagramPoster:
             return s
         return f"{s[:3]}...{s[-3:]}"
 
+    def _check_auth_error(self, data: Any) -> None:
+        """Notify ``on_auth_error`` when a Graph error payload means the token is invalid."""
+        if not isinstance(data, dict) or not isinstance(data.get('error'), dict):
+            return
+        if data['error'].get('code') in self.AUTH_ERROR_CODES and self.on_auth_error:
+            self.on_auth_error()
+
+    def batch(self) -> GraphBatch:
+        """Start a Graph batch; queue independent operations and flush them in one request."""
+        return GraphBatch(self.session, self.base_url, self.access_token, timeout=30,
+                          on_error=lambda error: self._check_auth_error({'error': error}))
+
     def get_account_info(self) -> Optional[dict]:
         """Get Instagram account information (username, name).
 
@@ -92,6 +160,10 @@ class InstagramPoster:
                     return result
                 elif resp.status_code == 400:
                     # Bad request, likely wrong fields or token
+                    try:
+                        self._check_auth_error(resp.json())
+                    except ValueError:
+                        pass
                     self.logger.error("Failed to get Instagram account info (400): %s", resp.text)
                     break
                 else:
@@ -113,9 +185,14 @@ class InstagramPoster:
         """
         Ensure image meets Instagram's aspect ratio requirements.
         If not, resize/pad it to 1080x1080 (safe square).
+
+        Image.open only reads the header, so compliant images return without
+        decoding any pixels. Fixed images are kept in :attr:`media_cache`
+        unless ``output_path`` is given, so the same creative is only
+        converted once; the cached file is pinned until it is passed to
+        ``media_cache.release``.
         """
         with Image.open(file_path) as img:
-            img = img.convert("RGB")
             w, h = img.size
             ratio = w / h
 
@@ -124,27 +201,43 @@ class InstagramPoster:
                 return file_path
 
             # Otherwise, resize + pad to square
-            if not output_path:
-                base, ext = os.path.splitext(file_path)
-                output_path = f"{base}_igready.jpg"
-
-            target_size = (1080, 1080)
-            img.thumbnail(target_size, Image.Resampling.LANCZOS)
-
-            new_img = Image.new("RGB", target_size, (255, 255, 255))
-            new_img.paste(img, ((target_size[0] - img.size[0]) // 2,
-                                (target_size[1] - img.size[1]) // 2))
-            new_img.save(output_path, "JPEG", quality=90)
-
-            self.logger.info("Fixed aspect ratio: saved IG-ready image at %s", output_path)
-            return output_path
+            if output_path:
+                self._render_instagram_image(img, output_path)
+                return output_path
+
+            return self.media_cache.get_or_create(
+                file_path, self.IG_IMAGE_TRANSFORM, lambda path: self._render_instagram_image(img, path), suffix=".jpg",
+                pin=True)
+
+    def _render_instagram_image(self, img: Image.Image, output_path: str) -> None:
+        size = self.IG_IMAGE_TRANSFORM["size"]
+        target_size = (size, size)
+        w, h = img.size
+
+        # JPEG only: decode at 1/2, 1/4 or 1/8 scale as long as the result still covers
+        # the size thumbnail() will shrink to; no-op for other formats
+        scale = min(target_size[0] / w, target_size[1] / h)
+        if scale < 1:
+            img.draft("RGB", (int(w * scale), int(h * scale)))
+        img = img.convert("RGB")
+        img.thumbnail(target_size, Image.Resampling.LANCZOS)
+
+        new_img = Image.new("RGB", target_size, (255, 255, 255))
+        new_img.paste(img, ((target_size[0] - img.size[0]) // 2,
+                            (target_size[1] - img.size[1]) // 2))
+        new_img.save(output_path, "JPEG", quality=self.IG_IMAGE_TRANSFORM["quality"])
+
+        self.logger.info("Fixed aspect ratio: saved IG-ready image at %s", output_path)
 
     def post_image(self, image_url: str, caption: str):
         """Publish an image post"""
         if not image_url.startswith('http'):
             # Local file → fix aspect ratio first
-            image_url = self._prepare_instagram_image(image_url)
-            uploaded = self._upload_to_cloudinary(image_url)
+            prepared = self._prepare_instagram_image(image_url)
+            try:
+                uploaded = self._public_url(prepared)
+            finally:
+                self.media_cache.release(prepared)
             if not uploaded:
                 self.logger.error("Could not upload local file to Cloudinary.")
                 return None
@@ -160,6 +253,7 @@ class InstagramPoster:
         data = res.json()
 
         if "id" not in data:
+            self._check_auth_error(data)
             self.logger.error("Failed to create media container: %s", data)
             return None
 
@@ -175,6 +269,7 @@ class InstagramPoster:
             self.logger.info("Successfully posted! IG Post ID: %s", result['id'])
             return result["id"]
         else:
+            self._check_auth_error(result)
             self.logger.error("Failed to publish: %s", result)
             return None
 
@@ -189,31 +284,35 @@ class InstagramPoster:
             return None
         self.logger.info("Creating carousel with %d images...", len(image_paths))
 
-        children: List[str] = []
-        for i, image_path in enumerate(image_paths):
-            self.logger.debug("Processing image %d/%d: %s", i + 1, len(image_paths), os.path.basename(image_path))
-
-            if not image_path.startswith('http'):
-                image_path = self._prepare_instagram_image(image_path)  # 🔧 Fix aspect ratio first
-                uploaded = self._upload_to_cloudinary(image_path)
-                if not uploaded:
-                    self.logger.error("Failed to upload image %d to Cloudinary", i + 1)
+        # Pipeline per image: prepare (CPU pool) → Cloudinary upload → child container (I/O pool).
+        # Each image moves on as soon as its own previous stage is done; children keep input order.
+        io_workers = max(1, min(self.UPLOAD_CONCURRENCY, len(image_paths)))
+        cpu_pool = ThreadPoolExecutor(max_workers=self.PREPARE_WORKERS, thread_name_prefix="ig-prepare")
+        io_pool = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="ig-upload")
+        prepared: List[Optional[Future]] = []
+        futures: List[Future] = []
+        try:
+            prepared = [cpu_pool.submit(self._prepare_instagram_image, path) if not path.startswith('http') else None
+                        for path in image_paths]
+            futures = [io_pool.submit(self._create_carousel_child, i + 1, path, prepared[i])
+                       for i, path in enumerate(image_paths)]
+
+            children: List[Optional[str]] = [None] * len(image_paths)
+            index_of = {future: i for i, future in enumerate(futures)}
+            for future in as_completed(futures):
+                try:
+                    children[index_of[future]] = future.result()
+                except Exception as e:
+                    self.logger.error("Carousel image %d failed: %s", index_of[future] + 1, e)
                     return None
-                image_url = uploaded
-            else:
-                image_url = image_path
-
-            container_url = f"{self.base_url}/{self.ig_id}/media"
-            payload = {"image_url": image_url, "is_carousel_item": "true", "access_token": self.access_token}
-            res = self.session.post(container_url, data=payload, timeout=30)
-            data = res.json()
-
-            if "id" not in data:
-                self.logger.error("Failed to create container for image %d: %s", i + 1, data)
-                return None
-
-            children.append(data["id"])
-            self.logger.debug("Created container %d: %s", i + 1, data['id'])
+        finally:
+            # After a failure, drop queued work and don't wait for uploads still in flight
+            cpu_pool.shutdown(wait=False, cancel_futures=True)
+            io_pool.shutdown(wait=False, cancel_futures=True)
+            # Children that never ran can't give back their prepared image themselves
+            for future, pending in zip(futures, prepared):
+                if pending is not None and future.cancelled():
+                    self._release_prepared(pending)
 
         # Carousel container + publish
         carousel_url = f"{self.base_url}/{self.ig_id}/media"
@@ -223,6 +322,7 @@ class InstagramPoster:
         data = res.json()
 
         if "id" not in data:
+            self._check_auth_error(data)
             self.logger.error("Failed to create carousel container: %s", data)
             return None
 
@@ -238,9 +338,66 @@ class InstagramPoster:
             self.logger.info("Successfully posted carousel! IG Post ID: %s", result['id'])
             return result["id"]
         else:
+            self._check_auth_error(result)
             self.logger.error("Failed to publish carousel: %s", result)
             return None
 
+    def _create_carousel_child(self, index: int, image_path: str, prepared: Optional[Future] = None) -> str:
+        """Upload one carousel image and create its child container; returns the container id.
+
+        ``prepared`` is the pending result of :meth:`_prepare_instagram_image`
+        for local files. Raises :class:`InstagramAPIError` or
+        :class:`CloudinaryUploadError` on failure.
+        """
+        self.logger.debug("Processing image %d: %s", index, os.path.basename(image_path))
+        image_url = image_path
+        if prepared is not None:
+            try:
+                image_url = self._public_url(prepared.result())
+            finally:
+                self._release_prepared(prepared)
+            if not image_url:
+                raise CloudinaryUploadError(f"Failed to upload image {index} to Cloudinary")
+
+        container_url = f"{self.base_url}/{self.ig_id}/media"
+        payload = {"image_url": image_url, "is_carousel_item": "true", "access_token": self.access_token}
+        res = self.session.post(container_url, data=payload, timeout=30)
+        data = res.json()
+
+        if "id" not in data:
+            self._check_auth_error(data)
+            raise InstagramAPIError(f"Failed to create container for image {index}: {data}")
+
+        self.logger.debug("Created container %d: %s", index, data['id'])
+        return data["id"]
+
+    def _release_prepared(self, prepared: Future) -> None:
+        """Unpin a prepared image once its (possibly still running) preparation is done."""
+        def _release(done: Future) -> None:
+            if not done.cancelled() and done.exception() is None:
+                self.media_cache.release(done.result())
+        prepared.add_done_callback(_release)
+
+    def _public_url(self, file_path: str, resource_type: str = 'image',
+                    progress: Optional[Callable[[int, int], None]] = None) -> Optional[str]:
+        """Return a URL Graph can fetch ``file_path`` from.
+
+        Uses a signed URL on our own :attr:`media_origin` when one is configured
+        (no third-party upload), otherwise uploads to Cloudinary.
+        """
+        if self.media_origin.enabled:
+            try:
+                url = self.media_origin.publish(file_path)
+            except OSError as e:
+                self.logger.warning("Could not publish %s on the media origin: %s", file_path, e)
+            else:
+                if progress:
+                    size = os.path.getsize(file_path)
+                    progress(size, size)
+                self.logger.info("Serving %s from the media origin", os.path.basename(file_path))
+                return url
+        return self._upload_to_cloudinary(file_path, resource_type=resource_type, progress=progress)
+
     def _upload_to_imgur(self, file_path: str) -> Optional[str]:
         """Upload a local image to Imgur anonymously and return the public URL.
 
@@ -270,11 +427,14 @@ class InstagramPoster:
         self.logger.info("Uploaded to Imgur: %s", link)
         return link
 
-    def _upload_to_cloudinary(self, file_path: str, resource_type: str = 'image') -> Optional[str]:
+    def _upload_to_cloudinary(self, file_path: str, resource_type: str = 'image',
+                              progress: Optional[Callable[[int, int], None]] = None) -> Optional[str]:
         """Upload a local file to Cloudinary and return the secure URL.
 
         Supports unsigned (preset) or signed uploads depending on env vars.
-        Accepts `resource_type` of 'image' or 'video'.
+        Accepts `resource_type` of 'image' or 'video'. Files larger than
+        ``CLOUDINARY_CHUNK_SIZE`` are uploaded in resumable chunks.
+        ``progress(bytes_sent, total_bytes)`` is called after each chunk.
         """
         cloud_name = os.getenv('CLOUDINARY_CLOUD_NAME')
         api_key = os.getenv('CLOUDINARY_API_KEY')
@@ -296,64 +456,63 @@ class InstagramPoster:
             self.logger.info("For signed uploads: set CLOUDINARY_API_KEY=%s and CLOUDINARY_API_SECRET=%s", self._mask_sensitive_data(api_key), self._mask_sensitive_data(api_secret))
             return None
 
-        url = f'https://api.cloudinary.com/v1_1/{cloud_name}/{resource_type}/upload'
+        url = f'{self.CLOUDINARY_API_BASE}/{cloud_name}/{resource_type}/upload'
         if not os.path.exists(file_path):
             self.logger.error('Local file not found: %s', file_path)
             return None
 
+        # Identical bytes uploaded the same way already have a URL; skip the upload
+        transform = self.CLOUDINARY_VIDEO_TRANSFORM if resource_type == 'video' and use_signed else {}
+        index_key = content_key(file_path, {'cloud': cloud_name, 'resource_type': resource_type,
+                                            'preset': upload_preset, 'folder': self.CLOUDINARY_FOLDER, **transform})
+        cached_url = self.upload_index.get(index_key)
+        if cached_url:
+            self.logger.info('Reusing Cloudinary upload: %s', cached_url)
+            return cached_url
+
         try:
-            with open(file_path, 'rb') as f:
-                files = {'file': f}
-                if use_unsigned:
-                    data = {'upload_preset': upload_preset}
-                    # For unsigned uploads, transformations must be handled by the upload preset
-                    # The preset should be configured in Cloudinary dashboard with video settings
-                    self.logger.info("Using unsigned Cloudinary upload with preset %s", self._mask_sensitive_data(upload_preset))
-                    if resource_type == 'video':
-                        self.logger.info("Note: Video transformations (H.264, MP4) should be configured in your Cloudinary upload preset")
-                else:
-                    timestamp = int(time.time())
-                    params_to_sign = {'timestamp': timestamp, 'folder': 'socmed_poster'}
-                    # For videos, add Instagram-compatible transformations
-                    if resource_type == 'video':
-                        params_to_sign.update({
-                            'video_codec': 'h264',
-                            'audio_codec': 'aac',
-                            'format': 'mp4',
-                            'fps': '30',
-                            'bit_rate': '1000k'
-                        })
-                    params_str = '&'.join([f"{k}={v}" for k, v in sorted(params_to_sign.items())])
-                    string_to_sign = params_str + api_secret
-                    import hashlib
-                    signature = hashlib.sha1(string_to_sign.encode('utf-8')).hexdigest()
-                    data = {'api_key': api_key, 'timestamp': timestamp, 'signature': signature, 'folder': 'socmed_poster'}
-                    # Add transformations to the data payload too
-                    if resource_type == 'video':
-                        data.update({
-                            'video_codec': 'h264',
-                            'audio_codec': 'aac',
-                            'format': 'mp4',
-                            'fps': '30',
-                            'bit_rate': '1000k'
-                        })
-                    self.logger.info("Using signed Cloudinary upload with Instagram video transformations")
-
-                resp = self.session.post(url, data=data, files=files, timeout=120)
-
-            # Check HTTP status
-            if resp.status_code != 200:
-                self.logger.error('Cloudinary upload failed with status %s', resp.status_code)
-                self.logger.debug('Cloudinary response body: %s', resp.text[:500])
-                return None
+            if use_unsigned:
+                data = {'upload_preset': upload_preset}
+                # For unsigned uploads, transformations must be handled by the upload preset
+                # The preset should be configured in Cloudinary dashboard with video settings
+                self.logger.info("Using unsigned Cloudinary upload with preset %s", self._mask_sensitive_data(upload_preset))
+                if resource_type == 'video':
+                    self.logger.info("Note: Video transformations (H.264, MP4) should be configured in your Cloudinary upload preset")
+            else:
+                timestamp = int(time.time())
+                # For videos, add Instagram-compatible transformations
+                params_to_sign = {'timestamp': timestamp, 'folder': self.CLOUDINARY_FOLDER, **transform}
+                params_str = '&'.join([f"{k}={v}" for k, v in sorted(params_to_sign.items())])
+                string_to_sign = params_str + api_secret
+                signature = hashlib.sha1(string_to_sign.encode('utf-8')).hexdigest()
+                # Add transformations to the data payload too
+                data = {'api_key': api_key, 'signature': signature, **params_to_sign}
+                self.logger.info("Using signed Cloudinary upload with Instagram video transformations")
+
+            file_size = os.path.getsize(file_path)
+            if file_size > self.CLOUDINARY_CHUNK_SIZE:
+                result = self._upload_to_cloudinary_chunked(url, data, file_path, progress)
+                if result is None:
+                    return None
+            else:
+                with open(file_path, 'rb') as f:
+                    resp = self.session.post(url, data=data, files={'file': f}, timeout=120)
 
-            # Parse JSON response
-            try:
-                result = resp.json()
-            except json.JSONDecodeError as json_err:
-                self.logger.error('Cloudinary returned invalid JSON: %s', json_err)
-                self.logger.debug('Cloudinary response body: %s', resp.text[:500])
-                return None
+                # Check HTTP status
+                if resp.status_code != 200:
+                    self.logger.error('Cloudinary upload failed with status %s', resp.status_code)
+                    self.logger.debug('Cloudinary response body: %s', resp.text[:500])
+                    return None
+
+                # Parse JSON response
+                try:
+                    result = resp.json()
+                except json.JSONDecodeError as json_err:
+                    self.logger.error('Cloudinary returned invalid JSON: %s', json_err)
+                    self.logger.debug('Cloudinary response body: %s', resp.text[:500])
+                    return None
+                if progress:
+                    progress(file_size, file_size)
 
         except Exception as e:
             self.logger.exception('Error uploading to Cloudinary: %s', e)
@@ -365,17 +524,126 @@ class InstagramPoster:
             self.logger.error('Cloudinary upload failed - no secure URL in response: %s', result)
             return None
         self.logger.info('Uploaded to Cloudinary: %s', secure)
+        self.upload_index.set(index_key, secure)
         return secure
 
+    def _upload_to_cloudinary_chunked(self, url: str, data: Dict[str, Any], file_path: str,
+                                      progress: Optional[Callable[[int, int], None]] = None) -> Optional[dict]:
+        """Send ``file_path`` as Content-Range chunks under one X-Unique-Upload-Id.
+
+        A failed chunk is retried on its own. If retries run out, the upload
+        resumes from the last chunk Cloudinary accepted, up to
+        ``CLOUDINARY_RESUME_ATTEMPTS`` times. Returns Cloudinary's final
+        response, or None.
+        """
+        upload = CloudinaryUpload(upload_id=uuid.uuid4().hex, file_size=os.path.getsize(file_path), data=data)
+        attempts = max(1, self.CLOUDINARY_RESUME_ATTEMPTS)
+
+        with open(file_path, 'rb') as f:
+            for attempt in range(1, attempts + 1):
+                if attempt > 1:
+                    self.logger.info("Resuming Cloudinary upload %s at byte %d/%d", upload.upload_id, upload.offset, upload.file_size)
+                while True:
+                    start = upload.offset
+                    end = min(start + self.CLOUDINARY_CHUNK_SIZE, upload.file_size)
+                    f.seek(start)
+                    result = self._send_cloudinary_chunk(url, upload, os.path.basename(file_path), f.read(end - start), start, end)
+                    if result is False:
+                        # Cloudinary rejected the upload itself; resuming it cannot succeed
+                        return None
+                    if result is None:
+                        break
+
+                    upload.offset = end
+                    if progress:
+                        progress(end, upload.file_size)
+                    if end >= upload.file_size:
+                        return result
+
+                self.logger.warning("Cloudinary upload interrupted at byte %d/%d (attempt %d/%d)",
+                                    upload.offset, upload.file_size, attempt, attempts)
+                if attempt < attempts:
+                    time.sleep(self.CLOUDINARY_RETRY_BACKOFF * attempt)
+
+        self.logger.error("Cloudinary upload failed at byte %d/%d", upload.offset, upload.file_size)
+        return None
+
+    def _send_cloudinary_chunk(self, url: str, upload: CloudinaryUpload, filename: str, chunk: bytes,
+                               start: int, end: int):
+        """POST one chunk, retrying only this chunk.
+
+        Returns the response JSON, None when retries ran out, or False when
+        Cloudinary rejected the request with a non-retryable client error.
+        """
+        headers = {
+            'X-Unique-Upload-Id': upload.upload_id,
+            'Content-Range': f'bytes {start}-{end - 1}/{upload.file_size}',
+        }
+        for attempt in range(1, self.CLOUDINARY_CHUNK_RETRIES + 1):
+            try:
+                resp = self.session.post(url, data=upload.data, files={'file': (filename, chunk)},
+                                         headers=headers, timeout=120)
+                if resp.status_code == 200:
+                    self.logger.debug("Cloudinary accepted bytes %d-%d/%d", start, end - 1, upload.file_size)
+                    try:
+                        return resp.json()
+                    except ValueError:
+                        return {}
+                if 400 <= resp.status_code < 500 and resp.status_code not in (408, 429):
+                    self.logger.error('Cloudinary rejected chunk with status %s: %s', resp.status_code, resp.text[:500])
+                    return False
+                reason = f"status {resp.status_code}"
+            except requests.exceptions.RequestException as e:
+                reason = str(e)
+
+            self.logger.warning("Cloudinary chunk at byte %d failed (attempt %d/%d): %s",
+                                start, attempt, self.CLOUDINARY_CHUNK_RETRIES, reason)
+            if attempt < self.CLOUDINARY_CHUNK_RETRIES:
+                time.sleep(self.CLOUDINARY_RETRY_BACKOFF * attempt)
+        return None
+
     def post_video(self, video_path: str, caption: str = "") -> Optional[str]:
         """Publish a video post to Instagram Business account.
 
         Local video files are uploaded to Cloudinary (or fallback to Imgur if configured),
         then a video media container is created and published.
+        Blocks until published; see :meth:`post_video_async`.
+        """
+        return self.post_video_async(video_path, caption).result()
+
+    def post_video_async(self, video_path: str, caption: str = "",
+                         progress: Optional[Callable[[int, int], None]] = None) -> Future:
+        """Upload ``video_path`` and create its container, then publish it in the background.
+
+        Returns a future resolving to the IG post id (None on failure). The
+        caller's thread is released once the container exists; processing is
+        tracked by the shared :attr:`poller`, so many pending videos cost one
+        polling loop rather than one sleeping thread each. ``progress`` is
+        passed to :meth:`_upload_to_cloudinary`.
         """
+        published: Future = Future()
+        # Size/duration/resolution of local files let the poller predict processing time
+        features = probe_video(video_path) if not video_path.startswith('http') and os.path.exists(video_path) else None
+        container_id = self._create_video_container(video_path, caption, progress)
+        if not container_id:
+            published.set_result(None)
+            return published
+
+        def _on_ready(ready: Future) -> None:
+            # Runs on the poller thread: hand the publish request off to keep the loop free
+            try:
+                self._publisher.submit(self._publish_ready_container, ready, container_id, published)
+            except RuntimeError as e:
+                published.set_exception(e)
+
+        self.poller.watch(container_id, features).add_done_callback(_on_ready)
+        return published
+
+    def _create_video_container(self, video_path: str, caption: str,
+                                progress: Optional[Callable[[int, int], None]] = None) -> Optional[str]:
         if not video_path.startswith('http'):
             # Upload as video resource
-            uploaded = self._upload_to_cloudinary(video_path, resource_type='video')
+            uploaded = self._public_url(video_path, resource_type='video', progress=progress)
             if not uploaded:
                 self.logger.warning("Could not upload local video to Cloudinary. Trying Imgur fallback...")
                 uploaded = self._upload_to_imgur(video_path)
@@ -400,93 +668,26 @@ class InstagramPoster:
             res = self.session.post(container_url, data=payload, timeout=120)
             data = res.json()
             if "id" not in data:
+                self._check_auth_error(data)
                 self.logger.error("Failed to create video media container: %s", data)
                 return None
-            container_id = data["id"]
-            self.logger.debug("Created video media container: %s", container_id)
+            self.logger.debug("Created video media container: %s", data["id"])
+            return data["id"]
         except Exception as e:
             self.logger.exception("Error creating video container: %s", e)
             return None
 
-        # Poll the media container status until it's ready for publishing.
-        # Instagram may take a short while to process uploaded videos. Use a
-        # small backoff loop and a sensible timeout to avoid immediate publish
-        # attempts which return 'media not ready' (error_subcode 2207027).
-        check_url = f"{self.base_url}/{container_id}"
-        wait_seconds = self.INITIAL_POLL_INTERVAL
-        total_wait = 0
-        max_wait = self.POLLING_TIMEOUT
-
-        # We'll try requesting an extended field set first and fallback to a minimal
-        # set if Graph complains about unsupported fields (some nodes don't expose processing_progress).
-        fields_to_try = ['status_code,status,processing_progress', 'status_code,status']
-
-        while total_wait < max_wait:
-            last_error = None
-            ready_for_publish = False
-            
-            for fields in fields_to_try:
-                try:
-                    status_resp = self.session.get(check_url, params={'fields': fields, 'access_token': self.access_token}, timeout=20)
-                    try:
-                        status_data = status_resp.json()
-                    except Exception:
-                        status_data = {'raw_text': status_resp.text}
-
-                    # Debug: log the raw status payload so operator can see what's returned
-                    self.logger.debug("Media status response for %s (fields=%s): %s", container_id, fields, status_data)
-
-                    # If Graph returned an error object, capture and potentially retry with smaller field set
-                    if isinstance(status_data, dict) and 'error' in status_data:
-                        last_error = status_data['error']
-                        # If it's an OAuthException complaining about a field, try the next (smaller) field set
-                        self.logger.warning("Graph API error for fields=%s: %s", fields, last_error)
-                        continue
-
-                    # Accept a few possible readiness indicators
-                    status_val = None
-                    if isinstance(status_data, dict):
-                        status_val = status_data.get('status_code') or status_data.get('status')
-
-                    if status_val and str(status_val).upper() in ('FINISHED', 'READY', 'SUCCEEDED'):
-                        self.logger.info("Media container %s ready for publish (status: %s)", container_id, status_val)
-                        ready_for_publish = True
-                        last_error = None
-                        break
-                    elif status_val and str(status_val).upper() == 'ERROR':
-                        # Media failed to process - stop polling and return the error
-                        error_msg = status_data.get('status', 'Unknown error')
-                        self.logger.error("Media container %s failed processing: %s", container_id, error_msg)
-                        self.logger.info("This often means the video format/codec doesn't meet Instagram requirements.")
-                        self.logger.info("Try uploading an MP4 video with H.264 codec, 30fps max, and under 100MB.")
-                        return None
-
-                    # Not ready yet - break out of the fields loop and wait before retrying
-                    self.logger.debug("Media %s not ready yet (fields=%s).", container_id, fields)
-                    last_error = None
-                    break
-
-                except Exception as e:
-                    last_error = {'message': str(e)}
-                    self.logger.warning("Error checking media status for %s with fields=%s: %s", container_id, fields, e)
-
-            # If ready for publish, break out of the main polling loop
-            if ready_for_publish:
-                break
-
-            # If we saw an error for all tried field sets, print it for debugging
-            if last_error:
-                self.logger.warning("All field attempts failed for %s: %s", container_id, last_error)
-
-            time.sleep(wait_seconds)
-            total_wait += wait_seconds
-            # small backoff
-            if wait_seconds < self.MAX_POLL_INTERVAL:
-                wait_seconds = min(wait_seconds + 5, self.MAX_POLL_INTERVAL)
-
-        if total_wait >= max_wait:
-            self.logger.error("Timed out waiting for media %s to be ready after %ss", container_id, max_wait)
-            return None
+    def _publish_ready_container(self, ready: Future, container_id: str, published: Future) -> None:
+        # Publishing before processing finishes returns 'media not ready' (error_subcode 2207027)
+        try:
+            ready.result()
+        except ContainerError as e:
+            self.logger.error("%s", e)
+            if e.status:
+                self.logger.info("This often means the video format/codec doesn't meet Instagram requirements.")
+                self.logger.info("Try uploading an MP4 video with H.264 codec, 30fps max, and under 100MB.")
+            published.set_result(None)
+            return
 
         # Publish the container
         publish_url = f"{self.base_url}/{self.ig_id}/media_publish"
@@ -496,13 +697,14 @@ class InstagramPoster:
             result = res.json()
             if "id" in result:
                 self.logger.info("Successfully posted video! IG Post ID: %s", result['id'])
-                return result["id"]
+                published.set_result(result["id"])
             else:
+                self._check_auth_error(result)
                 self.logger.error("Failed to publish video: %s", result)
-                return None
+                published.set_result(None)
         except Exception as e:
             self.logger.exception("Error publishing video: %s", e)
-            return None
+            published.set_result(None)
 
     def _build_session(self, timeout: int = 30) -> requests.Session:
         """Create a requests.Session with retries configured for the poster."""
@@ -1,17 +1,86 @@
 import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
 import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 load_dotenv()
 
+
+def _build_session(access_token, pool_size=10):
+    """Create a keep-alive requests.Session with retries and LinkedIn auth headers.
+
+    POST is not retried on error statuses: a share that LinkedIn created before
+    answering 5xx would otherwise be posted twice.
+    """
+    session = requests.Session()
+    retries = Retry(
+        total=3,
+        backoff_factor=1,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("HEAD", "GET", "OPTIONS", "PUT"),
+    )
+    adapter = HTTPAdapter(max_retries=retries, pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        'Authorization': f'Bearer {access_token}',
+        'X-Restli-Protocol-Version': '2.0.0',
+    })
+    return session
+
+
+class _AssetWatch:
+    def __init__(self, deadline, interval):
+        self.future = Future()
+        self.deadline = deadline
+        self.interval = interval
+        # The first check goes out right away
+        self.next_check = time.monotonic()
+
+
 class LinkedInPoster:
-    def __init__(self):
+    # Seconds to wait on any LinkedIn request, and how long the /me profile is reused
+    REQUEST_TIMEOUT = int(os.getenv('LINKEDIN_TIMEOUT', '30'))
+    PROFILE_TTL = float(os.getenv('LINKEDIN_PROFILE_TTL', '3600'))
+    # Parallel asset uploads per multi-image post, time allowed for one asset upload,
+    # how long to wait for an uploaded video to finish processing, and the first
+    # pause between processing checks (doubled per check, up to 10s)
+    UPLOAD_CONCURRENCY = int(os.getenv('LINKEDIN_UPLOAD_CONCURRENCY', '4'))
+    UPLOAD_TIMEOUT = int(os.getenv('LINKEDIN_UPLOAD_TIMEOUT', '300'))
+    VIDEO_PROCESSING_TIMEOUT = 120
+    ASSET_POLL_INTERVAL = 2
+    RECIPES = {
+        'IMAGE': 'urn:li:digitalmediaRecipe:feedshare-image',
+        'VIDEO': 'urn:li:digitalmediaRecipe:feedshare-video',
+    }
+
+    def __init__(self, session=None):
         self.access_token = os.getenv('LINKEDIN_ACCESS_TOKEN')
         self.person_id = os.getenv('LINKEDIN_PERSON_ID')
         self.api_url = "https://api.linkedin.com/v2"
+
+        # Called when LinkedIn rejects our token, e.g. to drop cached verification results
+        self.on_auth_error = None
         
         if not self.access_token:
             raise ValueError("LINKEDIN_ACCESS_TOKEN not found in environment variables")
+
+        self.session = session or _build_session(self.access_token)
+        # Last /me response and when it was fetched; shared by person id lookup and verification
+        self._profile = None
+        self._profile_fetched_at = 0.0
+        self._profile_lock = threading.Lock()
+        # Assets waiting for LinkedIn to finish processing, polled from one thread,
+        # and the pool that posts the shares once they are available
+        self._asset_watches = {}
+        self._asset_wakeup = threading.Condition()
+        self._asset_thread = None
+        self._publisher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="li-publish")
         
         # If person_id is not provided, try to get it automatically
         if not self.person_id:
@@ -20,22 +89,42 @@ class LinkedInPoster:
             if not self.person_id:
                 raise ValueError("Could not retrieve LinkedIn Person ID. Please set LINKEDIN_PERSON_ID in environment variables")
     
+    def _check_auth_error(self, response):
+        """Notify on_auth_error when LinkedIn answered 401 Unauthorized"""
+        if response.status_code == 401:
+            with self._profile_lock:
+                self._profile = None
+            if self.on_auth_error:
+                self.on_auth_error()
+
+    def _get_profile(self):
+        """Return the /me profile, fetched at most once per PROFILE_TTL.
+
+        Returns ``(profile, error_response)``; ``profile`` is None when the
+        request failed, with the failing response if there was one.
+        """
+        with self._profile_lock:
+            if self._profile is not None and time.monotonic() - self._profile_fetched_at < self.PROFILE_TTL:
+                return self._profile, None
+
+            response = self.session.get(f"{self.api_url}/me", timeout=self.REQUEST_TIMEOUT)
+            if response.status_code != 200:
+                self._profile = None
+                return None, response
+            self._profile = response.json()
+            self._profile_fetched_at = time.monotonic()
+            return self._profile, None
+
     def _fetch_person_id(self):
         """Internal method to fetch person ID"""
-        headers = {
-            'Authorization': f'Bearer {self.access_token}',
-            'Content-Type': 'application/json'
-        }
-        
         try:
-            response = requests.get(f"{self.api_url}/me", headers=headers)
-            if response.status_code == 200:
-                user_data = response.json()
-                person_id = user_data.get('id')
+            profile, error = self._get_profile()
+            if profile is not None:
+                person_id = profile.get('id')
                 print(f"✅ Auto-retrieved Person ID: {person_id}")
                 return person_id
             else:
-                print(f"❌ Failed to auto-retrieve person ID: {response.status_code}")
+                print(f"❌ Failed to auto-retrieve person ID: {error.status_code}")
                 return None
         except Exception as e:
             print(f"Error auto-retrieving person ID: {e}")
@@ -43,19 +132,14 @@ class LinkedInPoster:
     
     def verify_credentials(self):
         """Verify LinkedIn API credentials"""
-        headers = {
-            'Authorization': f'Bearer {self.access_token}',
-            'Content-Type': 'application/json'
-        }
-        
         try:
-            # Use the correct endpoint to get current user info
-            response = requests.get(f"{self.api_url}/me", headers=headers)
-            if response.status_code == 200:
-                print(f"✅ LinkedIn credentials verified for user: {response.json().get('localizedFirstName', 'Unknown')}")
+            profile, error = self._get_profile()
+            if profile is not None:
+                print(f"✅ LinkedIn credentials verified for user: {profile.get('localizedFirstName', 'Unknown')}")
                 return True
             else:
-                print(f"❌ LinkedIn credential verification failed: {response.status_code} - {response.text}")
+                self._check_auth_error(error)
+                print(f"❌ LinkedIn credential verification failed: {error.status_code} - {error.text}")
                 return False
         except Exception as e:
             print(f"LinkedIn verification error: {e}")
@@ -63,44 +147,198 @@ class LinkedInPoster:
     
     def get_person_id(self):
         """Get the current user's person ID"""
-        headers = {
-            'Authorization': f'Bearer {self.access_token}',
-            'Content-Type': 'application/json'
-        }
-        
         try:
-            response = requests.get(f"{self.api_url}/me", headers=headers)
-            if response.status_code == 200:
-                user_data = response.json()
-                person_id = user_data.get('id')
+            profile, error = self._get_profile()
+            if profile is not None:
+                person_id = profile.get('id')
                 print(f"✅ Person ID: {person_id}")
                 return person_id
             else:
-                print(f"❌ Failed to get person ID: {response.status_code} - {response.text}")
+                print(f"❌ Failed to get person ID: {error.status_code} - {error.text}")
                 return None
         except Exception as e:
             print(f"Error getting person ID: {e}")
             return None
     
-    def post(self, message):
-        """Post text content to LinkedIn"""
-        headers = {
-            'Authorization': f'Bearer {self.access_token}',
-            'Content-Type': 'application/json',
-            'X-Restli-Protocol-Version': '2.0.0'
+    def _register_upload(self, category):
+        """Register an asset upload; returns ``(asset_urn, upload_url)`` or None"""
+        body = {
+            "registerUploadRequest": {
+                "recipes": [self.RECIPES[category]],
+                "owner": f"urn:li:person:{self.person_id}",
+                "serviceRelationships": [{
+                    "relationshipType": "OWNER",
+                    "identifier": "urn:li:userGeneratedContent"
+                }]
+            }
         }
-        
+        response = self.session.post(f"{self.api_url}/assets?action=registerUpload", json=body,
+                                     timeout=self.REQUEST_TIMEOUT)
+        if response.status_code not in (200, 201):
+            self._check_auth_error(response)
+            print(f"❌ LinkedIn registerUpload failed: {response.status_code} - {response.text}")
+            return None
+        value = response.json().get('value', {})
+        mechanism = value.get('uploadMechanism', {}).get(
+            'com.linkedin.digitalmedia.uploading.MediaUploadHttpRequest', {})
+        return value.get('asset'), mechanism.get('uploadUrl')
+
+    def upload_asset(self, file_path, category='IMAGE'):
+        """Register and upload one image or video, returning its asset URN or None.
+
+        The file is streamed from disk in the PUT body, so memory use does not
+        grow with the file size.
+        """
+        try:
+            registered = self._register_upload(category)
+            if not registered or not all(registered):
+                return None
+            asset, upload_url = registered
+
+            with open(file_path, 'rb') as f:
+                response = self.session.put(upload_url, data=f, timeout=self.UPLOAD_TIMEOUT,
+                                            headers={'Content-Type': 'application/octet-stream'})
+            if response.status_code not in (200, 201):
+                self._check_auth_error(response)
+                print(f"❌ LinkedIn upload of {os.path.basename(file_path)} failed: {response.status_code}")
+                return None
+            print(f"✅ Uploaded {os.path.basename(file_path)} to LinkedIn as {asset}")
+            return asset
+        except Exception as e:
+            print(f"LinkedIn upload error for {os.path.basename(file_path)}: {e}")
+            return None
+
+    def upload_assets(self, file_paths, category='IMAGE'):
+        """Upload several files in parallel; returns their asset URNs in input order, or None"""
+        workers = max(1, min(self.UPLOAD_CONCURRENCY, len(file_paths)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="li-upload") as pool:
+            assets = list(pool.map(lambda path: self.upload_asset(path, category), file_paths))
+        if not all(assets):
+            print(f"❌ {assets.count(None)} of {len(file_paths)} LinkedIn uploads failed")
+            return None
+        return assets
+
+    def watch_asset(self, asset):
+        """Return a future that resolves True once LinkedIn has processed ``asset``.
+
+        It resolves False when processing fails or takes longer than
+        ``VIDEO_PROCESSING_TIMEOUT``. Every pending asset is polled from one
+        thread, so no caller sleeps; watching the same asset twice shares one
+        future.
+        """
+        with self._asset_wakeup:
+            watch = self._asset_watches.get(asset)
+            if watch is None:
+                watch = _AssetWatch(time.monotonic() + self.VIDEO_PROCESSING_TIMEOUT, self.ASSET_POLL_INTERVAL)
+                self._asset_watches[asset] = watch
+                if self._asset_thread is None:
+                    self._asset_thread = threading.Thread(target=self._asset_loop, name="li-assets", daemon=True)
+                    self._asset_thread.start()
+                self._asset_wakeup.notify()
+            return watch.future
+
+    def wait_for_asset(self, asset):
+        """Block until :meth:`watch_asset` resolves; for callers that may sleep (the CLI)"""
+        return self.watch_asset(asset).result()
+
+    def _asset_loop(self):
+        while True:
+            with self._asset_wakeup:
+                while not self._asset_watches:
+                    self._asset_wakeup.wait()
+                asset, watch = min(self._asset_watches.items(), key=lambda item: item[1].next_check)
+                now = time.monotonic()
+                if watch.next_check > now:
+                    self._asset_wakeup.wait(watch.next_check - now)
+                    continue
+
+            available = self._asset_status(asset)
+            if available is None:
+                now = time.monotonic()
+                if now + watch.interval <= watch.deadline:
+                    watch.next_check = now + watch.interval
+                    watch.interval = min(watch.interval * 2, 10)
+                    continue
+                print(f"❌ Timed out waiting for LinkedIn to process {asset}")
+                available = False
+
+            with self._asset_wakeup:
+                self._asset_watches.pop(asset, None)
+            watch.future.set_result(available)
+
+    def _asset_status(self, asset):
+        """True once ``asset`` is available, False if processing failed, None while pending"""
+        asset_id = asset.rsplit(':', 1)[-1]
+        try:
+            response = self.session.get(f"{self.api_url}/assets/{asset_id}", timeout=self.REQUEST_TIMEOUT)
+        except Exception as e:
+            # Keep polling; the deadline still bounds the wait
+            print(f"⚠️ LinkedIn status check for {asset} failed: {e}")
+            return None
+        if response.status_code != 200:
+            self._check_auth_error(response)
+            return None
+        states = {recipe.get('status') for recipe in response.json().get('recipes', [])}
+        if states and states <= {'AVAILABLE'}:
+            return True
+        if states & {'CLIENT_ERROR', 'SERVER_ERROR'}:
+            print(f"❌ LinkedIn could not process {asset}: {states}")
+            return False
+        return None
+
+    def post_video_async(self, message, video_path):
+        """Upload a video and return a future of the post's success.
+
+        The upload happens here; the share is posted from a background pool
+        once LinkedIn has processed the video, so the caller is not held up
+        while it waits.
+        """
+        published = Future()
+        asset = self.upload_asset(video_path, "VIDEO")
+        if asset is None:
+            published.set_result(False)
+            return published
+        processed = self.watch_asset(asset)
+
+        def _publish():
+            try:
+                published.set_result(processed.result() and self._share(message, "VIDEO", [asset]))
+            except BaseException as e:
+                published.set_exception(e)
+
+        # The callback runs on the polling thread, so hand the share off instead of posting there
+        processed.add_done_callback(lambda _: self._publisher.submit(_publish))
+        return published
+
+    def post(self, message, image_paths=None, video_path=None):
+        """Post text, images or one video to LinkedIn, waiting for video processing"""
+        if image_paths:
+            assets = self.upload_assets(image_paths, "IMAGE")
+            if assets is None:
+                return False
+            return self._share(message, "IMAGE", assets)
+        if video_path:
+            return self.post_video_async(message, video_path).result()
+        return self._share(message, "NONE", [])
+
+    def _share(self, message, category, assets):
+        """Create the ugcPosts share, attaching ``assets``"""
+        media = [{"status": "READY", "media": asset} for asset in assets]
+        share_content = {
+            "shareCommentary": {
+                "text": message
+            },
+            "shareMediaCategory": category
+        }
+        if media:
+            share_content["media"] = media
+
         # Updated API structure for LinkedIn API v2
         post_data = {
             "author": f"urn:li:person:{self.person_id}",
             "lifecycleState": "PUBLISHED",
             "specificContent": {
-                "com.linkedin.ugc.ShareContent": {
-                    "shareCommentary": {
-                        "text": message
-                    },
-                    "shareMediaCategory": "NONE"
-                }
+                "com.linkedin.ugc.ShareContent": share_content
             },
             "visibility": {
                 "com.linkedin.ugc.MemberNetworkVisibility": "PUBLIC"
@@ -108,11 +346,12 @@ class LinkedInPoster:
         }
         
         try:
-            response = requests.post(f"{self.api_url}/ugcPosts", json=post_data, headers=headers)
+            response = self.session.post(f"{self.api_url}/ugcPosts", json=post_data, timeout=self.REQUEST_TIMEOUT)
             if response.status_code == 201:
                 print("✅ Posted to LinkedIn successfully")
                 return True
             else:
+                self._check_auth_error(response)
                 print(f"❌ LinkedIn post failed: {response.status_code}")
                 print(f"Response: {response.text}")
                 return False
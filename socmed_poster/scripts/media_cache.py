@@ -0,0 +1,220 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.getenv("SOCMED_MEDIA_CACHE_DIR", os.path.join(tempfile.gettempdir(), "socmed_poster_media"))
+DEFAULT_MAX_BYTES = int(os.getenv("SOCMED_MEDIA_CACHE_BYTES", str(512 * 1024 * 1024)))
+DEFAULT_INDEX_PATH = os.getenv("SOCMED_UPLOAD_INDEX_PATH", os.path.join(tempfile.gettempdir(), "socmed_poster_uploads.json"))
+DEFAULT_INDEX_TTL = float(os.getenv("SOCMED_UPLOAD_INDEX_TTL", str(7 * 24 * 3600)))
+
+
+def file_digest(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file's content, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def content_key(source_path: str, params: Dict[str, Any]) -> str:
+    """Key for ``source_path``'s content combined with the parameters applied to it."""
+    material = file_digest(source_path) + json.dumps(params, sort_keys=True)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class DerivativeCache:
+    """On-disk cache of files derived from a source file (e.g. IG-ready images).
+
+    Entries are keyed by the SHA-256 of the source content plus the transform
+    parameters, so the same creative posted again, under any file name, reuses
+    the derivative made the first time. The least recently used entries are
+    removed once the cache holds more than ``max_bytes``, except entries
+    handed out with ``pin=True`` and not yet given back with :meth:`release`,
+    so a file is never removed while it is being uploaded or published.
+    Existing files in ``directory`` are adopted on startup, oldest first.
+    """
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total = 0
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        # Number of holders of each pinned entry
+        self._pins: Dict[str, int] = {}
+        self._loaded = False
+
+    def get_or_create(self, source_path: str, params: Dict[str, Any], create: Callable[[str], None],
+                      suffix: str = "", pin: bool = False) -> str:
+        """Return the cached derivative of ``source_path`` for ``params``, creating it on a miss.
+
+        ``create(output_path)`` must write the derivative to ``output_path``.
+        Concurrent misses for the same key create it once. With ``pin`` the
+        entry is kept from eviction until :meth:`release` is called with the
+        returned path.
+        """
+        key = content_key(source_path, params) + suffix
+        path = os.path.join(self.directory, key)
+
+        with self._lock:
+            self._load()
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                if key in self._entries and os.path.exists(path):
+                    self._entries.move_to_end(key)
+                    if pin:
+                        self._pin(key)
+                    self.hits += 1
+                    logger.debug("Derivative cache hit: %s", key)
+                    return path
+                self.misses += 1
+
+            # Write under a temporary name so a crash never leaves a half-written entry
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            try:
+                create(tmp_path)
+                os.replace(tmp_path, path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+            with self._lock:
+                self._add(key, os.path.getsize(path))
+                if pin:
+                    self._pin(key)
+                self._evict(keep=key)
+            return path
+
+    def release(self, path: str) -> None:
+        """Give back a pinned entry; paths outside the cache are ignored."""
+        if os.path.dirname(os.path.abspath(path)) != os.path.abspath(self.directory):
+            return
+        key = os.path.basename(path)
+        with self._lock:
+            holders = self._pins.get(key, 0) - 1
+            if holders > 0:
+                self._pins[key] = holders
+            else:
+                self._pins.pop(key, None)
+                # Catch up on evictions skipped while the entry was in use
+                self._evict()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._total, "max_bytes": self.max_bytes,
+                    "hits": self.hits, "misses": self.misses}
+
+    def _load(self) -> None:
+        """Adopt files left by earlier runs (lock held)."""
+        if self._loaded:
+            return
+        self._loaded = True
+        os.makedirs(self.directory, exist_ok=True)
+        existing = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".tmp"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            existing.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(existing):
+            self._add(name, size)
+        self._evict()
+
+    def _pin(self, key: str) -> None:
+        self._pins[key] = self._pins.get(key, 0) + 1
+
+    def _add(self, key: str, size: int) -> None:
+        self._total -= self._entries.pop(key, 0)
+        self._entries[key] = size
+        self._total += size
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        """Drop least recently used entries that are not in use until within budget (lock held)."""
+        for key in list(self._entries):
+            if self._total <= self.max_bytes:
+                break
+            if key == keep or key in self._pins:
+                continue
+            self._total -= self._entries.pop(key)
+            self._key_locks.pop(key, None)
+            try:
+                os.remove(os.path.join(self.directory, key))
+            except OSError:
+                pass
+            logger.debug("Evicted derivative %s", key)
+
+
+class UploadIndex:
+    """Persistent map from uploaded content to the URL it was uploaded to.
+
+    Keys come from :func:`content_key`, so identical bytes uploaded with the
+    same parameters resolve to the earlier URL even across restarts. Entries
+    expire after ``ttl`` seconds. The index is a small JSON file, rewritten
+    atomically on every change.
+    """
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH, ttl: float = DEFAULT_INDEX_TTL) -> None:
+        self.path = path
+        self.ttl = ttl
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._load().get(key)
+            if entry is None or entry["expires_at"] <= time.time():
+                return None
+            return entry["url"]
+
+    def set(self, key: str, url: str) -> None:
+        with self._lock:
+            entries = self._load()
+            entries[key] = {"url": url, "expires_at": time.time() + self.ttl}
+            self._save(entries)
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if self._entries is None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except FileNotFoundError:
+                self._entries = {}
+            except (OSError, ValueError) as exc:
+                logger.warning("Ignoring unreadable upload index %s: %s", self.path, exc)
+                self._entries = {}
+        return self._entries
+
+    def _save(self, entries: Dict[str, Dict[str, Any]]) -> None:
+        now = time.time()
+        for key in [k for k, entry in entries.items() if entry["expires_at"] <= now]:
+            del entries[key]
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, self.path)
+        except OSError as exc:
+            logger.warning("Could not save upload index %s: %s", self.path, exc)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+derivative_cache = DerivativeCache()
+upload_index = UploadIndex()
@@ -0,0 +1,117 @@
+import hashlib
+import hmac
+import logging
+import os
+import shutil
+import threading
+import time
+from typing import Optional
+from urllib.parse import urlencode
+
+from .media_cache import file_digest
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PUBLIC_FOLDER = os.getenv(
+    "SOCMED_PUBLIC_FOLDER",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "uploads", "public")))
+DEFAULT_URL_TTL = float(os.getenv("SOCMED_MEDIA_URL_TTL", str(6 * 3600)))
+
+# Subfolder of the public folder holding signed media; only these files need a signature
+MEDIA_PREFIX = "media"
+
+
+class MediaOrigin:
+    """Serve prepared media from our own public folder under signed, expiring URLs.
+
+    :meth:`publish` places a file in ``<directory>/media`` under the SHA-256 of
+    its content (hard-linked when possible, so a cached derivative is not
+    copied) and returns ``<base_url>/public_uploads/media/<name>?expires=&sig=``.
+    The signature is an HMAC of the name and expiry with ``secret``, checked by
+    :meth:`verify` when the file is requested. Files untouched for longer than
+    ``ttl`` are removed. The origin is only :attr:`enabled` when both a public
+    base URL and a secret are configured.
+    """
+
+    def __init__(self, base_url: Optional[str] = None, secret: Optional[str] = None,
+                 directory: str = DEFAULT_PUBLIC_FOLDER, ttl: float = DEFAULT_URL_TTL) -> None:
+        self.base_url = (base_url or "").rstrip("/")
+        self.secret = secret or ""
+        self.directory = directory
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._last_prune = 0.0
+
+    @classmethod
+    def from_env(cls) -> "MediaOrigin":
+        return cls(os.getenv("SOCMED_PUBLIC_BASE_URL"), os.getenv("SOCMED_MEDIA_URL_SECRET"))
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.base_url and self.secret)
+
+    def publish(self, source_path: str) -> str:
+        """Make ``source_path`` publicly fetchable and return its signed URL."""
+        extension = os.path.splitext(source_path)[1].lower()
+        name = f"{MEDIA_PREFIX}/{file_digest(source_path)}{extension}"
+        path = os.path.join(self.directory, *name.split("/"))
+
+        with self._lock:
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                try:
+                    try:
+                        os.link(source_path, tmp_path)
+                    except OSError:
+                        shutil.copyfile(source_path, tmp_path)
+                    os.replace(tmp_path, path)
+                finally:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                logger.debug("Published %s as %s", source_path, name)
+            # Expiry is tracked by mtime, and a hard link starts with the source's mtime
+            # (touching the source too), so refresh it before pruning; the new URL is valid for ttl
+            os.utime(path)
+            self._prune()
+
+        return self.url_for(name)
+
+    def url_for(self, name: str, expires: Optional[int] = None) -> str:
+        expires = expires or int(time.time() + self.ttl)
+        query = urlencode({"expires": expires, "sig": self._sign(name, expires)})
+        return f"{self.base_url}/public_uploads/{name}?{query}"
+
+    def verify(self, name: str, expires: Optional[str], signature: Optional[str]) -> bool:
+        """Check a request for ``name`` carries an unexpired signature."""
+        if not self.secret or not expires or not signature:
+            return False
+        try:
+            expires_at = int(expires)
+        except ValueError:
+            return False
+        if expires_at < time.time():
+            return False
+        return hmac.compare_digest(self._sign(name, expires_at), signature)
+
+    def _sign(self, name: str, expires: int) -> str:
+        message = f"{name}:{expires}".encode("utf-8")
+        return hmac.new(self.secret.encode("utf-8"), message, hashlib.sha256).hexdigest()
+
+    def _prune(self) -> None:
+        """Remove expired media, at most once per tenth of ``ttl`` (lock held)."""
+        now = time.time()
+        if now - self._last_prune < self.ttl / 10:
+            return
+        self._last_prune = now
+        folder = os.path.join(self.directory, MEDIA_PREFIX)
+        for entry in os.scandir(folder):
+            try:
+                if entry.is_file() and entry.stat().st_mtime < now - self.ttl:
+                    os.remove(entry.path)
+                    logger.debug("Removed expired media %s", entry.name)
+            except OSError:
+                continue
+
+
+media_origin = MediaOrigin.from_env()
@@ -0,0 +1,220 @@
+import dataclasses
+import json
+import logging
+import math
+import os
+import struct
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from .media_cache import DEFAULT_INDEX_PATH
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+# Learned processing times are kept next to the Cloudinary upload index
+DEFAULT_STATS_PATH = os.getenv(
+    "SOCMED_PROCESSING_STATS_PATH",
+    os.path.join(os.path.dirname(DEFAULT_INDEX_PATH), "socmed_poster_processing.json"))
+
+# Container boxes we descend into while looking for mvhd/tkhd
+_CONTAINER_BOXES = {b'moov', b'trak'}
+
+
+@dataclasses.dataclass(frozen=True)
+class VideoFeatures:
+    """What we know about a video before Instagram processes it."""
+
+    size: int
+    duration: Optional[float] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+
+    @property
+    def bucket(self) -> Tuple[int, Optional[int], Optional[str]]:
+        """Coarse (size, duration, resolution) class; videos in one class process alike."""
+        size_class = max(0, int(math.log2(max(self.size, 1) / MB)) + 1) if self.size >= MB else 0
+        duration_class = None
+        if self.duration is not None:
+            duration_class = max(0, int(math.log2(max(self.duration, 1) / 10)) + 1) if self.duration >= 10 else 0
+        resolution = None
+        if self.width and self.height:
+            pixels = self.width * self.height
+            resolution = 'sd' if pixels <= 640 * 480 else 'hd' if pixels <= 1280 * 720 else 'fhd' if pixels <= 1920 * 1080 else 'uhd'
+        return size_class, duration_class, resolution
+
+
+def _read_boxes(f, end: int):
+    """Yield (type, payload_start, box_end) for the ISO-BMFF boxes between f.tell() and ``end``."""
+    while f.tell() + 8 <= end:
+        start = f.tell()
+        header = f.read(8)
+        if len(header) < 8:
+            return
+        size, box_type = struct.unpack('>I4s', header)
+        payload = start + 8
+        if size == 1:
+            size = struct.unpack('>Q', f.read(8))[0]
+            payload += 8
+        elif size == 0:
+            size = end - start
+        if size < payload - start:
+            return
+        yield box_type, payload, start + size
+        f.seek(start + size)
+
+
+def probe_video(path: str) -> VideoFeatures:
+    """Read size, duration and resolution from an MP4/MOV header without decoding.
+
+    Only box headers, ``mvhd`` and ``tkhd`` are read, so this is cheap even for
+    large files. Fields that cannot be found are left as None.
+    """
+    size = os.path.getsize(path)
+    duration = None
+    width = height = 0
+    try:
+        with open(path, 'rb') as f:
+            stack = [(0, size)]
+            while stack:
+                start, end = stack.pop()
+                f.seek(start)
+                for box_type, payload, box_end in list(_read_boxes(f, end)):
+                    if box_type in _CONTAINER_BOXES:
+                        stack.append((payload, box_end))
+                    elif box_type == b'mvhd':
+                        f.seek(payload)
+                        version = f.read(1)[0]
+                        f.seek(payload + (20 if version == 1 else 12))
+                        if version == 1:
+                            timescale, raw = struct.unpack('>IQ', f.read(12))
+                        else:
+                            timescale, raw = struct.unpack('>II', f.read(8))
+                        if timescale:
+                            duration = raw / timescale
+                    elif box_type == b'tkhd':
+                        # Width and height are the last two 16.16 fixed-point fields
+                        f.seek(box_end - 8)
+                        w, h = struct.unpack('>II', f.read(8))
+                        if (w >> 16) * (h >> 16) > width * height:
+                            width, height = w >> 16, h >> 16
+    except (OSError, struct.error, IndexError) as exc:
+        logger.debug("Could not probe %s: %s", path, exc)
+    return VideoFeatures(size=size, duration=duration, width=width or None, height=height or None)
+
+
+def _quantile(ordered: List[float], q: float) -> float:
+    index = min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))
+    return ordered[index]
+
+
+class ProcessingTimeModel:
+    """Learn how long Instagram takes to process videos and plan status polls from it.
+
+    Observed processing times are kept per :attr:`VideoFeatures.bucket` (the
+    most recent ``window`` of them) and across all videos. Polls are scheduled
+    at the 25th, 50th, 75th and 90th percentile of the matching bucket, then
+    every quarter of the 90th percentile (within ``min_interval`` and
+    ``max_interval``). Without ``min_samples`` observations :meth:`next_poll`
+    returns None and the caller keeps its default backoff.
+
+    With a ``path``, the samples are loaded from that JSON file on creation
+    and rewritten atomically after every new observation, so what was learned
+    survives a restart.
+    """
+
+    QUANTILES = (0.25, 0.5, 0.75, 0.9)
+
+    def __init__(self, min_samples: int = 3, window: int = 50,
+                 min_interval: float = 1.0, max_interval: float = 30.0, path: Optional[str] = None) -> None:
+        self.min_samples = min_samples
+        self.window = window
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.path = path
+        self._buckets: Dict[tuple, Deque[float]] = {}
+        self._all: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        if path:
+            self._load()
+
+    def record(self, features: VideoFeatures, seconds: float) -> None:
+        with self._lock:
+            self._buckets.setdefault(features.bucket, deque(maxlen=self.window)).append(seconds)
+            self._all.append(seconds)
+            if self.path:
+                self._save()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            buckets = {tuple(bucket): deque(samples, maxlen=self.window) for bucket, samples in data["buckets"]}
+            overall = deque(data["all"], maxlen=self.window)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            logger.warning("Ignoring unreadable processing stats %s: %s", self.path, exc)
+            return
+        self._buckets, self._all = buckets, overall
+
+    def _save(self) -> None:
+        """Write the samples to ``path`` (lock held)."""
+        data = {"buckets": [[list(bucket), list(samples)] for bucket, samples in self._buckets.items()],
+                "all": list(self._all)}
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except OSError as exc:
+            logger.warning("Could not save processing stats %s: %s", self.path, exc)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _samples(self, features: Optional[VideoFeatures]) -> Optional[List[float]]:
+        with self._lock:
+            bucket = self._buckets.get(features.bucket) if features else None
+            for samples in (bucket, self._all):
+                if samples is not None and len(samples) >= self.min_samples:
+                    return sorted(samples)
+        return None
+
+    def next_poll(self, features: Optional[VideoFeatures], elapsed: float) -> Optional[float]:
+        """Seconds from now until the next status poll, ``elapsed`` seconds after creation."""
+        samples = self._samples(features)
+        if samples is None:
+            return None
+        for q in self.QUANTILES:
+            target = _quantile(samples, q)
+            if target >= elapsed + self.min_interval:
+                return target - elapsed
+        # Slower than most past videos: keep checking at a pace proportional to the typical time
+        return min(self.max_interval, max(self.min_interval, _quantile(samples, 0.9) / 4))
+
+    def stats(self) -> Dict[str, Any]:
+        """Summary of the learned processing times, for inspection."""
+        def _summary(samples) -> Dict[str, Any]:
+            ordered = sorted(samples)
+            return {
+                'count': len(ordered),
+                'mean': round(sum(ordered) / len(ordered), 2),
+                **{f'p{int(q * 100)}': round(_quantile(ordered, q), 2) for q in self.QUANTILES},
+            }
+
+        with self._lock:
+            buckets = {key: list(samples) for key, samples in self._buckets.items() if samples}
+            overall = list(self._all)
+        return {
+            'overall': _summary(overall) if overall else {'count': 0},
+            'buckets': [
+                {'size_class': size, 'duration_class': duration, 'resolution': resolution, **_summary(samples)}
+                for (size, duration, resolution), samples in sorted(buckets.items(), key=lambda item: str(item[0]))
+            ],
+        }
+
+
+processing_model = ProcessingTimeModel(path=DEFAULT_STATS_PATH)
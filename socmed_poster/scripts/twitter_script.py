@@ -3,7 +3,12 @@ import os
 import time
 import requests
 import datetime
-from typing import Optional, List
+import dataclasses
+import mimetypes
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Dict, Optional, List, Callable, Set, Tuple, Union
+from urllib.parse import urlsplit
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -14,12 +19,108 @@ API_SECRET = os.getenv("TWITTER_API_SECRET_KEY")
 ACCESS_TOKEN = os.getenv("TWITTER_ACCESS_TOKEN")
 ACCESS_SECRET = os.getenv("TWITTER_ACCESS_SECRET_TOKEN")
 
+# Media files uploaded at the same time for one tweet (Twitter allows 4 per tweet)
+UPLOAD_CONCURRENCY = int(os.getenv("TWITTER_UPLOAD_CONCURRENCY", "4"))
+
+# Chunked video upload: bytes per APPEND segment (Twitter allows up to 5 MB), attempts per segment,
+# backoff base (s) and how long to wait for Twitter to finish processing before giving up (s)
+VIDEO_SEGMENT_SIZE = int(os.getenv("TWITTER_VIDEO_SEGMENT_SIZE", str(4 * 1024 * 1024)))
+VIDEO_SEGMENT_RETRIES = int(os.getenv("TWITTER_VIDEO_SEGMENT_RETRIES", "3"))
+VIDEO_RETRY_BACKOFF = float(os.getenv("TWITTER_VIDEO_RETRY_BACKOFF", "2"))
+VIDEO_PROCESSING_TIMEOUT = float(os.getenv("TWITTER_VIDEO_PROCESSING_TIMEOUT", "300"))
+
+VIDEO_EXTENSIONS = {'.mp4', '.mov', '.avi', '.mkv', '.webm'}
+
+# Endpoint whose quota decides whether another tweet can go out now
+TWEET_ENDPOINT = "/2/tweets"
+
+
+class RateLimited(Exception):
+    """Raised instead of sleeping when a Twitter rate limit is exhausted."""
+
+    def __init__(self, reset_at: float, endpoint: Optional[str] = None):
+        self.reset_at = reset_at
+        self.endpoint = endpoint
+        # Media already uploaded for the tweet, so a retry can send it without uploading again
+        self.media_ids: Optional[List[str]] = None
+        wait = max(0, int(reset_at - time.time()))
+        super().__init__(f"Twitter rate limit reached{f' for {endpoint}' if endpoint else ''}; resets in {wait}s")
+
+
+class RateLimitTracker:
+    """Remember the last ``x-rate-limit-*`` headers seen for each endpoint.
+
+    Installed as a ``requests`` response hook on both tweepy sessions, so the
+    remaining quota is known before the next call is made.
+    """
+
+    def __init__(self):
+        self._limits: Dict[str, Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, response, *args, **kwargs):
+        remaining = response.headers.get("x-rate-limit-remaining")
+        reset = response.headers.get("x-rate-limit-reset")
+        if remaining is None or reset is None:
+            return response
+        with self._lock:
+            self._limits[urlsplit(response.url).path] = (int(remaining), float(reset))
+        return response
+
+    def reset_at(self, endpoint: str) -> Optional[float]:
+        """Return when ``endpoint``'s quota resets if it is known to be used up, else None"""
+        with self._lock:
+            remaining, reset = self._limits.get(endpoint, (1, 0.0))
+        if remaining > 0 or reset <= time.time():
+            return None
+        return reset
+
+
+@dataclasses.dataclass
+class ChunkedUpload:
+    """Checkpoint of an INIT/APPEND/FINALIZE upload, so a retried upload can resume."""
+
+    media_id: str
+    total_bytes: int
+    segment_size: int
+    # Twitter drops media that isn't finalized in time (``expires_after_secs`` from INIT)
+    expires_at: float
+    next_segment: int = 0
+
+    @property
+    def segments(self) -> int:
+        return -(-self.total_bytes // self.segment_size)
+
+    @property
+    def complete(self) -> bool:
+        return self.next_segment >= self.segments
+
+
+@dataclasses.dataclass
+class ProcessingWait:
+    """Media a caller of :meth:`TwitterPoster.watch_processing` is still waiting on."""
+
+    future: Future
+    pending: Set[str]
+    deadline: float
+
+
 class TwitterPoster:
-    """Twitter posting client with media upload support"""
+    """Twitter posting client with media upload support
+
+    With ``wait_on_rate_limit=False`` nothing ever sleeps for a rate limit:
+    calls raise :class:`RateLimited` with the reset time instead, and
+    :meth:`post` refuses up front when the tweet quota is known to be spent,
+    so the caller can park the work until then. Such a poster also never
+    sleeps for video processing: :meth:`post` returns a future instead.
+    """
     
-    def __init__(self):
+    def __init__(self, wait_on_rate_limit: bool = True):
         if not all([API_KEY, API_SECRET, ACCESS_TOKEN, ACCESS_SECRET]):
             raise ValueError("Missing Twitter API credentials in .env file")
+
+        self.wait_on_rate_limit = wait_on_rate_limit
+        self.rate_limits = RateLimitTracker()
         
         # API v2 client (tweets)
         self.client = tweepy.Client(
@@ -27,30 +128,61 @@ class TwitterPoster:
             consumer_secret=API_SECRET,
             access_token=ACCESS_TOKEN,
             access_token_secret=ACCESS_SECRET,
-            wait_on_rate_limit=True  # ✅ auto-wait for v2 rate limits
+            wait_on_rate_limit=wait_on_rate_limit  # ✅ auto-wait for v2 rate limits unless disabled
         )
         
         # API v1.1 client (media upload)
         auth = tweepy.OAuth1UserHandler(API_KEY, API_SECRET, ACCESS_TOKEN, ACCESS_SECRET)
-        self.api = tweepy.API(auth, wait_on_rate_limit=True)  # ✅ auto-wait for v1.1
-    
-    def verify_credentials(self) -> bool:
-        """Check if credentials work (only call when needed)"""
+        self.api = tweepy.API(auth, wait_on_rate_limit=wait_on_rate_limit)
+
+        for session in (self.client.session, self.api.session):
+            session.hooks["response"].append(self.rate_limits.record)
+
+        # Finalized media still being processed (next check time) and who waits on each; one
+        # thread polls them all, and a small pool posts tweets whose media became ready
+        self._processing: Dict[str, float] = {}
+        self._processing_waits: Dict[str, List[ProcessingWait]] = {}
+        self._processing_wakeup = threading.Condition()
+        self._processing_thread: Optional[threading.Thread] = None
+        self._publisher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="twitter-publish")
+
+        # Called when Twitter rejects our credentials, e.g. to drop cached verification results
+        self.on_auth_error: Optional[Callable[[], None]] = None
+
+    def _check_auth_error(self, error: Exception) -> None:
+        """Notify ``on_auth_error`` when ``error`` means the credentials are invalid."""
+        if isinstance(error, tweepy.Unauthorized) and self.on_auth_error:
+            self.on_auth_error()
+
+    def get_username(self) -> Optional[str]:
+        """Return the authenticated account's username, or None if credentials fail"""
         print("🔍 Verifying Twitter credentials...")
         try:
             me = self.client.get_me()
             if me and getattr(me, "data", None):
-                print(f"✅ Verified: @{me.data.username}")
-                return True
+                username = getattr(me.data, 'username', None)
+                if username is None and isinstance(me.data, dict):
+                    username = me.data.get('username')
+                print(f"✅ Verified: @{username}")
+                return username
         except Exception as e:
+            self._check_auth_error(e)
             print(f"❌ Verification failed: {e}")
-        return False
+        return None
 
-    def _retry_operation(self, operation, *args, max_retries=3, operation_name="operation"):
-        """Retry wrapper with rate-limit handling"""
+    def verify_credentials(self) -> bool:
+        """Check if credentials work (only call when needed)"""
+        return self.get_username() is not None
+
+    def _retry_operation(self, operation, *args, max_retries=3, operation_name="operation",
+                         cancelled: Optional[threading.Event] = None):
+        """Retry wrapper with rate-limit handling; stops retrying once ``cancelled`` is set"""
         last_error = None
         
         for attempt in range(max_retries):
+            if cancelled is not None and cancelled.is_set():
+                print(f"🛑 {operation_name} cancelled")
+                return None
             try:
                 if attempt > 0:
                     print(f"🔄 {operation_name} (retry {attempt + 1}/{max_retries})")
@@ -58,6 +190,9 @@ class TwitterPoster:
 
             except tweepy.TooManyRequests as e:
                 reset_time = int(e.response.headers.get("x-rate-limit-reset", time.time() + 900))
+                if not self.wait_on_rate_limit:
+                    print(f"⚠️ Rate limit hit during {operation_name}, not waiting")
+                    raise RateLimited(reset_time, urlsplit(e.response.url or "").path or None) from e
                 wait_for = max(0, reset_time - int(time.time()))
                 print(f"⚠️ Rate limit hit. Waiting {wait_for} seconds...")
                 time.sleep(wait_for)
@@ -71,6 +206,12 @@ class TwitterPoster:
                 print(f"🌐 Connection error: {e}, retrying in {wait_time}s...")
                 time.sleep(wait_time)
 
+            except tweepy.Unauthorized as e:
+                # Retrying with the same credentials cannot succeed
+                self._check_auth_error(e)
+                last_error = e
+                break
+
             except Exception as e:
                 last_error = e
                 wait_time = (attempt + 1) * 2
@@ -82,26 +223,31 @@ class TwitterPoster:
             print(f"💥 Final error: {last_error}")
         return None
     
-    def upload_media(self, file_path: str) -> Optional[str]:
+    def upload_media(self, file_path: str, cancelled: Optional[threading.Event] = None) -> Optional[str]:
         """Upload image/video to Twitter"""
         if not os.path.exists(file_path):
             print(f"❌ File not found: {file_path}")
             return None
 
+        # Chunked upload in progress, shared by the retries below and dropped when this call returns
+        checkpoint: List[ChunkedUpload] = []
+
         # Determine media type and use chunked upload for large files/videos
         def _upload():
             try:
                 ext = os.path.splitext(file_path)[1].lower()
-                is_video = ext in {'.mp4', '.mov', '.avi', '.mkv', '.webm'}
+                is_video = ext in VIDEO_EXTENSIONS
 
                 if is_video:
-                    # Use chunked upload for videos with media_category set to 'tweet_video'
-                    media = self.api.media_upload(filename=file_path, chunked=True, media_category='tweet_video')
+                    # Resumable chunked upload; a retry continues from the last acknowledged segment
+                    media_id = self._upload_video(file_path, cancelled, checkpoint)
+                    if media_id is None:
+                        raise RuntimeError(f"chunked upload of {os.path.basename(file_path)} did not complete")
                 else:
                     # images and small media can use the simple upload
                     media = self.api.media_upload(filename=file_path)
+                    media_id = getattr(media, 'media_id', None) or getattr(media, 'media_id_string', None)
 
-                media_id = getattr(media, 'media_id', None) or getattr(media, 'media_id_string', None)
                 if media_id:
                     print(f"✅ Uploaded media: {media_id} ({'video' if is_video else 'image'})")
                     return str(media_id)
@@ -112,10 +258,209 @@ class TwitterPoster:
                 print(f"❌ Media upload failed for {file_path}: {e}")
                 raise
 
-        return self._retry_operation(_upload, operation_name="Media upload")
+        return self._retry_operation(_upload, operation_name="Media upload", cancelled=cancelled)
+
+    def _upload_video(self, file_path: str, cancelled: Optional[threading.Event] = None,
+                      checkpoint: Optional[List[ChunkedUpload]] = None) -> Optional[str]:
+        """Upload a video with INIT/APPEND/FINALIZE and return its media id.
+
+        Each APPEND segment is retried on its own. If a segment keeps failing
+        the upload stays in ``checkpoint``, so calling again with the same list
+        (as :meth:`upload_media`'s retries do) continues from that segment
+        instead of re-sending the whole file. Processing is not waited for
+        here; :meth:`watch_processing` polls it later.
+        """
+        stat = os.stat(file_path)
+        if checkpoint is None:
+            checkpoint = []
+
+        upload = checkpoint[0] if checkpoint else None
+        if upload and upload.expires_at <= time.time():
+            upload = None
+        if upload:
+            print(f"🔁 Resuming upload {upload.media_id} at segment {upload.next_segment + 1}/{upload.segments}")
+        else:
+            # Twitter accepts at most 1000 segments per upload
+            segment_size = max(VIDEO_SEGMENT_SIZE, -(-stat.st_size // 1000))
+            media_type = mimetypes.guess_type(file_path)[0] or 'video/mp4'
+            init = self.api.chunked_upload_init(stat.st_size, media_type, media_category='tweet_video')
+            upload = ChunkedUpload(
+                media_id=str(init.media_id),
+                total_bytes=stat.st_size,
+                segment_size=segment_size,
+                expires_at=time.time() + getattr(init, 'expires_after_secs', 86400),
+            )
+            checkpoint[:] = [upload]
+
+        with open(file_path, 'rb') as video_file:
+            while not upload.complete:
+                if cancelled is not None and cancelled.is_set():
+                    return None
+                video_file.seek(upload.next_segment * upload.segment_size)
+                if not self._append_segment(upload, video_file.read(upload.segment_size)):
+                    print(f"❌ Upload paused at segment {upload.next_segment + 1}/{upload.segments}")
+                    return None
+
+        try:
+            media = self.api.chunked_upload_finalize(upload.media_id)
+        except tweepy.BadRequest:
+            # Twitter rejected the media itself; resuming would only fail again
+            checkpoint.clear()
+            raise
+        checkpoint.clear()
+        processing = getattr(media, 'processing_info', None)
+        if processing:
+            if processing.get('state') == 'failed':
+                print(f"❌ Twitter could not process {os.path.basename(file_path)}: {processing.get('error')}")
+                return None
+            if processing.get('state') in ('pending', 'in_progress'):
+                with self._processing_wakeup:
+                    self._processing[upload.media_id] = time.time() + processing.get('check_after_secs', 1)
+        return upload.media_id
+
+    def _append_segment(self, upload: ChunkedUpload, chunk: bytes) -> bool:
+        """APPEND one segment, retrying only this segment; advances the checkpoint on success."""
+        for attempt in range(1, VIDEO_SEGMENT_RETRIES + 1):
+            try:
+                self.api.chunked_upload_append(upload.media_id, ('segment', chunk), upload.next_segment)
+                upload.next_segment += 1
+                return True
+            except (tweepy.TooManyRequests, tweepy.Unauthorized):
+                # Handled (and not retried blindly) by _retry_operation
+                raise
+            except Exception as e:
+                print(f"⚠️ Segment {upload.next_segment + 1}/{upload.segments} failed "
+                      f"(attempt {attempt}/{VIDEO_SEGMENT_RETRIES}): {e}")
+                if attempt < VIDEO_SEGMENT_RETRIES:
+                    time.sleep(VIDEO_RETRY_BACKOFF * attempt)
+        return False
+
+    def watch_processing(self, media_ids: List[str]) -> Future:
+        """Return a future that resolves True once every media id has been processed.
+
+        It resolves False when Twitter fails to process one of them or
+        processing takes longer than ``VIDEO_PROCESSING_TIMEOUT``. All pending
+        media are polled from one thread at their ``check_after_secs``, so no
+        caller sleeps and videos processed in parallel are not waited for one
+        after another.
+        """
+        future: Future = Future()
+        with self._processing_wakeup:
+            pending = {m for m in media_ids if m in self._processing}
+            if pending:
+                wait = ProcessingWait(future, pending, time.time() + VIDEO_PROCESSING_TIMEOUT)
+                for media_id in pending:
+                    self._processing_waits.setdefault(media_id, []).append(wait)
+                if self._processing_thread is None:
+                    self._processing_thread = threading.Thread(target=self._processing_loop,
+                                                               name="twitter-processing", daemon=True)
+                    self._processing_thread.start()
+                self._processing_wakeup.notify()
+        if not pending:
+            future.set_result(True)
+        return future
+
+    def wait_for_processing(self, media_ids: List[str]) -> bool:
+        """Block until :meth:`watch_processing` resolves; for callers that may sleep (the CLI)."""
+        return self.watch_processing(media_ids).result()
+
+    def _processing_loop(self) -> None:
+        while True:
+            with self._processing_wakeup:
+                while not self._processing:
+                    self._processing_wakeup.wait()
+                media_id, check_at = min(self._processing.items(), key=lambda item: item[1])
+                if check_at > time.time():
+                    self._processing_wakeup.wait(check_at - time.time())
+                    continue
+
+            try:
+                info = getattr(self.api.get_media_upload_status(media_id), 'processing_info', None) or {}
+            except Exception as e:
+                # Keep the loop alive; ask again shortly, within the waiters' deadlines
+                print(f"⚠️ Processing status check for {media_id} failed: {e}")
+                info = {'state': 'in_progress', 'check_after_secs': 5}
+            self._record_processing(media_id, info)
+
+    def _record_processing(self, media_id: str, info: Dict) -> None:
+        """Apply one status answer and resolve the waits it decides."""
+        state = info.get('state', 'succeeded')
+        resolved: List[Tuple[Future, bool]] = []
+        with self._processing_wakeup:
+            waits = self._processing_waits.get(media_id, [])
+            if state in ('pending', 'in_progress'):
+                check_at = time.time() + info.get('check_after_secs', 1)
+                for wait in [w for w in waits if check_at > w.deadline]:
+                    print(f"❌ Media {media_id} still processing after {VIDEO_PROCESSING_TIMEOUT:g}s")
+                    resolved.append((wait.future, False))
+                self._processing[media_id] = check_at
+            else:
+                if state != 'succeeded':
+                    print(f"❌ Twitter could not process media {media_id}: {info.get('error')}")
+                else:
+                    print(f"✅ Media {media_id} processed")
+                for wait in waits:
+                    wait.pending.discard(media_id)
+                    if state != 'succeeded' or not wait.pending:
+                        resolved.append((wait.future, state == 'succeeded'))
+                self._processing.pop(media_id, None)
+
+            # Forget finished waits, and stop polling media nobody waits on any more
+            done = {id(future) for future, _ in resolved}
+            for waiting_id in list(self._processing_waits):
+                remaining = [w for w in self._processing_waits[waiting_id] if id(w.future) not in done]
+                if remaining:
+                    self._processing_waits[waiting_id] = remaining
+                else:
+                    del self._processing_waits[waiting_id]
+                    self._processing.pop(waiting_id, None)
+
+        for future, ok in resolved:
+            if not future.done():
+                future.set_result(ok)
+
+    def upload_media_files(self, media_files: List[str]) -> Optional[List[str]]:
+        """Upload ``media_files`` concurrently and return their media ids in the same order.
+
+        Returns None as soon as one upload fails; uploads that have not started
+        are cancelled and running ones stop before their next retry.
+        """
+        media_ids: List[Optional[str]] = [None] * len(media_files)
+        cancelled = threading.Event()
+        workers = max(1, min(UPLOAD_CONCURRENCY, len(media_files)))
+
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="twitter-upload")
+        try:
+            futures = {pool.submit(self.upload_media, f, cancelled): i for i, f in enumerate(media_files)}
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    media_ids[index] = future.result()
+                except RateLimited:
+                    cancelled.set()
+                    raise
+                except Exception as e:
+                    print(f"❌ Media upload crashed for {media_files[index]}: {e}")
+                if not media_ids[index]:
+                    print(f"❌ Aborting tweet: failed to upload media {media_files[index]}")
+                    cancelled.set()
+                    return None
+        finally:
+            # Don't wait for uploads still in flight after a failure; they stop at their next retry
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        return media_ids
+
+    def post(self, message: str, media_files: Optional[List[str]] = None,
+             media_ids: Optional[List[str]] = None) -> Union[bool, Future]:
+        """Post a tweet
 
-    def post(self, message: str, media_files: Optional[List[str]] = None) -> bool:
-        """Post a tweet"""
+        When uploaded video is still being processed and this poster does not
+        wait (``wait_on_rate_limit=False``), returns a future of the result;
+        the tweet is posted once processing finishes. ``media_ids`` taken from
+        an earlier :class:`RateLimited` are used instead of uploading
+        ``media_files`` again.
+        """
         if not message.strip() and not media_files:
             print("❌ Empty tweet not allowed")
             return False
@@ -123,20 +468,50 @@ class TwitterPoster:
             print(f"❌ Too long: {len(message)} chars (max 280)")
             return False
 
-        media_ids = []
-        if media_files:
+        if not self.wait_on_rate_limit:
+            # Don't spend uploads on a tweet the known quota would reject
+            reset_at = self.rate_limits.reset_at(TWEET_ENDPOINT)
+            if reset_at is not None:
+                raise RateLimited(reset_at, TWEET_ENDPOINT)
+
+        media_ids = list(media_ids or [])
+        if media_files and not media_ids:
             if len(media_files) > 4:
                 print("⚠️ Max 4 media per tweet, truncating list")
                 media_files = media_files[:4]
 
-            # Upload each media file; abort if any upload fails
-            for f in media_files:
-                media_id = self.upload_media(f)
-                if not media_id:
-                    print(f"❌ Aborting tweet: failed to upload media {f}")
-                    return False
-                media_ids.append(media_id)
+            # Upload all media concurrently; abort if any upload fails
+            media_ids = self.upload_media_files(media_files)
+            if not media_ids:
+                return False
+        if media_ids:
+            processed = self.watch_processing(media_ids)
+            if not processed.done() and not self.wait_on_rate_limit:
+                return self._tweet_when_processed(processed, message, media_ids)
+            if not processed.result():
+                return False
+
+        try:
+            return self._create_tweet(message, media_ids)
+        except RateLimited as e:
+            e.media_ids = media_ids
+            raise
+
+    def _tweet_when_processed(self, processed: Future, message: str, media_ids: List[str]) -> Future:
+        """Post the tweet on the publisher pool once ``processed`` resolves; returns its future"""
+        published: Future = Future()
+
+        def _publish() -> None:
+            try:
+                published.set_result(processed.result() and self._create_tweet(message, media_ids))
+            except BaseException as e:
+                published.set_exception(e)
+
+        # The callback runs on the processing thread, so hand the tweet off instead of posting there
+        processed.add_done_callback(lambda _: self._publisher.submit(_publish))
+        return published
 
+    def _create_tweet(self, message: str, media_ids: List[str]) -> bool:
         def _post():
             if media_ids:
                 # Try v2 client first: many tweepy versions accept media_ids kwarg
@@ -5,6 +5,9 @@ document.addEventListener("DOMContentLoaded", () => {
   const statusEl = document.getElementById("status");
 
   const STATUS_URL = window.SOCMED_CONFIG?.STATUS_URL || "/api/status";
+  const STATUS_STREAM_URL =
+    window.SOCMED_CONFIG?.STATUS_STREAM_URL || "/api/status/stream";
+  const JOB_POLL_INTERVAL = 2000;
 
   function switchPlatform(platform) {
     selectedPlatformEl.value = platform;
@@ -54,9 +57,9 @@ document.addEventListener("DOMContentLoaded", () => {
       text.textContent = "Post to LinkedIn";
       limit.textContent = "3,000";
       textarea.maxLength = 3000;
-      fileInput.multiple = false;
-      fileInput.accept = "";
-      mediaLimits.textContent = "Text posts only";
+      fileInput.multiple = true;
+      fileInput.accept = "image/*,video/*";
+      mediaLimits.textContent = "Up to 9 images or 1 video per post";
     }
     updateCharCount();
     checkStatus();
@@ -152,34 +155,140 @@ document.addEventListener("DOMContentLoaded", () => {
 
   // previewFromUrl removed - image URL preview feature disabled
 
-  async function checkStatus() {
+  function renderStatus(platform, data) {
+    const ok =
+      (platform === "facebook" && data?.token_valid && data?.page_access) ||
+      (platform === "twitter" && data?.credentials_valid) ||
+      (platform === "instagram" && data?.token_valid && data?.account_access) ||
+      (platform === "linkedin" && data?.credentials_valid);
+    const timedOut = data?.status === "timeout";
+
+    statusEl.textContent = ok
+      ? `✓ Connected to ${platform}`
+      : timedOut
+      ? `✗ Status check timed out`
+      : `✗ Connection failed`;
+    statusEl.className = ok
+      ? "p-3 rounded-md text-sm mt-5 bg-green-100 text-green-800 border border-green-200"
+      : "p-3 rounded-md text-sm mt-5 bg-red-100 text-red-800 border border-red-200";
+  }
+
+  function renderStatusError() {
+    statusEl.textContent = "✗ Unable to check status";
+    statusEl.className =
+      "p-3 rounded-md text-sm mt-5 bg-red-100 text-red-800 border border-red-200";
+  }
+
+  async function fetchStatus(platform) {
+    try {
+      const res = await fetch(`${STATUS_URL}?platform=${platform}`);
+      const data = await res.json();
+      renderStatus(platform, data[platform]);
+    } catch (e) {
+      renderStatusError();
+    }
+  }
+
+  let statusStream = null;
+
+  function checkStatus() {
     statusEl.textContent = "Checking connection...";
     statusEl.className =
       "p-3 rounded-md text-sm mt-5 bg-yellow-100 text-yellow-800 border border-yellow-200";
+    const platform = selectedPlatformEl.value;
+
+    if (statusStream) {
+      statusStream.close();
+      statusStream = null;
+    }
+    if (!window.EventSource) {
+      fetchStatus(platform);
+      return;
+    }
+
+    // Each platform's result arrives as its own event as soon as it is ready
+    const stream = new EventSource(`${STATUS_STREAM_URL}?platform=${platform}`);
+    let received = false;
+    stream.addEventListener("status", (e) => {
+      const data = JSON.parse(e.data);
+      if (data.platform === selectedPlatformEl.value) {
+        received = true;
+        renderStatus(data.platform, data);
+      }
+    });
+    stream.addEventListener("done", () => stream.close());
+    stream.onerror = () => {
+      stream.close();
+      if (!received) fetchStatus(platform);
+    };
+    statusStream = stream;
+  }
+
+  function showFlash(message, category) {
+    let flashEl = document.getElementById("flash-message");
+    if (!flashEl) {
+      flashEl = document.createElement("div");
+      flashEl.id = "flash-message";
+      postForm.parentNode.insertBefore(flashEl, postForm);
+    }
+    flashEl.textContent = message;
+    flashEl.style.display = "";
+    flashEl.style.opacity = "1";
+    flashEl.className =
+      category === "success"
+        ? "p-3 mb-4 rounded-md transition-opacity duration-500 bg-green-100 text-green-800 border border-green-200"
+        : category === "info"
+        ? "p-3 mb-4 rounded-md transition-opacity duration-500 bg-yellow-100 text-yellow-800 border border-yellow-200"
+        : "p-3 mb-4 rounded-md transition-opacity duration-500 bg-red-100 text-red-800 border border-red-200";
+  }
+
+  async function followJob(statusUrl) {
     try {
-      const platform = selectedPlatformEl.value;
-      const url = `${STATUS_URL}?platform=${platform}`;
-      const res = await fetch(url);
+      const res = await fetch(statusUrl);
+      if (res.status === 404) {
+        // Jobs are kept in the memory of one server process, so this is not a failure
+        showFlash("This job is unknown to this server; it may still be running in another process.", "info");
+        return;
+      }
+      const job = await res.json();
+      if (job.status === "succeeded") {
+        showFlash(job.result?.message || "Content posted successfully!", "success");
+        return;
+      }
+      if (job.status === "failed") {
+        showFlash(job.error || "Failed to post content. Check console for details.", "error");
+        return;
+      }
+      const last = job.progress?.[job.progress.length - 1];
+      showFlash(last ? `⏳ ${last}` : "⏳ Post queued...", "info");
+    } catch (e) {
+      // Transient network error - keep polling
+    }
+    setTimeout(() => followJob(statusUrl), JOB_POLL_INTERVAL);
+  }
+
+  async function submitPost(event) {
+    event.preventDefault();
+    const submitBtn = document.getElementById("submit-btn");
+    submitBtn.disabled = true;
+    try {
+      const res = await fetch(postForm.action, {
+        method: "POST",
+        body: new FormData(postForm),
+        headers: { Accept: "application/json" },
+      });
       const data = await res.json();
-      const ok =
-        (platform === "facebook" &&
-          data.facebook?.token_valid &&
-          data.facebook?.page_access) ||
-        (platform === "twitter" && data.twitter?.credentials_valid) ||
-        (platform === "instagram" &&
-          data.instagram?.token_valid &&
-          data.instagram?.account_access);
-
-      statusEl.textContent = ok
-        ? `✓ Connected to ${platform}`
-        : `✗ Connection failed`;
-      statusEl.className = ok
-        ? "p-3 rounded-md text-sm mt-5 bg-green-100 text-green-800 border border-green-200"
-        : "p-3 rounded-md text-sm mt-5 bg-red-100 text-red-800 border border-red-200";
+      if (res.status === 202) {
+        showFlash("⏳ Post queued...", "info");
+        followJob(data.status_url);
+        resetForm();
+      } else {
+        showFlash(data.error || "Failed to queue post.", "error");
+      }
     } catch (e) {
-      statusEl.textContent = "✗ Unable to check status";
-      statusEl.className =
-        "p-3 rounded-md text-sm mt-5 bg-red-100 text-red-800 border border-red-200";
+      showFlash("✗ Unable to submit post", "error");
+    } finally {
+      submitBtn.disabled = false;
     }
   }
 
@@ -196,6 +305,8 @@ document.addEventListener("DOMContentLoaded", () => {
   window.resetForm = resetForm;
   window.checkStatus = checkStatus;
 
+  postForm.addEventListener("submit", submitPost);
+
   // Initialize from inline config
   const initialPlatform = window.SOCMED_CONFIG?.INITIAL_PLATFORM || "facebook";
   switchPlatform(initialPlatform);
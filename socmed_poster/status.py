@@ -0,0 +1,260 @@
+"""Connection status checks for every platform.
+
+Each check returns the JSON-ready dict served by `/api/status`. The checks run
+concurrently on a shared pool and each platform has its own deadline, so one
+slow or hanging provider is reported as ``timeout`` instead of holding up the
+whole response.
+
+:class:`StatusMonitor` keeps the latest results in memory and refreshes them
+in the background (stale-while-revalidate), so serving `/api/status` does not
+cause upstream API traffic.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, TimeoutError, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from .cache import verification_cache
+from .clients import get_poster
+
+# Seconds each platform's check may take before it is reported as timed out
+DEFAULT_DEADLINE = float(os.getenv('SOCMED_STATUS_DEADLINE', '8'))
+DEADLINES: Dict[str, float] = {
+    'facebook': DEFAULT_DEADLINE,
+    'twitter': DEFAULT_DEADLINE,
+    'instagram': DEFAULT_DEADLINE,
+    'linkedin': DEFAULT_DEADLINE,
+}
+
+# Snapshot entries older than this are served but trigger a background refresh
+STATUS_MAX_AGE = float(os.getenv('SOCMED_STATUS_MAX_AGE', '60'))
+STATUS_REFRESH_INTERVAL = float(os.getenv('SOCMED_STATUS_REFRESH_INTERVAL', str(STATUS_MAX_AGE)))
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='socmed-status')
+
+
+def check_facebook() -> Dict[str, Any]:
+    try:
+        fb_poster = get_poster('facebook')
+        preflight = verification_cache.get_or_compute(('facebook', 'preflight'), fb_poster.preflight)
+        return {
+            'token_valid': bool(preflight and preflight.token_valid),
+            'page_access': bool(preflight and preflight.page_access),
+            'page_id': fb_poster.page_id,
+            'page_name': preflight.page_name if preflight else None
+        }
+    except Exception as e:
+        return {'token_valid': False, 'page_access': False, 'error': str(e)}
+
+
+def check_twitter() -> Dict[str, Any]:
+    try:
+        tw_poster = get_poster('twitter')
+        tw_username = verification_cache.get_or_compute(('twitter', 'username'), tw_poster.get_username)
+        return {'credentials_valid': tw_username is not None, 'username': tw_username}
+    except Exception as e:
+        return {'credentials_valid': False, 'error': str(e)}
+
+
+def check_instagram() -> Dict[str, Any]:
+    try:
+        ig_poster = get_poster('instagram')
+        ig_token_ok = ig_poster and ig_poster.access_token is not None
+        ig_account_ok = False
+        ig_username = None
+        ig_account_name = None
+
+        if ig_token_ok:
+            account_info = verification_cache.get_or_compute(('instagram', 'account'), ig_poster.get_account_info)
+            if account_info:
+                ig_account_ok = True
+                ig_username = account_info.get('username')
+                ig_account_name = account_info.get('name')
+
+        return {
+            'token_valid': ig_token_ok,
+            'account_id': getattr(ig_poster, 'ig_id', None),
+            'account_access': ig_account_ok,
+            'username': ig_username,
+            'account_name': ig_account_name
+        }
+    except Exception as e:
+        return {'token_valid': False, 'account_access': False, 'error': str(e)}
+
+
+def check_linkedin() -> Dict[str, Any]:
+    try:
+        li_poster = get_poster('linkedin')
+        li_token_valid = verification_cache.get_or_compute(('linkedin', 'credentials'), li_poster.verify_credentials)
+        return {
+            'credentials_valid': li_token_valid,
+            'person_id': getattr(li_poster, 'person_id', None)
+        }
+    except Exception as e:
+        return {'credentials_valid': False, 'error': str(e)}
+
+
+CHECKS: Dict[str, Callable[[], Dict[str, Any]]] = {
+    'facebook': check_facebook,
+    'twitter': check_twitter,
+    'instagram': check_instagram,
+    'linkedin': check_linkedin,
+}
+
+
+def timeout_result(platform: str, deadline: float) -> Dict[str, Any]:
+    return {'status': 'timeout', 'error': f'{platform} status check did not finish within {deadline:g}s'}
+
+
+class StatusMonitor:
+    """In-memory status snapshot kept fresh by a background refresher.
+
+    :meth:`get` answers from memory and reports each entry's ``age``; entries
+    older than ``max_age`` are still served (flagged ``stale``) while a refresh
+    runs in the background. Only platforms that were never checked are checked
+    synchronously, within their deadlines. A daemon thread started on first
+    use refreshes every platform each ``refresh_interval`` seconds; pass
+    ``refresh_interval=0`` to disable it.
+
+    Refreshes read through ``verification_cache``, so they only reach the
+    provider once a cached verification expires (or a poster drops it on an
+    auth error). Only a forced check (``fresh``) invalidates the cache first.
+    """
+
+    def __init__(self, max_age: float = STATUS_MAX_AGE, refresh_interval: float = STATUS_REFRESH_INTERVAL) -> None:
+        self.max_age = max_age
+        self.refresh_interval = refresh_interval
+        self._snapshot: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._refresher: Optional[threading.Thread] = None
+
+    def get(self, platforms: Iterable[str], deadlines: Optional[Dict[str, float]] = None,
+            fresh: bool = False) -> Dict[str, Dict[str, Any]]:
+        """Return the snapshot for ``platforms``; ``fresh`` waits for new checks first."""
+        platforms = list(platforms)
+        self._ensure_refresher()
+
+        missing = platforms if fresh else [p for p in platforms if p not in self._snapshot]
+        if missing:
+            self._wait(self.refresh(missing, force=fresh), deadlines)
+
+        now = time.time()
+        stale = [p for p in platforms if p in self._snapshot and now - self._snapshot[p][0] > self.max_age]
+        if stale:
+            self.refresh(stale)
+
+        return {p: self._entry(p, now) for p in platforms}
+
+    def iter_results(self, platforms: Iterable[str], deadlines: Optional[Dict[str, float]] = None,
+                     fresh: bool = False) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Yield ``(platform, entry)`` pairs as soon as each one is available.
+
+        Snapshot entries are yielded immediately. Platforms that are missing,
+        stale or forced with ``fresh`` are checked and yielded again in the
+        order the checks finish; checks that miss their deadline yield a
+        ``timeout`` entry.
+        """
+        platforms = list(platforms)
+        deadlines = {**DEADLINES, **(deadlines or {})}
+        self._ensure_refresher()
+
+        now = time.time()
+        pending = []
+        for platform in platforms:
+            if platform in self._snapshot:
+                entry = self._entry(platform, now)
+                yield platform, entry
+                if fresh or entry['stale']:
+                    pending.append(platform)
+            else:
+                pending.append(platform)
+        if not pending:
+            return
+
+        futures = self.refresh(pending, force=fresh)
+        started = time.monotonic()
+        remaining = {future: platform for platform, future in futures.items()}
+        expires = {future: started + deadlines.get(platform, DEFAULT_DEADLINE) for future, platform in remaining.items()}
+        while remaining:
+            done, _ = wait(list(remaining), timeout=max(0, min(expires.values()) - time.monotonic()),
+                           return_when=FIRST_COMPLETED)
+            for future in done:
+                platform = remaining.pop(future)
+                del expires[future]
+                if future.exception() is None:
+                    yield platform, self._entry(platform, time.time())
+            # Each platform times out against its own deadline, not the slowest one
+            now = time.monotonic()
+            for future in [f for f, expires_at in expires.items() if expires_at <= now]:
+                platform = remaining.pop(future)
+                del expires[future]
+                yield platform, timeout_result(platform, deadlines.get(platform, DEFAULT_DEADLINE))
+
+    def refresh(self, platforms: Iterable[str], force: bool = False) -> Dict[str, Future]:
+        """Start a check for each platform unless one is already running.
+
+        ``force`` drops the platforms' cached verification first, so the check
+        asks the provider instead of answering from ``verification_cache``.
+        """
+        futures: Dict[str, Future] = {}
+        with self._lock:
+            for platform in platforms:
+                if force:
+                    verification_cache.invalidate(platform)
+                future = self._in_flight.get(platform)
+                if future is None:
+                    future = _executor.submit(self._check, platform)
+                    self._in_flight[platform] = future
+                futures[platform] = future
+        return futures
+
+    def _check(self, platform: str) -> Dict[str, Any]:
+        try:
+            result = CHECKS[platform]()
+            with self._lock:
+                self._snapshot[platform] = (time.time(), result)
+            return result
+        finally:
+            with self._lock:
+                self._in_flight.pop(platform, None)
+
+    def _wait(self, futures: Dict[str, Future], deadlines: Optional[Dict[str, float]]) -> None:
+        deadlines = {**DEADLINES, **(deadlines or {})}
+        started = time.monotonic()
+        for platform, future in futures.items():
+            deadline = deadlines.get(platform, DEFAULT_DEADLINE)
+            try:
+                future.result(timeout=max(0, started + deadline - time.monotonic()))
+            except TimeoutError:
+                with self._lock:
+                    # Keep any result that landed meanwhile; the check keeps running
+                    self._snapshot.setdefault(platform, (time.time(), timeout_result(platform, deadline)))
+
+    def _entry(self, platform: str, now: float) -> Dict[str, Any]:
+        checked_at, result = self._snapshot[platform]
+        age = now - checked_at
+        return {**result, 'age': round(age, 3), 'stale': age > self.max_age}
+
+    def _ensure_refresher(self) -> None:
+        if self.refresh_interval <= 0 or self._refresher is not None:
+            return
+        with self._lock:
+            if self._refresher is None:
+                self._refresher = threading.Thread(target=self._refresh_loop, name='socmed-status-refresher', daemon=True)
+                self._refresher.start()
+
+    def _refresh_loop(self) -> None:
+        while True:
+            time.sleep(self.refresh_interval)
+            try:
+                self.refresh(CHECKS)
+            except Exception as exc:
+                logger.warning("Background status refresh failed: %s", exc)
+
+
+monitor = StatusMonitor()
@@ -0,0 +1,61 @@
+"""
+Tests for the credential verification cache.
+"""
+import threading
+import time
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from socmed_poster.cache import TTLCache
+
+
+class TestTTLCache(unittest.TestCase):
+    """Test positive/negative lifetimes and invalidation."""
+
+    def test_hits_skip_compute(self):
+        cache = TTLCache(ttl=60, negative_ttl=60)
+        calls = []
+        for _ in range(3):
+            cache.get_or_compute(('facebook', 'token'), lambda: calls.append(1) or True)
+        self.assertEqual(len(calls), 1)
+
+    def test_failures_expire_sooner(self):
+        cache = TTLCache(ttl=60, negative_ttl=0.05)
+        cache.set(('twitter', 'username'), None)
+        cache.set(('facebook', 'token'), True)
+        time.sleep(0.1)
+        self.assertEqual(cache.get(('twitter', 'username'), 'missing'), 'missing')
+        self.assertTrue(cache.get(('facebook', 'token')))
+
+    def test_invalidate_platform(self):
+        cache = TTLCache()
+        cache.set(('facebook', 'token'), True)
+        cache.set(('facebook', 'page'), True)
+        cache.set(('linkedin', 'credentials'), True)
+        cache.invalidate('facebook')
+        self.assertIsNone(cache.get(('facebook', 'token')))
+        self.assertIsNone(cache.get(('facebook', 'page')))
+        self.assertTrue(cache.get(('linkedin', 'credentials')))
+
+    def test_concurrent_misses_compute_once(self):
+        cache = TTLCache()
+        calls = []
+
+        def slow():
+            calls.append(1)
+            time.sleep(0.05)
+            return True
+
+        threads = [threading.Thread(target=cache.get_or_compute, args=(('instagram', 'account'), slow)) for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(calls), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
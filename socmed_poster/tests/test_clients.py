@@ -0,0 +1,53 @@
+"""
+Tests for the shared poster registry.
+"""
+import threading
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from socmed_poster.clients import PosterRegistry
+
+
+class TestPosterRegistry(unittest.TestCase):
+    """Test that posters are built once and shared."""
+
+    def test_builds_each_poster_once(self):
+        built = []
+        registry = PosterRegistry({'twitter': lambda: built.append(object()) or built[-1]})
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(registry.get('twitter'))) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(built), 1)
+        self.assertTrue(all(r is built[0] for r in results))
+
+    def test_construction_errors_are_not_cached(self):
+        calls = []
+
+        def factory():
+            calls.append(1)
+            if len(calls) == 1:
+                raise ValueError("Missing credentials")
+            return object()
+
+        registry = PosterRegistry({'linkedin': factory})
+        with self.assertRaises(ValueError):
+            registry.get('linkedin')
+        self.assertIsNotNone(registry.get('linkedin'))
+
+    def test_reset_rebuilds(self):
+        registry = PosterRegistry({'facebook': object})
+        first = registry.get('facebook')
+        registry.reset('facebook')
+        self.assertIsNot(registry.get('facebook'), first)
+
+
+if __name__ == '__main__':
+    unittest.main()
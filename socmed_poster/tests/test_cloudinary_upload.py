@@ -0,0 +1,157 @@
+"""
+Tests for InstagramPoster's chunked Cloudinary upload against a local Cloudinary stand-in.
+"""
+import email
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from socmed_poster.scripts.instagram_script import InstagramPoster
+from socmed_poster.scripts.media_cache import UploadIndex
+
+
+class CloudinaryStandIn:
+    """Minimal local implementation of Cloudinary's chunked `/{cloud}/{type}/upload` protocol."""
+
+    def __init__(self):
+        self.uploads = {}
+        self.chunks = []
+        self.fail_chunks = 0
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers['Content-Length']))
+                message = email.message_from_bytes(
+                    b'Content-Type: ' + self.headers['Content-Type'].encode() + b'\r\n\r\n' + body)
+                fields = {part.get_param('name', header='content-disposition'): part.get_payload(decode=True)
+                          for part in message.get_payload()}
+                status, payload = standin.handle(self.path, self.headers, fields)
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.base_url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def handle(self, path, headers, fields):
+        upload_id = headers.get('X-Unique-Upload-Id')
+        start, end, total = map(int, re.match(r'bytes (\d+)-(\d+)/(\d+)', headers['Content-Range']).groups())
+        self.chunks.append((upload_id, start, len(fields['file'])))
+        if self.fail_chunks:
+            self.fail_chunks -= 1
+            return 500, {'error': {'message': 'Server error'}}
+        if fields.get('upload_preset') != b'preset':
+            return 400, {'error': {'message': 'Upload preset must be specified'}}
+
+        data = self.uploads.setdefault(upload_id, bytearray())
+        if start != len(data) or end - start + 1 != len(fields['file']):
+            return 400, {'error': {'message': 'Invalid Content-Range'}}
+        data += fields['file']
+        if len(data) < total:
+            return 200, {'done': False}
+        return 200, {'secure_url': f'https://res.cloudinary.com{path}/{upload_id}.mp4', 'bytes': total}
+
+
+class TestChunkedCloudinaryUpload(unittest.TestCase):
+    """Test chunking, per-chunk retry, resume and progress reporting."""
+
+    def setUp(self):
+        self.cloudinary = CloudinaryStandIn()
+        self.addCleanup(self.cloudinary.close)
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.payload = os.urandom(200)
+        self.video = os.path.join(self.dir.name, 'clip.mp4')
+        with open(self.video, 'wb') as f:
+            f.write(self.payload)
+
+        env = {'INSTAGRAM_USER_ID': '17841', 'INSTAGRAM_ACCESS_TOKEN': 'token',
+               'CLOUDINARY_CLOUD_NAME': 'demo', 'CLOUDINARY_UPLOAD_PRESET': 'preset'}
+        patcher = mock.patch.dict(os.environ, env)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.poster = InstagramPoster()
+        self.poster.CLOUDINARY_API_BASE = self.cloudinary.base_url
+        self.poster.CLOUDINARY_CHUNK_SIZE = 50
+        self.poster.CLOUDINARY_CHUNK_RETRIES = 2
+        self.poster.CLOUDINARY_RETRY_BACKOFF = 0
+        self.poster.CLOUDINARY_RESUME_ATTEMPTS = 2
+        self.poster.upload_index = UploadIndex(os.path.join(self.dir.name, 'uploads.json'))
+        # No adapter-level retries, so only the per-chunk retries are exercised
+        self.poster.session = requests.Session()
+
+    def test_uploads_in_chunks_under_one_id(self):
+        progress = []
+        url = self.poster._upload_to_cloudinary(self.video, 'video', progress=lambda sent, total: progress.append((sent, total)))
+
+        (upload_id, data), = self.cloudinary.uploads.items()
+        self.assertEqual(bytes(data), self.payload)
+        self.assertTrue(url.endswith(f'/demo/video/upload/{upload_id}.mp4'))
+        self.assertEqual([(start, size) for _, start, size in self.cloudinary.chunks], [(0, 50), (50, 50), (100, 50), (150, 50)])
+        self.assertEqual(progress, [(50, 200), (100, 200), (150, 200), (200, 200)])
+
+    def test_failed_chunk_is_retried_alone(self):
+        self.cloudinary.fail_chunks = 1
+        self.assertIsNotNone(self.poster._upload_to_cloudinary(self.video, 'video'))
+        self.assertEqual([start for _, start, _ in self.cloudinary.chunks], [0, 0, 50, 100, 150])
+
+    def test_resumes_after_retries_run_out(self):
+        original = self.poster._send_cloudinary_chunk
+
+        def flaky(url, upload, filename, chunk, start, end):
+            if start == 100 and not self.cloudinary.fail_chunks and len(self.cloudinary.chunks) == 2:
+                self.cloudinary.fail_chunks = 2  # exhaust this chunk's retries
+            return original(url, upload, filename, chunk, start, end)
+
+        self.poster._send_cloudinary_chunk = flaky
+        self.assertIsNotNone(self.poster._upload_to_cloudinary(self.video, 'video'))
+
+        self.assertEqual(len(self.cloudinary.uploads), 1)
+        self.assertEqual(bytes(next(iter(self.cloudinary.uploads.values()))), self.payload)
+        # Bytes before the failed chunk were never re-sent
+        self.assertEqual([start for _, start, _ in self.cloudinary.chunks], [0, 50, 100, 100, 100, 150])
+
+    def test_gives_up_after_resume_attempts(self):
+        self.cloudinary.fail_chunks = 4  # two rounds of chunk retries
+        self.assertIsNone(self.poster._upload_to_cloudinary(self.video, 'video'))
+        self.assertEqual([start for _, start, _ in self.cloudinary.chunks], [0, 0, 0, 0])
+
+    def test_rejected_upload_is_not_resumed(self):
+        with mock.patch.dict(os.environ, {'CLOUDINARY_UPLOAD_PRESET': 'wrong'}):
+            self.assertIsNone(self.poster._upload_to_cloudinary(self.video, 'video'))
+        self.assertEqual(len(self.cloudinary.chunks), 1)
+
+    def test_small_file_is_sent_whole(self):
+        self.poster.CLOUDINARY_CHUNK_SIZE = 1024
+        self.poster.session = mock.Mock()
+        self.poster.session.post.return_value = mock.Mock(status_code=200, **{'json.return_value': {'secure_url': 'https://cdn/1'}})
+        progress = []
+        self.assertEqual(self.poster._upload_to_cloudinary(self.video, 'video', progress=lambda *a: progress.append(a)), 'https://cdn/1')
+        self.assertNotIn('headers', self.poster.session.post.call_args.kwargs)
+        self.assertEqual(progress, [(200, 200)])
+
+
+if __name__ == '__main__':
+    unittest.main()
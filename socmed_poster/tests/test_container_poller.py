@@ -0,0 +1,93 @@
+"""
+Tests for the shared Instagram container status poller.
+"""
+import json
+import threading
+import unittest
+import sys
+import os
+from concurrent.futures import wait
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from socmed_poster.scripts.container_poller import ContainerError, ContainerStatusPoller
+from socmed_poster.scripts.graph_batch import GraphBatch
+from socmed_poster.scripts.processing_model import ProcessingTimeModel, VideoFeatures
+
+
+class FakeGraph:
+    """Answer batched status reads from a per-container list of states."""
+
+    def __init__(self, states):
+        self.states = {cid: list(seq) for cid, seq in states.items()}
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def post(self, url, data=None, timeout=None):
+        operations = json.loads(data['batch'])
+        responses = []
+        with self.lock:
+            self.requests.append([op['relative_url'].split('?')[0] for op in operations])
+            for op in operations:
+                cid = op['relative_url'].split('?')[0]
+                seq = self.states[cid]
+                state = seq.pop(0) if len(seq) > 1 else seq[0]
+                responses.append({'code': 200, 'body': json.dumps({'id': cid, 'status_code': state})})
+        return mock.Mock(status_code=200, **{'json.return_value': responses})
+
+
+class TestContainerStatusPoller(unittest.TestCase):
+    """Test that many containers share one batched polling loop."""
+
+    def _poller(self, graph, timeout=5):
+        return ContainerStatusPoller(lambda: GraphBatch(graph, 'https://graph.example', 'token'),
+                                     timeout=timeout, initial_interval=0.01, max_interval=0.02, backoff_step=0.01)
+
+    def test_containers_are_polled_together(self):
+        graph = FakeGraph({
+            'a': ['IN_PROGRESS', 'FINISHED'],
+            'b': ['IN_PROGRESS', 'IN_PROGRESS', 'FINISHED'],
+            'c': ['IN_PROGRESS', 'ERROR'],
+        })
+        poller = self._poller(graph)
+        futures = {cid: poller.watch(cid) for cid in ('a', 'b', 'c')}
+        wait(futures.values(), timeout=5)
+
+        self.assertEqual(futures['a'].result()['status_code'], 'FINISHED')
+        self.assertEqual(futures['b'].result()['status_code'], 'FINISHED')
+        with self.assertRaises(ContainerError):
+            futures['c'].result()
+        # One batch request per round, each covering every container still pending
+        self.assertEqual(sorted(graph.requests[0]), ['a', 'b', 'c'])
+        self.assertLessEqual(len(graph.requests), 4)
+        self.assertEqual(poller.pending, 0)
+
+    def test_watching_twice_shares_a_future(self):
+        poller = self._poller(FakeGraph({'a': ['IN_PROGRESS', 'FINISHED']}))
+        self.assertIs(poller.watch('a'), poller.watch('a'))
+
+    def test_timeout_fails_the_future(self):
+        poller = self._poller(FakeGraph({'a': ['IN_PROGRESS']}), timeout=0.05)
+        with self.assertRaises(ContainerError) as ctx:
+            poller.watch('a').result(timeout=5)
+        self.assertIn('Timed out', str(ctx.exception))
+
+
+    def test_model_schedules_polls_and_learns(self):
+        model = mock.Mock(spec=ProcessingTimeModel)
+        model.next_poll.return_value = 0.01
+        graph = FakeGraph({'a': ['IN_PROGRESS', 'FINISHED']})
+        poller = ContainerStatusPoller(lambda: GraphBatch(graph, 'https://graph.example', 'token'),
+                                       initial_interval=60, model=model)
+        features = VideoFeatures(size=1024)
+
+        poller.watch('a', features).result(timeout=5)
+        # The model, not the 60s default interval, decided when to poll
+        self.assertEqual(len(graph.requests), 2)
+        self.assertEqual(model.next_poll.call_args_list[0].args, (features, mock.ANY))
+        model.record.assert_called_once_with(features, mock.ANY)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+"""
+Tests for FacebookPoster.
+"""
+import json
+import tempfile
+import threading
+import time
+import unittest
+import sys
+import os
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from socmed_poster.scripts.fb_script import FacebookPoster, Settings
+
+
+def _response(payload, status=200):
+    resp = mock.Mock(status_code=status, content=b'x')
+    resp.json.return_value = payload
+    resp.raise_for_status.return_value = None
+    return resp
+
+
+class TestPreflight(unittest.TestCase):
+    """Test the single-round-trip preflight."""
+
+    def _poster(self, batch_payload):
+        session = mock.Mock()
+        session.post.return_value = _response(batch_payload)
+        settings = Settings(facebook_page_id='42', facebook_access_token='user-token')
+        return FacebookPoster(settings=settings, session=session), session
+
+    def test_preflight_uses_one_request(self):
+        poster, session = self._poster([
+            {'code': 200, 'body': json.dumps({'id': '7', 'name': 'Me'})},
+            {'code': 200, 'body': json.dumps({'id': '42', 'name': 'My Page', 'access_token': 'page-token'})},
+        ])
+        result = poster.preflight()
+
+        self.assertEqual(session.post.call_count, 1)
+        self.assertTrue(result)
+        self.assertEqual(result.page_name, 'My Page')
+        self.assertEqual(poster.publish_token, 'page-token')
+        self.assertEqual(poster.access_token, 'user-token')
+
+    def test_preflight_reports_missing_page_access(self):
+        poster, _ = self._poster([
+            {'code': 200, 'body': json.dumps({'id': '7', 'name': 'Me'})},
+            {'code': 403, 'body': json.dumps({'error': {'code': 10, 'message': 'denied'}})},
+        ])
+        result = poster.preflight()
+
+        self.assertTrue(result.token_valid)
+        self.assertFalse(result.page_access)
+        self.assertFalse(result)
+
+    def test_auth_error_triggers_callback(self):
+        poster, _ = self._poster([
+            {'code': 400, 'body': json.dumps({'error': {'code': 190, 'message': 'expired'}})},
+            {'code': 400, 'body': json.dumps({'error': {'code': 190, 'message': 'expired'}})},
+        ])
+        poster.on_auth_error = mock.Mock()
+        self.assertFalse(poster.preflight())
+        poster.on_auth_error.assert_called()
+
+    def test_revoked_page_token_is_replaced(self):
+        poster, session = self._poster([
+            {'code': 200, 'body': json.dumps({'id': '7', 'name': 'Me'})},
+            {'code': 200, 'body': json.dumps({'id': '42', 'name': 'My Page', 'access_token': 'old-page-token'})},
+        ])
+        poster.preflight()
+        self.assertEqual(poster.publish_token, 'old-page-token')
+
+        poster._check_auth_error(190)
+        self.assertEqual(poster.publish_token, 'user-token')
+
+        session.post.return_value = _response([
+            {'code': 200, 'body': json.dumps({'id': '7', 'name': 'Me'})},
+            {'code': 200, 'body': json.dumps({'id': '42', 'name': 'My Page', 'access_token': 'new-page-token'})},
+        ])
+        poster.preflight()
+        self.assertEqual(poster.publish_token, 'new-page-token')
+
+    def test_cached_preflight_overwrites_page_token(self):
+        poster, _ = self._poster([])
+        poster.page_access_token = 'old-page-token'
+        poster.apply_preflight(mock.Mock(page_token='new-page-token'))
+        self.assertEqual(poster.publish_token, 'new-page-token')
+
+
+class TestMultiplePhotos(unittest.TestCase):
+    """Test the parallel unpublished-photo uploads."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.paths = []
+        for i in range(6):
+            path = os.path.join(self.tmp.name, f'photo{i}.jpg')
+            with open(path, 'wb') as f:
+                f.write(b'jpeg')
+            self.paths.append(path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _poster(self, feed_status=200):
+        self.active = 0
+        self.peak = 0
+        self.feed_data = None
+        lock = threading.Lock()
+
+        def post(url, data=None, files=None, timeout=None):
+            if url.endswith('/'):
+                self.batch_ops = json.loads(data['batch'])
+                return _response([{'code': 200, 'body': '{"success": true}'} for _ in self.batch_ops])
+            if url.endswith('/photos'):
+                name = os.path.basename(files['source'].name)
+                with lock:
+                    self.active += 1
+                    self.peak = max(self.peak, self.active)
+                # Later photos finish first to prove ordering does not depend on timing
+                time.sleep(0.05 * (6 - int(name[5])))
+                with lock:
+                    self.active -= 1
+                return _response({'id': f'id-{name}'})
+            self.feed_data = data
+            return _response({'id': 'post'} if feed_status == 200 else {'error': {'code': 1}}, feed_status)
+
+        session = mock.Mock()
+        session.post.side_effect = post
+        settings = Settings(facebook_page_id='42', facebook_access_token='token', upload_concurrency=3)
+        return FacebookPoster(settings=settings, session=session), session
+
+    def test_uploads_run_in_parallel_and_keep_order(self):
+        poster, _ = self._poster()
+        self.assertTrue(poster.post_multiple_photos(self.paths, 'caption'))
+
+        attached = json.loads(self.feed_data['attached_media'])
+        self.assertEqual([a['media_fbid'] for a in attached], [f'id-photo{i}.jpg' for i in range(6)])
+        self.assertEqual(self.peak, 3)
+
+    def test_failed_post_deletes_uploaded_photos_in_one_batch(self):
+        poster, session = self._poster(feed_status=400)
+        self.assertFalse(poster.post_multiple_photos(self.paths))
+        self.assertEqual([op['method'] for op in self.batch_ops], ['DELETE'] * 6)
+        self.assertEqual(self.batch_ops[0]['relative_url'], 'id-photo0.jpg')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,170 @@
+"""
+Tests for FacebookPoster's resumable video upload against a local Graph stand-in.
+"""
+import email
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import parse_qs
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from socmed_poster.scripts.fb_script import FacebookPoster, Settings
+
+
+class GraphVideoStandIn:
+    """Minimal local implementation of Graph's resumable `/{page_id}/videos` protocol."""
+
+    def __init__(self, server_chunk=64):
+        self.server_chunk = server_chunk
+        self.sessions = {}
+        self.transfers = []
+        self.fail_transfers = 0
+        self.fail_status = 400
+        self.finished = None
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers['Content-Length']))
+                fields = standin.parse(self.headers['Content-Type'], body)
+                status, payload = standin.handle(fields)
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.base_url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    @staticmethod
+    def parse(content_type, body):
+        if content_type.startswith('multipart/'):
+            message = email.message_from_bytes(b'Content-Type: ' + content_type.encode() + b'\r\n\r\n' + body)
+            return {part.get_param('name', header='content-disposition'): part.get_payload(decode=True)
+                    for part in message.get_payload()}
+        return {k: v[0].encode() for k, v in parse_qs(body.decode()).items()}
+
+    def _offsets(self, session):
+        received = len(session['data'])
+        return {'start_offset': str(received), 'end_offset': str(min(session['size'], received + self.server_chunk))}
+
+    def handle(self, fields):
+        phase = fields['upload_phase'].decode()
+        if phase == 'start':
+            session_id = str(len(self.sessions) + 1)
+            self.sessions[session_id] = {'size': int(fields['file_size']), 'data': bytearray()}
+            return 200, {'upload_session_id': session_id, 'video_id': 'v' + session_id, **self._offsets(self.sessions[session_id])}
+
+        session = self.sessions[fields['upload_session_id'].decode()]
+        if phase == 'transfer':
+            start = int(fields['start_offset'])
+            self.transfers.append((start, len(fields['video_file_chunk'])))
+            if self.fail_transfers:
+                self.fail_transfers -= 1
+                return self.fail_status, {'error': {'code': 2, 'message': 'Service temporarily unavailable', 'is_transient': True}}
+            if start != len(session['data']):
+                return 400, {'error': {'code': 6000, 'message': 'offset mismatch', 'error_data': self._offsets(session)}}
+            session['data'] += fields['video_file_chunk']
+            return 200, self._offsets(session)
+
+        self.finished = (bytes(session['data']), fields.get('description', b'').decode())
+        return 200, {'success': True}
+
+
+class TestResumableVideoUpload(unittest.TestCase):
+    """Test chunking, per-chunk retry and resume."""
+
+    def setUp(self):
+        self.graph = GraphVideoStandIn(server_chunk=64)
+        self.video = tempfile.NamedTemporaryFile(suffix='.mp4', delete=False)
+        self.payload = os.urandom(200)
+        self.video.write(self.payload)
+        self.video.close()
+        settings = Settings(facebook_page_id='42', facebook_access_token='token', base_url=self.graph.base_url,
+                            video_chunk_size=50, video_chunk_retries=2, video_retry_backoff=0)
+        self.poster = FacebookPoster(settings=settings)
+
+    def tearDown(self):
+        self.graph.close()
+        os.remove(self.video.name)
+
+    def test_uploads_in_chunks(self):
+        self.assertTrue(self.poster.post_video(self.video.name, 'hello'))
+        self.assertEqual(self.graph.finished, (self.payload, 'hello'))
+        # Our 50-byte chunk size caps Graph's 64-byte window
+        self.assertEqual([size for _, size in self.graph.transfers], [50, 50, 50, 50])
+
+    def test_failed_chunk_is_retried_alone(self):
+        self.graph.fail_transfers = 1
+        self.assertTrue(self.poster.post_video(self.video.name))
+        self.assertEqual([start for start, _ in self.graph.transfers], [0, 0, 50, 100, 150])
+        self.assertEqual(self.graph.finished[0], self.payload)
+
+    def test_server_errors_use_only_the_chunk_retries(self):
+        self.poster.settings.video_resume_attempts = 1
+        self.graph.fail_status = 500
+        self.graph.fail_transfers = 2
+        self.assertFalse(self.poster.post_video(self.video.name))
+        # One request per attempt: the adapter does not retry the chunk POST as well
+        self.assertEqual([start for start, _ in self.graph.transfers], [0, 0])
+
+    def test_offset_resync_is_not_a_failed_attempt(self):
+        self.poster.settings.video_chunk_retries = 1
+        self.poster.settings.video_retry_backoff = 5
+        original = self.poster._transfer_video_chunk
+
+        def rewinding(upload, video_file):
+            if upload.start_offset == 50 and len(self.graph.transfers) == 1:
+                upload.start_offset = 0  # as if Graph's acknowledgement was lost
+            return original(upload, video_file)
+
+        self.poster._transfer_video_chunk = rewinding
+        with mock.patch('socmed_poster.scripts.fb_script.time.sleep') as sleep:
+            self.assertTrue(self.poster.post_video(self.video.name))
+
+        sleep.assert_not_called()
+        self.assertEqual([start for start, _ in self.graph.transfers], [0, 0, 50, 100, 150])
+        self.assertEqual(self.graph.finished[0], self.payload)
+
+    def test_resumes_from_last_acknowledged_offset(self):
+        original = self.poster._transfer_video_chunk
+        calls = []
+
+        def flaky(upload, video_file):
+            calls.append(upload.start_offset)
+            if len(calls) == 3:
+                self.graph.fail_transfers = 2  # exhaust this chunk's retries
+            return original(upload, video_file)
+
+        self.poster._transfer_video_chunk = flaky
+        self.assertTrue(self.poster.post_video(self.video.name))
+
+        self.assertEqual(len(self.graph.sessions), 1)
+        self.assertEqual(self.graph.finished[0], self.payload)
+        # Bytes before the failed chunk were never re-sent
+        self.assertEqual([start for start, _ in self.graph.transfers], [0, 50, 100, 100, 100, 150])
+
+    def test_gives_up_after_resume_attempts(self):
+        self.graph.fail_transfers = 4  # two rounds of chunk retries
+        self.assertFalse(self.poster.post_video(self.video.name))
+        self.assertIsNone(self.graph.finished)
+        self.assertEqual([start for start, _ in self.graph.transfers], [0, 0, 0, 0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+"""
+Tests for the Graph API batch client.
+"""
+import json
+import unittest
+import sys
+import os
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from socmed_poster.scripts.graph_batch import GraphBatch, GraphBatchError
+
+
+def _session(responses):
+    session = mock.Mock()
+    session.post.side_effect = [mock.Mock(status_code=200, **{'json.return_value': r}) for r in responses]
+    return session
+
+
+class TestGraphBatch(unittest.TestCase):
+    """Test that results and errors map back to each operation."""
+
+    def test_results_map_to_futures(self):
+        session = _session([[
+            {'code': 200, 'body': json.dumps({'id': '1'})},
+            {'code': 400, 'body': json.dumps({'error': {'code': 100, 'message': 'bad url'}})},
+        ]])
+        errors = []
+        with GraphBatch(session, 'https://graph.example', 'token', on_error=errors.append) as batch:
+            ok = batch.post('42/media', {'image_url': 'https://img/1.jpg'})
+            bad = batch.get('nope')
+
+        self.assertEqual(ok.result(), {'id': '1'})
+        with self.assertRaises(GraphBatchError) as ctx:
+            bad.result()
+        self.assertEqual(ctx.exception.code, 100)
+        self.assertEqual(errors, [{'code': 100, 'message': 'bad url'}])
+
+        sent = json.loads(session.post.call_args[1]['data']['batch'])
+        self.assertEqual(sent[0], {'method': 'POST', 'relative_url': '42/media', 'body': 'image_url=https%3A%2F%2Fimg%2F1.jpg'})
+
+    def test_large_batches_are_split(self):
+        session = _session([
+            [{'code': 200, 'body': '{}'}] * 50,
+            [{'code': 200, 'body': '{}'}] * 10,
+        ])
+        batch = GraphBatch(session, 'https://graph.example', 'token')
+        futures = [batch.delete(str(i)) for i in range(60)]
+        batch.flush()
+
+        self.assertEqual(session.post.call_count, 2)
+        self.assertTrue(all(f.result() == {} for f in futures))
+
+    def test_missing_responses_fail_their_futures(self):
+        session = _session([[{'code': 200, 'body': json.dumps({'id': '1'})}]])
+        with GraphBatch(session, 'https://graph.example', 'token') as batch:
+            first = batch.get('1')
+            second = batch.get('2')
+
+        self.assertEqual(first.result(timeout=1), {'id': '1'})
+        with self.assertRaises(GraphBatchError) as ctx:
+            second.result(timeout=1)
+        self.assertIn('No response for 2', str(ctx.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,196 @@
+"""
+Tests for InstagramPoster carousel publishing.
+"""
+import tempfile
+import threading
+import time
+import unittest
+import sys
+import os
+from concurrent.futures import Future
+from unittest import mock
+
+from PIL import Image, ImageFile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from socmed_poster.scripts.container_poller import ContainerError
+from socmed_poster.scripts.instagram_script import InstagramPoster
+from socmed_poster.scripts.media_cache import DerivativeCache, UploadIndex
+
+
+def _poster():
+    with mock.patch.dict(os.environ, {'INSTAGRAM_USER_ID': '17841', 'INSTAGRAM_ACCESS_TOKEN': 'token'}):
+        return InstagramPoster()
+
+
+def _response(data):
+    return mock.Mock(**{'json.return_value': data})
+
+
+class TestCarouselPipeline(unittest.TestCase):
+    """Test that carousel images are processed concurrently and keep their order."""
+
+    def setUp(self):
+        self.poster = _poster()
+        self.children = {}
+        self.lock = threading.Lock()
+        self.poster.session = mock.Mock()
+        self.poster.session.post.side_effect = self._post
+        self.poster._prepare_instagram_image = lambda path: time.sleep(0.05) or f'{path}.ready'
+        self.poster._upload_to_cloudinary = self._upload
+
+    def _upload(self, path, resource_type='image', progress=None):
+        # Later images upload faster, so they finish first
+        time.sleep(0.2 - 0.015 * int(path.split('.')[0]))
+        return f'https://cdn/{path}'
+
+    def _post(self, url, data=None, timeout=None):
+        if data.get('is_carousel_item'):
+            with self.lock:
+                child_id = f"child-{data['image_url'].split('/')[-1].split('.')[0]}"
+                self.children[child_id] = data['image_url']
+            return _response({'id': child_id})
+        if data.get('media_type') == 'CAROUSEL':
+            self.carousel_children = data['children']
+            return _response({'id': 'carousel'})
+        return _response({'id': 'published'})
+
+    def test_children_keep_input_order(self):
+        paths = [f'{i}.jpg' for i in range(10)]
+        started = time.monotonic()
+        with mock.patch.object(InstagramPoster, 'UPLOAD_CONCURRENCY', 10):
+            self.assertEqual(self.poster.post_carousel(paths, 'caption'), 'published')
+
+        self.assertEqual(self.carousel_children, ','.join(f'child-{i}' for i in range(10)))
+        self.assertEqual(self.children['child-3'], 'https://cdn/3.jpg.ready')
+        # Roughly one image's prepare + upload, not ten of them
+        self.assertLess(time.monotonic() - started, 1.0)
+
+    def test_failed_upload_aborts_before_carousel(self):
+        self.poster._upload_to_cloudinary = lambda path: None if path.startswith('2.') else self._upload(path)
+
+        self.assertIsNone(self.poster.post_carousel([f'{i}.jpg' for i in range(4)]))
+        media_types = [call.kwargs['data'].get('media_type') for call in self.poster.session.post.call_args_list]
+        self.assertNotIn('CAROUSEL', media_types)
+
+    def test_remote_urls_skip_preparation(self):
+        self.poster._prepare_instagram_image = mock.Mock()
+        self.assertEqual(self.poster.post_carousel(['https://cdn/0.jpg', 'https://cdn/1.jpg']), 'published')
+        self.poster._prepare_instagram_image.assert_not_called()
+        self.assertEqual(self.carousel_children, 'child-0,child-1')
+
+
+class TestPrepareImage(unittest.TestCase):
+    """Test the header-only fast path and draft-mode decoding."""
+
+    def setUp(self):
+        self.poster = _poster()
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.poster.media_cache = DerivativeCache(os.path.join(self.dir.name, 'cache'), max_bytes=10 * 1024 * 1024)
+
+    def _jpeg(self, name, size):
+        path = os.path.join(self.dir.name, name)
+        Image.new('RGB', size, (200, 30, 30)).save(path, 'JPEG')
+        return path
+
+    def test_compliant_image_is_not_decoded(self):
+        path = self._jpeg('ok.jpg', (1080, 1350))
+        with mock.patch.object(ImageFile.ImageFile, 'load', side_effect=AssertionError('decoded')):
+            self.assertEqual(self.poster._prepare_instagram_image(path), path)
+
+    def test_large_jpeg_is_decoded_in_draft_mode(self):
+        path = self._jpeg('wide.jpg', (6000, 2000))
+        original_convert = Image.Image.convert
+        decoded = []
+
+        def convert(img, *args, **kwargs):
+            decoded.append(img.size)
+            return original_convert(img, *args, **kwargs)
+
+        with mock.patch.object(Image.Image, 'convert', convert):
+            output = self.poster._prepare_instagram_image(path)
+
+        # 1/4 scale still covers the 1080x360 thumbnail
+        self.assertEqual(decoded[0], (1500, 500))
+        with Image.open(output) as result:
+            self.assertEqual(result.size, (1080, 1080))
+
+    def test_same_content_reuses_prepared_image(self):
+        first = self.poster._prepare_instagram_image(self._jpeg('a.jpg', (3000, 1000)))
+        # Same pixels under another name, as when a creative is uploaded again
+        second = self.poster._prepare_instagram_image(self._jpeg('b.jpg', (3000, 1000)))
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.poster.media_cache.stats()['hits'], 1)
+
+
+class TestCloudinaryUploadIndex(unittest.TestCase):
+    """Test that identical content is only uploaded to Cloudinary once."""
+
+    def setUp(self):
+        self.poster = _poster()
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.poster.upload_index = UploadIndex(os.path.join(self.dir.name, 'uploads.json'))
+        self.poster.session = mock.Mock()
+        self.poster.session.post.side_effect = lambda *a, **kw: mock.Mock(
+            status_code=200, **{'json.return_value': {'secure_url': f'https://cdn/{self.poster.session.post.call_count}'}})
+        env = mock.patch.dict(os.environ, {'CLOUDINARY_CLOUD_NAME': 'demo', 'CLOUDINARY_UPLOAD_PRESET': 'preset'})
+        env.start()
+        self.addCleanup(env.stop)
+
+    def _file(self, name, content):
+        path = os.path.join(self.dir.name, name)
+        with open(path, 'wb') as f:
+            f.write(content)
+        return path
+
+    def test_repeat_upload_is_skipped(self):
+        first = self.poster._upload_to_cloudinary(self._file('a.mp4', b'video'), resource_type='video')
+        again = self.poster._upload_to_cloudinary(self._file('b.mp4', b'video'), resource_type='video')
+
+        self.assertEqual(first, again)
+        self.assertEqual(self.poster.session.post.call_count, 1)
+
+    def test_resource_type_is_part_of_the_key(self):
+        path = self._file('a.bin', b'bytes')
+        self.poster._upload_to_cloudinary(path, resource_type='image')
+        self.poster._upload_to_cloudinary(path, resource_type='video')
+        self.assertEqual(self.poster.session.post.call_count, 2)
+
+
+class TestVideoPublishing(unittest.TestCase):
+    """Test that videos are published once the shared poller reports them ready."""
+
+    def setUp(self):
+        self.poster = _poster()
+        self.poster.session = mock.Mock()
+        self.poster.session.post.return_value = _response({'id': 'published'})
+        self.ready = {}
+        self.poster.poller = mock.Mock()
+        self.poster.poller.watch.side_effect = lambda cid, features=None: self.ready.setdefault(cid, Future())
+
+    def test_publishes_after_container_is_ready(self):
+        self.poster._create_video_container = mock.Mock(return_value='container-1')
+        published = self.poster.post_video_async('https://cdn/video.mp4', 'caption')
+
+        self.assertFalse(published.done())
+        self.poster.session.post.assert_not_called()
+
+        self.ready['container-1'].set_result({'status_code': 'FINISHED'})
+        self.assertEqual(published.result(timeout=5), 'published')
+        self.assertEqual(self.poster.session.post.call_args.kwargs['data']['creation_id'], 'container-1')
+
+    def test_processing_error_resolves_to_none(self):
+        self.poster._create_video_container = mock.Mock(return_value='container-2')
+        published = self.poster.post_video_async('https://cdn/video.mp4')
+
+        self.ready['container-2'].set_exception(ContainerError('failed', 'container-2', {'status_code': 'ERROR'}))
+        self.assertIsNone(published.result(timeout=5))
+        self.poster.session.post.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
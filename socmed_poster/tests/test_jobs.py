@@ -0,0 +1,157 @@
+"""
+Tests for the background job queue behind POST /post.
+"""
+import time
+import unittest
+from concurrent.futures import Future
+import sys
+import os
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from socmed_poster import create_app, publishing
+from socmed_poster.jobs import Deferred, JobQueue, DEFERRED, SUCCEEDED, FAILED
+
+
+def _wait_for(job, timeout=5):
+    deadline = time.time() + timeout
+    while not job.finished and time.time() < deadline:
+        time.sleep(0.01)
+    return job
+
+
+class TestJobQueue(unittest.TestCase):
+    """Test the JobQueue in isolation."""
+
+    def setUp(self):
+        self.queue = JobQueue(max_workers=2)
+
+    def tearDown(self):
+        self.queue.shutdown()
+
+    def test_successful_job(self):
+        def work(job):
+            job.report("working")
+            return {'success': True, 'message': 'done'}
+
+        job = _wait_for(self.queue.submit('twitter', work))
+        self.assertEqual(job.status, SUCCEEDED)
+        self.assertEqual(job.progress, ["working"])
+        self.assertIs(self.queue.get(job.id), job)
+
+    def test_crashing_job_is_failed(self):
+        def work(job):
+            raise RuntimeError("boom")
+
+        job = _wait_for(self.queue.submit('twitter', work))
+        self.assertEqual(job.status, FAILED)
+        self.assertEqual(job.error, "boom")
+
+    def test_deferred_job_is_parked_without_a_worker(self):
+        queue = JobQueue(max_workers=1)
+        self.addCleanup(queue.shutdown)
+        wake_at = time.time() + 0.3
+
+        def limited(job):
+            if job.deferrals == 0:
+                raise Deferred(wake_at, "rate limited")
+            return {'success': True, 'message': 'done'}
+
+        parked = queue.submit('twitter', limited)
+        time.sleep(0.05)
+        self.assertEqual(parked.status, DEFERRED)
+        self.assertEqual(parked.wake_at, wake_at)
+
+        # The only worker is free while the first job is parked
+        other = _wait_for(queue.submit('linkedin', lambda job: {'success': True}), timeout=0.2)
+        self.assertEqual(other.status, SUCCEEDED)
+
+        _wait_for(parked)
+        self.assertEqual(parked.status, SUCCEEDED)
+        self.assertGreaterEqual(parked.started_at, wake_at)
+        self.assertEqual(parked.progress, ["⏸️ rate limited"])
+
+    def test_parked_jobs_fail_on_shutdown(self):
+        queue = JobQueue(max_workers=1)
+
+        def limited(job):
+            raise Deferred(time.time() + 60, "rate limited")
+
+        parked = queue.submit('twitter', limited)
+        deadline = time.time() + 1
+        while parked.status != DEFERRED and time.time() < deadline:
+            time.sleep(0.01)
+        queue.shutdown()
+
+        self.assertEqual(_wait_for(parked, timeout=1).status, FAILED)
+        self.assertIn('shut down', parked.error)
+
+    def test_future_result_releases_the_worker(self):
+        queue = JobQueue(max_workers=1)
+        self.addCleanup(queue.shutdown)
+        pending = Future()
+
+        background = queue.submit('instagram', lambda job: pending)
+        other = _wait_for(queue.submit('linkedin', lambda job: {'success': True}), timeout=1)
+        self.assertEqual(other.status, SUCCEEDED)
+        self.assertFalse(background.finished)
+
+        pending.set_result({'success': True, 'message': 'posted'})
+        self.assertEqual(_wait_for(background).status, SUCCEEDED)
+        self.assertEqual(background.result['message'], 'posted')
+
+    def test_deferred_post_keeps_uploads(self):
+        post = mock.Mock()
+        with mock.patch.object(publishing, 'publish', side_effect=Deferred(time.time() + 60)):
+            with self.assertRaises(Deferred):
+                publishing.run_post(mock.Mock(), 'twitter', post)
+        post.cleanup.assert_not_called()
+
+
+class TestPostEndpoint(unittest.TestCase):
+    """Test that /post queues work and returns 202."""
+
+    def setUp(self):
+        self.app = create_app()
+        self.client = self.app.test_client()
+
+    def test_validation_error_is_immediate(self):
+        resp = self.client.post('/post', data={'platform': 'linkedin', 'message': ''},
+                                headers={'Accept': 'application/json'})
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn('LinkedIn', resp.get_json()['error'])
+
+    def test_post_returns_202_and_job_completes(self):
+        fake = mock.Mock(return_value=True)
+        with mock.patch.dict(publishing.PUBLISHERS, {'twitter': fake}):
+            resp = self.client.post('/post', data={'platform': 'twitter', 'message': 'hello'},
+                                    headers={'Accept': 'application/json'})
+            self.assertEqual(resp.status_code, 202)
+            job_id = resp.get_json()['job_id']
+            _wait_for(self.app.extensions['socmed_jobs'].get(job_id))
+
+        status = self.client.get(f'/api/jobs/{job_id}').get_json()
+        self.assertEqual(status['status'], SUCCEEDED)
+        self.assertEqual(fake.call_args[0][0].message, 'hello')
+
+    def test_fan_out_reports_each_platform(self):
+        fakes = {'twitter': mock.Mock(return_value=True), 'linkedin': mock.Mock(return_value=False)}
+        with mock.patch.dict(publishing.PUBLISHERS, fakes):
+            resp = self.client.post('/post', data={'platforms': 'twitter,linkedin', 'message': 'hello'},
+                                    headers={'Accept': 'application/json'})
+            self.assertEqual(resp.status_code, 202)
+            job = _wait_for(self.app.extensions['socmed_jobs'].get(resp.get_json()['job_id']))
+
+        self.assertEqual(job.status, FAILED)
+        self.assertTrue(job.result['platforms']['twitter']['success'])
+        self.assertFalse(job.result['platforms']['linkedin']['success'])
+        # Both platforms received the same ingested post
+        self.assertIs(fakes['twitter'].call_args[0][0], fakes['linkedin'].call_args[0][0])
+
+    def test_unknown_job(self):
+        self.assertEqual(self.client.get('/api/jobs/missing').status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
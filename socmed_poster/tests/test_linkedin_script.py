@@ -0,0 +1,181 @@
+"""
+Tests for LinkedInPoster's shared session, cached profile and media uploads.
+"""
+import tempfile
+import threading
+import time
+import unittest
+import sys
+import os
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from socmed_poster.publishing import PostRequest, validate_post
+from socmed_poster.scripts.linkedin_script import LinkedInPoster, _build_session
+
+
+def _response(status_code, data=None):
+    return mock.Mock(status_code=status_code, text='', **{'json.return_value': data or {}})
+
+
+def _poster(session, person_id=None):
+    env = {'LINKEDIN_ACCESS_TOKEN': 'token', 'LINKEDIN_PERSON_ID': person_id or ''}
+    with mock.patch.dict(os.environ, env):
+        return LinkedInPoster(session=session)
+
+
+class TestLinkedInSession(unittest.TestCase):
+    """Test that /me is fetched once and every request is time-bounded."""
+
+    def setUp(self):
+        self.session = mock.Mock()
+        self.session.get.return_value = _response(200, {'id': 'abc', 'localizedFirstName': 'Sam'})
+
+    def test_profile_is_fetched_once(self):
+        poster = _poster(self.session)
+
+        self.assertEqual(poster.person_id, 'abc')
+        self.assertTrue(poster.verify_credentials())
+        self.assertEqual(poster.get_person_id(), 'abc')
+        self.assertEqual(self.session.get.call_count, 1)
+        self.assertEqual(self.session.get.call_args.kwargs['timeout'], LinkedInPoster.REQUEST_TIMEOUT)
+
+    def test_profile_expires(self):
+        poster = _poster(self.session)
+        poster.PROFILE_TTL = 0
+        poster.verify_credentials()
+        self.assertEqual(self.session.get.call_count, 2)
+
+    def test_unauthorized_drops_profile(self):
+        poster = _poster(self.session)
+        poster.on_auth_error = mock.Mock()
+        self.session.post.return_value = _response(401)
+
+        self.assertFalse(poster.post('hello'))
+        poster.on_auth_error.assert_called_once()
+        self.assertEqual(self.session.post.call_args.kwargs['timeout'], LinkedInPoster.REQUEST_TIMEOUT)
+
+        self.session.get.return_value = _response(401)
+        self.assertFalse(poster.verify_credentials())
+        self.assertEqual(self.session.get.call_count, 2)
+
+    def test_session_does_not_retry_posts(self):
+        session = _build_session('token')
+        retries = session.get_adapter('https://api.linkedin.com').max_retries
+        self.assertNotIn('POST', retries.allowed_methods)
+        self.assertEqual(session.headers['Authorization'], 'Bearer token')
+
+
+class TestLinkedInMedia(unittest.TestCase):
+    """Test registerUpload plus streamed PUT uploads and the resulting share."""
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.session = mock.Mock()
+        self.session.post.side_effect = self._post
+        self.session.put.side_effect = self._put
+        self.session.get.return_value = _response(200, {'recipes': [{'status': 'AVAILABLE'}]})
+        self.poster = _poster(self.session, person_id='abc')
+        self.registered = 0
+        self.uploaded = {}
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+        self.fail_upload = None
+        self.share = None
+
+    def _file(self, name):
+        path = os.path.join(self.dir.name, name)
+        with open(path, 'wb') as f:
+            f.write(name.encode())
+        return path
+
+    def _post(self, url, json=None, timeout=None):
+        if 'registerUpload' in url:
+            with self.lock:
+                self.registered += 1
+                n = self.registered
+            return _response(200, {'value': {
+                'asset': f'urn:li:digitalmediaAsset:{n}',
+                'uploadMechanism': {'com.linkedin.digitalmedia.uploading.MediaUploadHttpRequest': {
+                    'uploadUrl': f'https://upload/{n}'}}}})
+        self.share = json
+        return _response(201)
+
+    def _put(self, url, data=None, timeout=None, headers=None):
+        # The body must be the open file, not its bytes read into memory
+        self.assertTrue(hasattr(data, 'read'))
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.05)
+        with self.lock:
+            self.active -= 1
+            self.uploaded[url] = data.read()
+        return _response(500 if data.name == self.fail_upload else 201)
+
+    def _media(self):
+        return self.share['specificContent']['com.linkedin.ugc.ShareContent']
+
+    def test_images_upload_in_parallel(self):
+        paths = [self._file(f'{i}.jpg') for i in range(3)]
+
+        self.assertTrue(self.poster.post('hello', image_paths=paths))
+
+        self.assertGreater(self.max_active, 1)
+        self.assertEqual(sorted(self.uploaded.values()), [b'0.jpg', b'1.jpg', b'2.jpg'])
+        content = self._media()
+        self.assertEqual(content['shareMediaCategory'], 'IMAGE')
+        # Assets are attached in input order whatever order the uploads finished in
+        expected = [self.uploaded[f'https://upload/{m["media"].rsplit(":", 1)[-1]}'] for m in content['media']]
+        self.assertEqual(expected, [b'0.jpg', b'1.jpg', b'2.jpg'])
+
+    def test_failed_upload_stops_the_post(self):
+        paths = [self._file(f'{i}.jpg') for i in range(2)]
+        self.fail_upload = paths[1]
+
+        self.assertFalse(self.poster.post('hello', image_paths=paths))
+        self.assertIsNone(self.share)
+
+    def test_video_waits_for_processing(self):
+        self.poster.ASSET_POLL_INTERVAL = 0.01
+        self.session.get.side_effect = [_response(200, {'recipes': [{'status': 'PROCESSING'}]}),
+                                        _response(200, {'recipes': [{'status': 'AVAILABLE'}]})]
+        self.assertTrue(self.poster.post('clip', video_path=self._file('clip.mp4')))
+
+        self.assertEqual(self.session.get.call_count, 2)
+        self.assertTrue(self.session.get.call_args.args[0].endswith('/assets/1'))
+        self.assertEqual(self._media()['shareMediaCategory'], 'VIDEO')
+        self.assertEqual(self._media()['media'], [{'status': 'READY', 'media': 'urn:li:digitalmediaAsset:1'}])
+
+    def test_async_video_does_not_block_the_caller(self):
+        processed = threading.Event()
+
+        def status(url, timeout=None):
+            return _response(200, {'recipes': [{'status': 'AVAILABLE' if processed.is_set() else 'PROCESSING'}]})
+
+        self.poster.ASSET_POLL_INTERVAL = 0.01
+        self.session.get.side_effect = status
+        published = self.poster.post_video_async('clip', self._file('clip.mp4'))
+
+        self.assertFalse(published.done())
+        self.assertIsNone(self.share)
+        processed.set()
+        self.assertTrue(published.result(timeout=2))
+        self.assertEqual(self._media()['shareMediaCategory'], 'VIDEO')
+
+    def test_failed_processing_resolves_false(self):
+        self.session.get.return_value = _response(200, {'recipes': [{'status': 'CLIENT_ERROR'}]})
+        self.assertFalse(self.poster.post_video_async('clip', self._file('clip.mp4')).result(timeout=2))
+        self.assertIsNone(self.share)
+
+    def test_validation(self):
+        self.assertIsNone(validate_post('linkedin', PostRequest(image_files=['a.jpg'])))
+        self.assertIn('mixing', validate_post('linkedin', PostRequest(message='m', image_files=['a.jpg'], video_files=['b.mp4'])))
+        self.assertIn('9 images', validate_post('linkedin', PostRequest(message='m', image_files=['a.jpg'] * 10)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+"""
+Tests for the content-addressed derivative cache.
+"""
+import os
+import tempfile
+import threading
+import time
+import unittest
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from socmed_poster.scripts.media_cache import DerivativeCache, UploadIndex
+
+
+class TestDerivativeCache(unittest.TestCase):
+    """Test keying by content and parameters, and LRU eviction by bytes."""
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.cache = DerivativeCache(os.path.join(self.dir.name, 'cache'), max_bytes=250)
+        self.created = []
+
+    def _source(self, name, content):
+        path = os.path.join(self.dir.name, name)
+        with open(path, 'wb') as f:
+            f.write(content)
+        return path
+
+    def _create(self, size):
+        def create(path):
+            self.created.append(path)
+            with open(path, 'wb') as f:
+                f.write(b'x' * size)
+        return create
+
+    def test_key_is_content_and_params(self):
+        a = self._source('a.jpg', b'same')
+        b = self._source('b.jpg', b'same')
+        first = self.cache.get_or_create(a, {'size': 1080}, self._create(10))
+        self.assertEqual(self.cache.get_or_create(b, {'size': 1080}, self._create(10)), first)
+        self.assertNotEqual(self.cache.get_or_create(a, {'size': 720}, self._create(10)), first)
+        self.assertEqual(len(self.created), 2)
+
+    def test_least_recently_used_is_evicted_by_bytes(self):
+        paths = {name: self._source(name, name.encode()) for name in ('a', 'b', 'c')}
+        a = self.cache.get_or_create(paths['a'], {}, self._create(100))
+        b = self.cache.get_or_create(paths['b'], {}, self._create(100))
+        self.cache.get_or_create(paths['a'], {}, self._create(100))  # a is now most recent
+        self.cache.get_or_create(paths['c'], {}, self._create(100))
+
+        self.assertTrue(os.path.exists(a))
+        self.assertFalse(os.path.exists(b))
+        self.assertEqual(self.cache.stats()['bytes'], 200)
+
+    def test_pinned_entries_are_not_evicted(self):
+        paths = {name: self._source(name, name.encode()) for name in ('a', 'b', 'c', 'd')}
+        a = self.cache.get_or_create(paths['a'], {}, self._create(100), pin=True)
+        b = self.cache.get_or_create(paths['b'], {}, self._create(100))
+        self.cache.get_or_create(paths['c'], {}, self._create(100))
+
+        # a is least recently used but still in use, so b goes instead
+        self.assertTrue(os.path.exists(a))
+        self.assertFalse(os.path.exists(b))
+
+        self.cache.release(a)
+        self.cache.release(os.path.join(self.dir.name, 'a'))  # not a cache path: ignored
+        self.cache.get_or_create(paths['d'], {}, self._create(100))
+        self.assertFalse(os.path.exists(a))
+        self.assertEqual(self.cache.stats()['bytes'], 200)
+
+    def test_concurrent_misses_create_once(self):
+        source = self._source('a.jpg', b'content')
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.cache.get_or_create(source, {}, self._create(5))))
+                   for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(set(results)), 1)
+        self.assertEqual(len(self.created), 1)
+
+    def test_existing_files_are_adopted(self):
+        source = self._source('a.jpg', b'content')
+        path = self.cache.get_or_create(source, {}, self._create(5))
+
+        restarted = DerivativeCache(self.cache.directory, max_bytes=250)
+        self.assertEqual(restarted.get_or_create(source, {}, self._create(5)), path)
+        self.assertEqual(len(self.created), 1)
+
+
+class TestUploadIndex(unittest.TestCase):
+    """Test persistence and expiry of the upload index."""
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.path = os.path.join(self.dir.name, 'uploads.json')
+
+    def test_entries_survive_a_restart(self):
+        UploadIndex(self.path).set('key', 'https://cdn/a.jpg')
+        self.assertEqual(UploadIndex(self.path).get('key'), 'https://cdn/a.jpg')
+
+    def test_entries_expire(self):
+        index = UploadIndex(self.path, ttl=0.05)
+        index.set('key', 'https://cdn/a.jpg')
+        time.sleep(0.06)
+        self.assertIsNone(index.get('key'))
+
+    def test_unreadable_index_starts_empty(self):
+        with open(self.path, 'w') as f:
+            f.write('{not json')
+        index = UploadIndex(self.path)
+        self.assertIsNone(index.get('key'))
+        index.set('key', 'https://cdn/a.jpg')
+        self.assertEqual(UploadIndex(self.path).get('key'), 'https://cdn/a.jpg')
+
+
+if __name__ == '__main__':
+    unittest.main()
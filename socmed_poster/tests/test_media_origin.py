@@ -0,0 +1,176 @@
+"""
+Tests for the self-hosted media origin, its signed URLs and how /public_uploads serves them.
+"""
+import os
+import tempfile
+import time
+import unittest
+import sys
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from socmed_poster import create_app
+from socmed_poster.routes import utils
+from socmed_poster.scripts.instagram_script import InstagramPoster
+from socmed_poster.scripts.media_origin import MediaOrigin
+
+
+class TestMediaOrigin(unittest.TestCase):
+    """Test publishing, signing and serving of origin media."""
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.public = os.path.join(self.dir.name, 'public')
+        self.origin = MediaOrigin('https://posts.example.com/', 'secret', self.public, ttl=60)
+
+    def _source(self, name, content):
+        path = os.path.join(self.dir.name, name)
+        with open(path, 'wb') as f:
+            f.write(content)
+        return path
+
+    def _split(self, url):
+        parts = urlsplit(url)
+        query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        return parts.path[len('/public_uploads/'):], query['expires'], query['sig']
+
+    def test_publish_stores_content_once(self):
+        first = self.origin.publish(self._source('a.JPG', b'image'))
+        second = self.origin.publish(self._source('b.jpg', b'image'))
+
+        self.assertTrue(first.startswith('https://posts.example.com/public_uploads/media/'))
+        self.assertEqual(self._split(first)[0], self._split(second)[0])
+        self.assertTrue(self._split(first)[0].endswith('.jpg'))
+        self.assertEqual(len(os.listdir(os.path.join(self.public, 'media'))), 1)
+
+    def test_old_source_is_not_pruned_on_publish(self):
+        source = self._source('cached.jpg', b'image')
+        stale = time.time() - 3600
+        os.utime(source, (stale, stale))
+
+        name = self._split(self.origin.publish(source))[0]
+
+        self.assertTrue(os.path.exists(os.path.join(self.public, *name.split('/'))))
+
+    def test_verify(self):
+        name, expires, sig = self._split(self.origin.publish(self._source('a.jpg', b'image')))
+
+        self.assertTrue(self.origin.verify(name, expires, sig))
+        self.assertFalse(self.origin.verify(name, str(int(expires) + 1), sig))
+        self.assertFalse(self.origin.verify('media/other.jpg', expires, sig))
+        self.assertFalse(self.origin.verify(name, expires, None))
+        self.assertFalse(MediaOrigin('https://x', 'other', self.public).verify(name, expires, sig))
+
+        expired = self.origin.url_for(name, expires=int(time.time()) - 1)
+        self.assertFalse(self.origin.verify(*self._split(expired)))
+
+    def test_enabled_needs_base_url_and_secret(self):
+        self.assertTrue(self.origin.enabled)
+        self.assertFalse(MediaOrigin('https://x', None).enabled)
+        self.assertFalse(MediaOrigin(None, 'secret').enabled)
+
+    def test_route_requires_signature(self):
+        url = self.origin.publish(self._source('a.jpg', b'image'))
+        name, expires, sig = self._split(url)
+        client = self._app()
+        signed = client.get(f'/public_uploads/{name}?expires={expires}&sig={sig}')
+        unsigned = client.get(f'/public_uploads/{name}')
+        forged = client.get(f'/public_uploads/{name}?expires={expires}&sig={"0" * 64}')
+
+        self.assertEqual(signed.status_code, 200)
+        self.assertEqual(signed.data, b'image')
+        signed.close()
+        self.assertEqual(unsigned.status_code, 404)
+        self.assertEqual(forged.status_code, 404)
+
+    def test_route_requires_signature_for_any_spelling(self):
+        name, expires, sig = self._split(self.origin.publish(self._source('a.jpg', b'image')))
+        client = self._app()
+        digest_name = name[len('media/'):]
+
+        for spelling in (f'./{name}', f'media/./{digest_name}', f'other/../{name}', f'MEDIA/{digest_name}'):
+            self.assertEqual(client.get(f'/public_uploads/{spelling}').status_code, 404, spelling)
+
+        # A valid signature still works through an equivalent spelling
+        signed = client.get(f'/public_uploads/./{name}?expires={expires}&sig={sig}')
+        self.assertEqual(signed.status_code, 200)
+        signed.close()
+
+    def _app(self, **config):
+        with mock.patch.dict(os.environ, {'SOCMED_PUBLIC_FOLDER': self.public}):
+            app = create_app()
+        app.config.update(config)
+        patcher = mock.patch.object(utils, 'media_origin', self.origin)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return app.test_client()
+
+    def test_media_is_served_with_strong_etag_and_ranges(self):
+        url = self.origin.publish(self._source('a.mp4', b'0123456789'))
+        path = urlsplit(url)
+        target = f'{path.path}?{path.query}'
+        client = self._app()
+
+        full = client.get(target)
+        digest = self._split(url)[0][len('media/'):-len('.mp4')]
+        self.assertEqual(full.headers['ETag'], f'"{digest}"')
+        self.assertIn('immutable', full.headers['Cache-Control'])
+        self.assertIn('public', full.headers['Cache-Control'])
+        self.assertLessEqual(full.cache_control.max_age, 60)
+        self.assertEqual(full.headers['Accept-Ranges'], 'bytes')
+        full.close()
+
+        partial = client.get(target, headers={'Range': 'bytes=2-5'})
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(partial.data, b'2345')
+        self.assertEqual(partial.headers['Content-Range'], 'bytes 2-5/10')
+        partial.close()
+
+        cached = client.get(target, headers={'If-None-Match': f'"{digest}"'})
+        self.assertEqual(cached.status_code, 304)
+
+    def test_x_accel_redirect(self):
+        url = self.origin.publish(self._source('a.mp4', b'0123456789'))
+        path = urlsplit(url)
+        client = self._app(PUBLIC_UPLOAD_SENDFILE='x-accel-redirect', ACCEL_REDIRECT_PREFIX='/internal/')
+
+        resp = client.get(f'{path.path}?{path.query}')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.headers['X-Accel-Redirect'], '/internal/' + self._split(url)[0])
+        self.assertEqual(resp.mimetype, 'video/mp4')
+        self.assertEqual(resp.data, b'')
+        self.assertEqual(client.get(f'{path.path}?{path.query}', headers={'If-None-Match': resp.headers['ETag']}).status_code, 304)
+        self.assertEqual(client.get('/public_uploads/missing.mp4').status_code, 404)
+
+    def test_x_sendfile(self):
+        client = self._app(USE_X_SENDFILE=True)
+        with open(os.path.join(self.public, 'plain.jpg'), 'wb') as f:
+            f.write(b'image')
+        resp = client.get('/public_uploads/plain.jpg')
+        self.assertEqual(resp.headers['X-Sendfile'], os.path.join(self.public, 'plain.jpg'))
+        self.assertNotIn('immutable', resp.headers.get('Cache-Control', ''))
+        resp.close()
+
+    def test_instagram_uses_origin_instead_of_cloudinary(self):
+        with mock.patch.dict(os.environ, {'INSTAGRAM_USER_ID': '17841', 'INSTAGRAM_ACCESS_TOKEN': 'token'}):
+            poster = InstagramPoster()
+        poster.media_origin = self.origin
+        poster._upload_to_cloudinary = mock.Mock(return_value='https://cdn/1')
+        path = self._source('clip.mp4', b'video')
+        progress = []
+
+        url = poster._public_url(path, 'video', progress=lambda *a: progress.append(a))
+
+        self.assertTrue(url.startswith('https://posts.example.com/public_uploads/media/'))
+        poster._upload_to_cloudinary.assert_not_called()
+        self.assertEqual(progress, [(5, 5)])
+
+        poster.media_origin = MediaOrigin()
+        self.assertEqual(poster._public_url(path, 'video'), 'https://cdn/1')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+"""
+Tests for the Instagram processing-time model and MP4 header probe.
+"""
+import struct
+import tempfile
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from socmed_poster import create_app
+from socmed_poster.routes import api
+from socmed_poster.scripts.processing_model import ProcessingTimeModel, VideoFeatures, probe_video
+
+
+def _box(box_type, payload):
+    return struct.pack('>I4s', 8 + len(payload), box_type) + payload
+
+
+def _mp4(duration_s, width, height, timescale=1000, mdat_size=4096):
+    mvhd = bytes(4) + bytes(8) + struct.pack('>II', timescale, int(duration_s * timescale)) + bytes(80)
+    tkhd = bytes(4) + bytes(72) + struct.pack('>II', width << 16, height << 16)
+    audio_tkhd = bytes(4) + bytes(72) + struct.pack('>II', 0, 0)
+    moov = _box(b'moov', _box(b'mvhd', mvhd) + _box(b'trak', _box(b'tkhd', audio_tkhd))
+                + _box(b'trak', _box(b'tkhd', tkhd)))
+    # moov after mdat, as cameras usually write it
+    return _box(b'ftyp', b'isom' + bytes(4)) + _box(b'mdat', bytes(mdat_size)) + moov
+
+
+class TestProbeVideo(unittest.TestCase):
+    """Test that duration and resolution come from the MP4 header."""
+
+    def test_reads_duration_and_resolution(self):
+        with tempfile.NamedTemporaryFile(suffix='.mp4', delete=False) as f:
+            f.write(_mp4(42.5, 1920, 1080))
+        self.addCleanup(os.remove, f.name)
+
+        features = probe_video(f.name)
+        self.assertEqual(features.duration, 42.5)
+        self.assertEqual((features.width, features.height), (1920, 1080))
+        self.assertEqual(features.size, os.path.getsize(f.name))
+
+    def test_unparseable_file_keeps_size_only(self):
+        with tempfile.NamedTemporaryFile(suffix='.mp4', delete=False) as f:
+            f.write(b'not an mp4 at all')
+        self.addCleanup(os.remove, f.name)
+
+        features = probe_video(f.name)
+        self.assertEqual(features, VideoFeatures(size=17))
+
+
+class TestProcessingTimeModel(unittest.TestCase):
+    """Test poll scheduling from learned processing times."""
+
+    def setUp(self):
+        self.model = ProcessingTimeModel(min_samples=3, min_interval=1, max_interval=30)
+        self.long = VideoFeatures(size=200 * 1024 * 1024, duration=90, width=1920, height=1080)
+        self.short = VideoFeatures(size=2 * 1024 * 1024, duration=8, width=720, height=1280)
+
+    def test_no_data_defers_to_default_backoff(self):
+        self.assertIsNone(self.model.next_poll(self.long, 0))
+
+    def test_polls_follow_the_matching_bucket(self):
+        for seconds in (60, 64, 70, 80):
+            self.model.record(self.long, seconds)
+        for seconds in (3, 4, 4):
+            self.model.record(self.short, seconds)
+
+        # Long videos: first poll near the 25th percentile, not after 5s
+        self.assertEqual(self.model.next_poll(self.long, 0), 60)
+        self.assertEqual(self.model.next_poll(self.long, 60), 4)
+        # Past every percentile: poll every quarter of p90, capped
+        self.assertEqual(self.model.next_poll(self.long, 85), 20)
+        # Short videos are checked early
+        self.assertEqual(self.model.next_poll(self.short, 0), 3)
+
+    def test_stats_and_endpoint(self):
+        for seconds in (10, 20, 30):
+            self.model.record(self.short, seconds)
+        stats = self.model.stats()
+        self.assertEqual(stats['overall']['count'], 3)
+        self.assertEqual(stats['buckets'][0]['p50'], 20)
+
+        api.processing_model, original = self.model, api.processing_model
+        self.addCleanup(setattr, api, 'processing_model', original)
+        resp = create_app().test_client().get('/api/instagram/processing-stats')
+        self.assertEqual(resp.get_json()['overall']['p90'], 30)
+
+    def test_samples_survive_restart(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'processing.json')
+            model = ProcessingTimeModel(min_samples=3, window=3, path=path)
+            for seconds in (50, 60, 64, 70):
+                model.record(self.long, seconds)
+
+            restarted = ProcessingTimeModel(min_samples=3, window=3, path=path)
+            self.assertEqual(restarted.stats(), model.stats())
+            self.assertEqual(restarted.stats()['overall']['count'], 3)
+            self.assertEqual(restarted.next_poll(self.long, 0), 60)
+
+            with open(path, 'w') as f:
+                f.write('not json')
+            self.assertEqual(ProcessingTimeModel(path=path).stats()['overall'], {'count': 0})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,147 @@
+"""
+Tests for the concurrent /api/status checks.
+"""
+import time
+import unittest
+import sys
+import os
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from socmed_poster import create_app, status
+from socmed_poster.cache import TTLCache
+
+
+def _fake_checks(delays):
+    def make(delay, platform):
+        def check():
+            time.sleep(delay)
+            return {'credentials_valid': True, 'platform': platform}
+        return check
+    return {platform: make(delay, platform) for platform, delay in delays.items()}
+
+
+class TestCheckDeadlines(unittest.TestCase):
+    """Test concurrency and per-platform deadlines of first-time checks."""
+
+    def test_checks_run_concurrently(self):
+        checks = _fake_checks({'facebook': 0.2, 'twitter': 0.2, 'instagram': 0.2, 'linkedin': 0.2})
+        with mock.patch.dict(status.CHECKS, checks):
+            started = time.monotonic()
+            results = status.StatusMonitor(refresh_interval=0).get(list(checks))
+            elapsed = time.monotonic() - started
+
+        self.assertLess(elapsed, 0.6)
+        self.assertTrue(all(r['credentials_valid'] for r in results.values()))
+
+    def test_slow_platform_times_out(self):
+        checks = _fake_checks({'twitter': 0.01, 'linkedin': 1.0})
+        with mock.patch.dict(status.CHECKS, checks):
+            started = time.monotonic()
+            results = status.StatusMonitor(refresh_interval=0).get(['twitter', 'linkedin'],
+                                                                 deadlines={'twitter': 0.5, 'linkedin': 0.1})
+            elapsed = time.monotonic() - started
+
+        self.assertLess(elapsed, 0.6)
+        self.assertTrue(results['twitter']['credentials_valid'])
+        self.assertEqual(results['linkedin']['status'], 'timeout')
+
+    def test_streamed_checks_time_out_on_their_own_deadline(self):
+        checks = _fake_checks({'twitter': 1.0, 'linkedin': 0.4})
+        with mock.patch.dict(status.CHECKS, checks):
+            started = time.monotonic()
+            arrivals = []
+            for platform, entry in status.StatusMonitor(refresh_interval=0).iter_results(
+                    ['twitter', 'linkedin'], deadlines={'twitter': 0.1, 'linkedin': 0.8}):
+                arrivals.append((platform, entry, time.monotonic() - started))
+
+        (first, timed_out, at), (second, result, _) = arrivals
+        self.assertEqual((first, timed_out['status']), ('twitter', 'timeout'))
+        self.assertLess(at, 0.3)
+        self.assertEqual(second, 'linkedin')
+        self.assertTrue(result['credentials_valid'])
+
+
+class TestStatusMonitor(unittest.TestCase):
+    """Test the stale-while-revalidate snapshot."""
+
+    def setUp(self):
+        self.calls = []
+
+        def check():
+            self.calls.append(time.time())
+            return {'credentials_valid': True}
+
+        self.patcher = mock.patch.dict(status.CHECKS, {'twitter': check})
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def test_serves_from_memory(self):
+        monitor = status.StatusMonitor(max_age=60, refresh_interval=0)
+        first = monitor.get(['twitter'])
+        for _ in range(5):
+            result = monitor.get(['twitter'])
+
+        self.assertEqual(len(self.calls), 1)
+        self.assertTrue(first['twitter']['credentials_valid'])
+        self.assertFalse(result['twitter']['stale'])
+        self.assertGreaterEqual(result['twitter']['age'], 0)
+
+    def test_stale_entry_triggers_background_refresh(self):
+        monitor = status.StatusMonitor(max_age=0.3, refresh_interval=0)
+        monitor.get(['twitter'])
+        time.sleep(0.35)
+
+        result = monitor.get(['twitter'])
+        self.assertTrue(result['twitter']['stale'])
+        deadline = time.time() + 1
+        while monitor.get(['twitter'])['twitter']['stale'] and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertFalse(monitor.get(['twitter'])['twitter']['stale'])
+        self.assertGreaterEqual(len(self.calls), 2)
+
+    def test_refresh_reads_through_verification_cache(self):
+        cache = TTLCache(ttl=60)
+        cache.set(('facebook', 'preflight'), 'cached')
+        preflights = []
+
+        def check():
+            preflight = status.verification_cache.get_or_compute(('facebook', 'preflight'), lambda: preflights.append(1) or 'new')
+            return {'preflight': preflight}
+
+        monitor = status.StatusMonitor(max_age=60, refresh_interval=0)
+        with mock.patch.object(status, 'verification_cache', cache), mock.patch.dict(status.CHECKS, {'facebook': check}):
+            monitor.refresh(['facebook'])['facebook'].result(timeout=1)
+            self.assertEqual(monitor.get(['facebook'])['facebook']['preflight'], 'cached')
+            self.assertEqual(cache.get(('facebook', 'preflight')), 'cached')
+            self.assertEqual(preflights, [])
+
+            # A forced check asks the provider again
+            self.assertEqual(monitor.get(['facebook'], fresh=True)['facebook']['preflight'], 'new')
+            self.assertEqual(preflights, [1])
+
+
+class TestStatusStream(unittest.TestCase):
+    """Test the Server-Sent Events variant of /api/status."""
+
+    def test_fastest_platform_arrives_first(self):
+        checks = _fake_checks({'facebook': 0.3, 'twitter': 0.01, 'instagram': 0.2, 'linkedin': 0.1})
+        monitor = status.StatusMonitor(refresh_interval=0)
+        with mock.patch.dict(status.CHECKS, checks), \
+                mock.patch('socmed_poster.routes.api.monitor', monitor):
+            resp = create_app().test_client().get('/api/status/stream')
+            body = resp.get_data(as_text=True)
+
+        self.assertEqual(resp.mimetype, 'text/event-stream')
+        order = [line for line in body.splitlines() if line.startswith('data: {"')]
+        self.assertEqual(len(order), 4)
+        self.assertIn('"platform": "twitter"', order[0])
+        self.assertIn('"platform": "facebook"', order[-1])
+        self.assertTrue(body.rstrip().endswith('data: {}'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,256 @@
+"""
+Tests for TwitterPoster media handling.
+"""
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+import unittest
+import sys
+import os
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from socmed_poster import publishing
+from socmed_poster.jobs import Deferred
+from socmed_poster.scripts import twitter_script
+
+
+def _poster():
+    with mock.patch.multiple(twitter_script, API_KEY='k', API_SECRET='s', ACCESS_TOKEN='t', ACCESS_SECRET='ts'):
+        return twitter_script.TwitterPoster()
+
+
+class TestConcurrentMediaUpload(unittest.TestCase):
+    """Test that media uploads overlap, keep their order and stop on failure."""
+
+    def setUp(self):
+        self.poster = _poster()
+
+    def test_media_ids_keep_file_order(self):
+        delays = {'a.jpg': 0.2, 'b.jpg': 0.05, 'c.mp4': 0.15, 'd.jpg': 0.0}
+
+        def upload(path, cancelled=None):
+            time.sleep(delays[path])
+            return f'id-{path}'
+
+        self.poster.upload_media = upload
+        started = time.monotonic()
+        media_ids = self.poster.upload_media_files(list(delays))
+
+        self.assertEqual(media_ids, ['id-a.jpg', 'id-b.jpg', 'id-c.mp4', 'id-d.jpg'])
+        # Bounded by the slowest upload, not the sum
+        self.assertLess(time.monotonic() - started, 0.35)
+
+    def test_failure_cancels_remaining_uploads(self):
+        calls = []
+        release = threading.Event()
+
+        def upload(path, cancelled=None):
+            calls.append(path)
+            if path == 'bad.jpg':
+                return None
+            release.wait(1)
+            return None if cancelled.is_set() else f'id-{path}'
+
+        self.poster.upload_media = upload
+        started = time.monotonic()
+        with mock.patch.object(twitter_script, 'UPLOAD_CONCURRENCY', 2):
+            self.assertIsNone(self.poster.upload_media_files(['slow.jpg', 'bad.jpg', 'never.jpg', 'never2.jpg']))
+        # Returned without waiting for the upload still in flight
+        self.assertLess(time.monotonic() - started, 0.5)
+        release.set()
+
+        self.assertNotIn('never2.jpg', calls)
+
+    def test_post_aborts_without_tweeting(self):
+        self.poster.upload_media = lambda path, cancelled=None: None
+        self.poster.client = mock.Mock()
+
+        self.assertFalse(self.poster.post('hello', ['a.jpg']))
+        self.poster.client.create_tweet.assert_not_called()
+
+
+class TestRateLimits(unittest.TestCase):
+    """Test that a non-blocking poster raises RateLimited instead of sleeping."""
+
+    def setUp(self):
+        with mock.patch.multiple(twitter_script, API_KEY='k', API_SECRET='s', ACCESS_TOKEN='t', ACCESS_SECRET='ts'):
+            self.poster = twitter_script.TwitterPoster(wait_on_rate_limit=False)
+
+    def _response(self, path, remaining, reset):
+        return mock.Mock(url=f'https://api.twitter.com{path}',
+                         headers={'x-rate-limit-remaining': str(remaining), 'x-rate-limit-reset': str(reset)})
+
+    def test_spent_quota_defers_before_uploading(self):
+        reset = int(time.time()) + 600
+        self.poster.rate_limits.record(self._response('/2/tweets', 0, reset))
+        self.poster.upload_media = mock.Mock()
+
+        with self.assertRaises(twitter_script.RateLimited) as ctx:
+            self.poster.post('hello', ['a.jpg'])
+        self.assertEqual(ctx.exception.reset_at, reset)
+        self.poster.upload_media.assert_not_called()
+
+    def test_quota_left_or_reset_passed_is_admitted(self):
+        tracker = self.poster.rate_limits
+        tracker.record(self._response('/2/tweets', 3, int(time.time()) + 600))
+        self.assertIsNone(tracker.reset_at('/2/tweets'))
+        tracker.record(self._response('/2/tweets', 0, int(time.time()) - 1))
+        self.assertIsNone(tracker.reset_at('/2/tweets'))
+
+    def test_429_raises_instead_of_sleeping(self):
+        reset = int(time.time()) + 900
+        response = mock.Mock(status_code=429, url='https://api.twitter.com/2/tweets', reason='Too Many Requests',
+                             headers={'x-rate-limit-reset': str(reset)}, json=mock.Mock(return_value={}))
+        self.poster.client = mock.Mock()
+        self.poster.client.create_tweet.side_effect = twitter_script.tweepy.TooManyRequests(response)
+
+        with mock.patch.object(twitter_script.time, 'sleep') as sleep:
+            with self.assertRaises(twitter_script.RateLimited) as ctx:
+                self.poster.post('hello')
+        sleep.assert_not_called()
+        self.assertEqual(ctx.exception.reset_at, reset)
+
+    def test_deferred_tweet_reuses_uploaded_media(self):
+        reset = int(time.time()) + 900
+        response = mock.Mock(status_code=429, url='https://api.twitter.com/2/tweets', reason='Too Many Requests',
+                             headers={'x-rate-limit-reset': str(reset)}, json=mock.Mock(return_value={}))
+        self.poster.client = mock.Mock()
+        self.poster.client.create_tweet.side_effect = [twitter_script.tweepy.TooManyRequests(response), mock.Mock(data={'id': '1'})]
+        self.poster.upload_media = mock.Mock(return_value='m1')
+        post = publishing.PostRequest(message='hello', image_files=['a.jpg'])
+
+        with mock.patch.object(publishing, 'get_poster', return_value=self.poster):
+            with self.assertRaises(Deferred):
+                publishing.publish('twitter', post)
+            self.assertEqual(post.uploaded_media, {'twitter': ['m1']})
+            self.assertTrue(publishing.publish('twitter', post)['success'])
+
+        self.poster.upload_media.assert_called_once()
+        self.assertEqual(self.poster.client.create_tweet.call_args.kwargs['media_ids'], ['m1'])
+
+
+class FakeUploadAPI:
+    """Stand-in for the v1.1 chunked media upload endpoints."""
+
+    def __init__(self):
+        self.inits = 0
+        self.appends = []
+        self.fail_appends = set()
+        self.media = {}
+        self.status_checks = []
+        self.processing_rounds = 1
+
+    def chunked_upload_init(self, total_bytes, media_type, media_category=None):
+        self.inits += 1
+        media_id = str(1000 + self.inits)
+        self.media[media_id] = {}
+        return SimpleNamespace(media_id=media_id, expires_after_secs=86400)
+
+    def chunked_upload_append(self, media_id, media, segment_index):
+        self.appends.append(segment_index)
+        if segment_index in self.fail_appends:
+            self.fail_appends.discard(segment_index)
+            raise twitter_script.tweepy.TweepyException('Failed to send request: connection reset')
+        self.media[media_id][segment_index] = media[1]
+
+    def chunked_upload_finalize(self, media_id):
+        return SimpleNamespace(media_id=media_id, processing_info={'state': 'pending', 'check_after_secs': 0})
+
+    def get_media_upload_status(self, media_id):
+        self.status_checks.append(media_id)
+        state = 'in_progress' if self.status_checks.count(media_id) <= self.processing_rounds else 'succeeded'
+        return SimpleNamespace(media_id=media_id, processing_info={'state': state, 'check_after_secs': 0})
+
+    def uploaded(self, media_id):
+        parts = self.media[media_id]
+        return b''.join(parts[i] for i in sorted(parts))
+
+
+class TestChunkedVideoUpload(unittest.TestCase):
+    """Test segment retry, resume from checkpoint and processing polls."""
+
+    def setUp(self):
+        self.poster = _poster()
+        self.api = self.poster.api = FakeUploadAPI()
+        video = tempfile.NamedTemporaryFile(suffix='.mp4', delete=False)
+        self.payload = os.urandom(250)
+        video.write(self.payload)
+        video.close()
+        self.video = video.name
+        self.addCleanup(os.remove, self.video)
+        patcher = mock.patch.multiple(twitter_script, VIDEO_SEGMENT_SIZE=100, VIDEO_SEGMENT_RETRIES=2,
+                                      VIDEO_RETRY_BACKOFF=0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_failed_segment_is_retried_alone(self):
+        self.api.fail_appends = {1}
+        media_id = self.poster._upload_video(self.video)
+
+        self.assertEqual(self.api.appends, [0, 1, 1, 2])
+        self.assertEqual(self.api.uploaded(media_id), self.payload)
+
+    def test_retry_resumes_from_checkpoint(self):
+        original = self.api.chunked_upload_append
+
+        def drop_segment_two(media_id, media, segment_index):
+            if segment_index == 2 and self.api.appends.count(2) < 2:
+                self.api.appends.append(segment_index)
+                raise twitter_script.tweepy.TweepyException('connection reset')
+            return original(media_id, media, segment_index)
+
+        self.api.chunked_upload_append = drop_segment_two
+        with mock.patch.object(twitter_script.time, 'sleep'):
+            media_id = self.poster.upload_media(self.video)
+
+        self.assertEqual(self.api.inits, 1)
+        # Segments 0 and 1 were never re-sent after segment 2 ran out of retries
+        self.assertEqual(self.api.appends, [0, 1, 2, 2, 2])
+        self.assertEqual(self.api.uploaded(media_id), self.payload)
+
+    def test_processing_is_polled_before_tweeting(self):
+        self.poster.client = mock.Mock()
+        self.assertTrue(self.poster.post('hello', [self.video]))
+
+        self.assertEqual(self.api.status_checks, ['1001', '1001'])
+        self.poster.client.create_tweet.assert_called_once_with(text='hello', media_ids=['1001'])
+
+    def test_non_waiting_poster_returns_future(self):
+        self.poster.wait_on_rate_limit = False
+        self.poster.client = mock.Mock()
+        self.api.processing_rounds = 2
+        checked = threading.Event()
+        original = self.api.get_media_upload_status
+
+        def status(media_id):
+            # Hold the first poll until post() has returned
+            checked.wait(5)
+            return original(media_id)
+
+        self.api.get_media_upload_status = status
+        with mock.patch.object(twitter_script.time, 'sleep') as sleep:
+            result = self.poster.post('hello', [self.video])
+            self.assertIsInstance(result, twitter_script.Future)
+            self.assertFalse(result.done())
+            checked.set()
+            self.assertTrue(result.result(timeout=5))
+        sleep.assert_not_called()
+        self.assertEqual(self.api.status_checks, ['1001'] * 3)
+        self.poster.client.create_tweet.assert_called_once_with(text='hello', media_ids=['1001'])
+
+    def test_failed_processing_resolves_false(self):
+        self.poster.client = mock.Mock()
+        self.api.get_media_upload_status = lambda media_id: SimpleNamespace(
+            processing_info={'state': 'failed', 'error': {'message': 'bad codec'}})
+
+        self.assertFalse(self.poster.post('hello', [self.video]))
+        self.poster.client.create_tweet.assert_not_called()
+        self.assertEqual(self.poster._processing, {})
+        self.assertEqual(self.poster._processing_waits, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,8 @@
 import os
 from flask import Flask
 
+from .jobs import JobQueue
+
 
 def create_app():
     """Create and configure the Flask application (same behavior as original app.py)."""
@@ -9,16 +11,29 @@ def create_app():
 
     upload_folder = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'uploads'))
     app.config['UPLOAD_FOLDER'] = upload_folder
-    app.config['UPLOAD_PUBLIC_FOLDER'] = os.path.join(upload_folder, 'public')
+    # Must match the media origin's folder (scripts/media_origin.py), which also reads SOCMED_PUBLIC_FOLDER
+    app.config['UPLOAD_PUBLIC_FOLDER'] = os.getenv('SOCMED_PUBLIC_FOLDER', os.path.join(upload_folder, 'public'))
     app.config['ALLOWED_EXTENSIONS'] = {
         'image': {'png', 'jpg', 'jpeg', 'gif', 'webp'},
         'video': {'mp4', 'avi', 'mov', 'wmv', 'flv', 'webm', 'mkv'}
     }
+    # '' (Flask streams files), 'x-sendfile' (Apache/lighttpd) or 'x-accel-redirect' (nginx)
+    app.config['PUBLIC_UPLOAD_SENDFILE'] = os.getenv('SOCMED_SENDFILE', '').lower()
+    app.config['USE_X_SENDFILE'] = app.config['PUBLIC_UPLOAD_SENDFILE'] == 'x-sendfile'
+    app.config['ACCEL_REDIRECT_PREFIX'] = os.getenv('SOCMED_ACCEL_REDIRECT_PREFIX', '/protected_uploads')
     app.config['MAX_CONTENT_LENGTH'] = 100 * 1024 * 1024  # 100MB
+    app.config['JOB_WORKERS'] = int(os.getenv('SOCMED_JOB_WORKERS', '8'))
+    app.config['JOB_RETENTION'] = int(os.getenv('SOCMED_JOB_RETENTION', '3600'))  # seconds
 
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
     os.makedirs(app.config['UPLOAD_PUBLIC_FOLDER'], exist_ok=True)
 
+    # Background workers that run the platform calls for /post
+    app.extensions['socmed_jobs'] = JobQueue(
+        max_workers=app.config['JOB_WORKERS'],
+        retention=app.config['JOB_RETENTION'],
+    )
+
     # Register blueprints (import from package routes)
     from .routes import main_bp, api_bp, utils_bp
     app.register_blueprint(main_bp)